@@ -0,0 +1,358 @@
+"""Admission Control
+Box-wide concurrency limits for heavy endpoints, with bounded wait queues
+and deadlines. Requests over the limit get a fast 429 with Retry-After, so
+video processing can never occupy every gunicorn worker and license and
+image requests keep their latency.
+"""
+
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from .metrics import registry
+from .thread_governor import worker_count
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX: limits fall back to this process only
+    fcntl = None
+
+# Configuration
+ADMISSION_DIR = os.getenv('MEASULOR_ADMISSION_DIR', os.path.join(tempfile.gettempdir(), 'measulor_admission'))
+POLL_INTERVAL = 0.05  # Seconds between slot checks while waiting
+# Gunicorn workers heavy requests (running or waiting, all classes together)
+# may never take; default half of them
+RESERVED_WORKERS = os.getenv('MEASULOR_ADMISSION_RESERVED_WORKERS', '')
+
+ADMISSION_IN_FLIGHT = registry.gauge(
+    'measulor_admission_in_flight',
+    'Requests holding an admission slot in this worker',
+    ('endpoint',)
+)
+ADMISSION_WAITING = registry.gauge(
+    'measulor_admission_queue_depth',
+    'Requests waiting for an admission slot in this worker',
+    ('endpoint',)
+)
+ADMISSION_REJECTED = registry.counter(
+    'measulor_admission_rejected_total',
+    'Requests rejected with 429',
+    ('endpoint', 'reason')
+)
+ADMISSION_WAIT = registry.histogram(
+    'measulor_admission_wait_seconds',
+    'Time admitted requests waited for a slot',
+    ('endpoint',)
+)
+
+def shared_worker_slots(workers: Optional[int] = None) -> int:
+    """
+    Workers all heavy endpoint classes may occupy together
+
+    A waiting request ties up a sync worker as much as a running one, so the
+    shared pool counts both.
+
+    Args:
+        workers: Worker count (defaults to worker_count())
+
+    Returns:
+        workers minus MEASULOR_ADMISSION_RESERVED_WORKERS (at least 1)
+    """
+    workers = workers or worker_count()
+    reserved = int(RESERVED_WORKERS) if RESERVED_WORKERS else workers // 2
+    return max(1, workers - reserved)
+
+class AdmissionPolicy:
+    """Limits for one endpoint class"""
+
+    def __init__(self, max_concurrent: int, max_waiting: int, max_wait_seconds: float,
+                 retry_after: float = 5.0):
+        """
+        Args:
+            max_concurrent: Requests processed at once across all workers
+            max_waiting: Requests allowed to wait for a slot across all workers
+            max_wait_seconds: Deadline for a waiting request
+            retry_after: Initial Retry-After hint (refined from observed hold times)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_waiting = max(0, max_waiting)
+        self.max_wait_seconds = max_wait_seconds
+        self.retry_after = retry_after
+
+    def __repr__(self):
+        return (f"AdmissionPolicy({self.max_concurrent} concurrent, {self.max_waiting} waiting, "
+                f"{self.max_wait_seconds}s)")
+
+def _policy_from_env(name: str, default: AdmissionPolicy) -> AdmissionPolicy:
+    """Override as MEASULOR_ADMISSION_<NAME>=concurrent,waiting,wait_seconds"""
+    value = os.getenv(f'MEASULOR_ADMISSION_{name.upper()}')
+    if not value:
+        return default
+    concurrent, waiting, wait_seconds = value.split(',')
+    return AdmissionPolicy(int(concurrent), int(waiting), float(wait_seconds), default.retry_after)
+
+def default_policies() -> Dict[str, AdmissionPolicy]:
+    """
+    Policies per endpoint class, sized from the gunicorn worker count
+
+    With 4 workers, at most one 3D reconstruction runs and one waits. Every
+    class also holds a place in the shared worker pool while it runs or
+    waits (shared_worker_slots()), so all classes together occupy at most
+    two workers and two are left for everything else.
+
+    Returns:
+        Policy by endpoint class
+    """
+    workers = worker_count()
+    return {
+        'video_3d': _policy_from_env('video_3d', AdmissionPolicy(max(1, workers // 4), 1, 15.0, retry_after=30.0)),
+        'video_upload': _policy_from_env('video_upload', AdmissionPolicy(max(1, workers // 2), 2, 5.0, retry_after=5.0)),
+        'video_frames': _policy_from_env('video_frames', AdmissionPolicy(max(1, workers // 2), 2, 10.0, retry_after=10.0)),
+        'measure_batch': _policy_from_env('measure_batch', AdmissionPolicy(max(1, workers // 2), 2, 5.0, retry_after=30.0))
+    }
+
+class AdmissionRejected(Exception):
+    """No slot became available"""
+
+    def __init__(self, endpoint: str, reason: str, retry_after: int):
+        super().__init__(f"{endpoint}: {reason}")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+
+_shared_semaphores = {}  # Non-POSIX fallback for the shared pool, by (directory, size)
+
+class AdmissionController:
+    """Slot-file semaphore for one endpoint class
+
+    Each slot is a file locked with flock, so the limit holds across every
+    worker on the box and a crashed worker's slot is freed by the kernel.
+    Requests also hold a 'shared' file, from a pool common to all classes,
+    while they run or wait.
+    """
+
+    def __init__(self, endpoint: str, policy: AdmissionPolicy, directory: str = ADMISSION_DIR,
+                 shared_slots: Optional[int] = None):
+        """
+        Args:
+            endpoint: Endpoint class name (metric label and file prefix)
+            policy: Limits
+            directory: Directory for slot files (shared by the box's workers)
+            shared_slots: Size of the pool shared by all classes (defaults to
+                shared_worker_slots())
+        """
+        self.endpoint = endpoint
+        self.policy = policy
+        self.directory = directory
+        shared_slots = shared_slots or shared_worker_slots()
+        self._files = {
+            'slot': [os.path.join(directory, f'{endpoint}.slot{i}') for i in range(policy.max_concurrent)],
+            'wait': [os.path.join(directory, f'{endpoint}.wait{i}') for i in range(policy.max_waiting)],
+            'shared': [os.path.join(directory, f'shared.slot{i}') for i in range(shared_slots)]
+        }
+        self._local = {
+            'slot': threading.Semaphore(policy.max_concurrent),
+            'wait': threading.Semaphore(policy.max_waiting),
+            'shared': _shared_semaphores.setdefault((directory, shared_slots), threading.Semaphore(shared_slots))
+        }
+        self._avg_hold = policy.retry_after
+        os.makedirs(directory, exist_ok=True)
+
+    def _try_lock(self, kind: str) -> Optional[int]:
+        """Lock the first free 'slot', 'wait' or 'shared' file; returns its fd"""
+        if fcntl is None:
+            return -1 if self._local[kind].acquire(blocking=False) else None
+        for path in self._files[kind]:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def _unlock(self, kind: str, fd: int):
+        if fd == -1:
+            self._local[kind].release()
+        else:
+            os.close(fd)  # Closing drops the flock
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait, from recent slot hold times"""
+        waiting = max(1, self.policy.max_waiting)
+        return max(1, math.ceil(self._avg_hold * waiting / self.policy.max_concurrent))
+
+    def _reject(self, reason: str):
+        ADMISSION_REJECTED.inc(endpoint=self.endpoint, reason=reason)
+        raise AdmissionRejected(self.endpoint, reason, self.retry_after())
+
+    def _free(self, kind: str) -> bool:
+        fd = self._try_lock(kind)
+        if fd is None:
+            return False
+        self._unlock(kind, fd)
+        return True
+
+    def check_capacity(self):
+        """
+        Reject now if acquire() could not even wait (probes without holding)
+
+        Raises:
+            AdmissionRejected: The endpoint class or the shared pool is saturated
+        """
+        if not self._free('shared') or not (self._free('slot') or self._free('wait')):
+            self._reject('saturated')
+
+    def acquire(self) -> Tuple[int, int]:
+        """
+        Take a slot, waiting up to the policy deadline
+
+        Returns:
+            Slot handle for release()
+
+        Raises:
+            AdmissionRejected: Shared pool or wait queue full, or deadline passed
+        """
+        shared = self._try_lock('shared')
+        if shared is None:
+            self._reject('workers_busy')
+        try:
+            return shared, self._acquire_slot()
+        except BaseException:
+            self._unlock('shared', shared)
+            raise
+
+    def _acquire_slot(self) -> int:
+        slot = self._try_lock('slot')
+        if slot is not None:
+            ADMISSION_WAIT.observe(0.0, endpoint=self.endpoint)
+            ADMISSION_IN_FLIGHT.inc(endpoint=self.endpoint)
+            return slot
+
+        waiter = self._try_lock('wait')
+        if waiter is None:
+            self._reject('queue_full')
+
+        start = time.monotonic()
+        deadline = start + self.policy.max_wait_seconds
+        ADMISSION_WAITING.inc(endpoint=self.endpoint)
+        try:
+            while slot is None and time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                slot = self._try_lock('slot')
+        finally:
+            ADMISSION_WAITING.dec(endpoint=self.endpoint)
+            self._unlock('wait', waiter)
+
+        if slot is None:
+            self._reject('timeout')
+        ADMISSION_WAIT.observe(time.monotonic() - start, endpoint=self.endpoint)
+        ADMISSION_IN_FLIGHT.inc(endpoint=self.endpoint)
+        return slot
+
+    def release(self, handle: Tuple[int, int], held_seconds: Optional[float] = None):
+        """
+        Give a slot back
+
+        Args:
+            handle: Handle from acquire()
+            held_seconds: How long it was held (refines Retry-After)
+        """
+        shared, slot = handle
+        self._unlock('slot', slot)
+        self._unlock('shared', shared)
+        ADMISSION_IN_FLIGHT.dec(endpoint=self.endpoint)
+        if held_seconds is not None:
+            self._avg_hold = 0.8 * self._avg_hold + 0.2 * held_seconds
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+def get_controller(endpoint: str) -> AdmissionController:
+    """Process-wide controller for an endpoint class"""
+    with _controllers_lock:
+        controller = _controllers.get(endpoint)
+        if controller is None:
+            controller = AdmissionController(endpoint, default_policies()[endpoint])
+            _controllers[endpoint] = controller
+        return controller
+
+@contextmanager
+def admitted(endpoint: str):
+    """
+    Hold an admission slot for the duration of a block
+
+    Args:
+        endpoint: Endpoint class in default_policies()
+
+    Raises:
+        AdmissionRejected: No slot became available
+    """
+    controller = get_controller(endpoint)
+    slot = controller.acquire()
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        controller.release(slot, time.monotonic() - start)
+
+def rejection_response(error: AdmissionRejected):
+    """429 response with Retry-After for a rejected request"""
+    from flask import jsonify
+
+    response = jsonify({
+        'success': False,
+        'message': 'Server busy, please retry later',
+        'retry_after': error.retry_after
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+def reject_if_saturated(endpoint: str):
+    """
+    Decorator for Flask views that take their admission slot late
+
+    Views that read and hash the upload before deciding whether they need a
+    slot (cache hits do not) would otherwise accept whole uploads they are
+    bound to refuse. While every slot and wait place is taken, this answers
+    429 before the body is read; repeats are served from the cache on retry.
+
+    Args:
+        endpoint: Endpoint class in default_policies()
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                get_controller(endpoint).check_capacity()
+            except AdmissionRejected as e:
+                return rejection_response(e)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def admission_controlled(endpoint: str):
+    """
+    Decorator for Flask views that must hold an admission slot
+
+    The slot is taken before the request body is read, so rejected uploads
+    cost almost nothing.
+
+    Args:
+        endpoint: Endpoint class in default_policies()
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                with admitted(endpoint):
+                    return view(*args, **kwargs)
+            except AdmissionRejected as e:
+                return rejection_response(e)
+        return wrapper
+    return decorator
@@ -0,0 +1,113 @@
+"""Batch Measurement
+Runs many single-photo measurements concurrently on the worker's pooled
+detectors and yields each result as soon as it finishes, for NDJSON
+streaming from /api/measure/batch
+"""
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .detector_pool import MAX_IDLE_PER_PROFILE
+from .metrics import registry
+from .thread_governor import threads_per_worker
+
+# Configuration
+BATCH_MAX_ITEMS = int(os.getenv('MEASULOR_BATCH_MAX_ITEMS', '50'))
+BATCH_MAX_BYTES = int(os.getenv('MEASULOR_BATCH_MAX_BYTES', str(200 * 1024 * 1024)))
+# 0 = the worker's share of cores, up to MEASULOR_MAX_IDLE_DETECTORS so
+# every thread gets a warm detector back from the pool
+BATCH_CONCURRENCY = int(os.getenv('MEASULOR_BATCH_CONCURRENCY', '0'))
+
+BATCH_ITEMS = registry.counter(
+    'measulor_batch_items_total',
+    'Batch measurement items by outcome (success, failed, error)',
+    ('outcome',)
+)
+
+def batch_concurrency() -> int:
+    """Items measured at once within one batch request"""
+    if BATCH_CONCURRENCY > 0:
+        return BATCH_CONCURRENCY
+    # More threads than idle detectors would create and close a cold one per item
+    return max(1, min(threads_per_worker(), MAX_IDLE_PER_PROFILE))
+
+def parse_items(manifest: Optional[str], count: int,
+                default_height: Optional[Union[float, str]] = None) -> Tuple[bool, any]:
+    """
+    Per-item ids and reference heights for a batch
+
+    Args:
+        manifest: JSON list of {"id", "height_cm"} in upload order, or None
+        count: Number of uploaded images
+        default_height: height_cm for items that do not set one (form value)
+
+    Returns:
+        (success, [{'index', 'id', 'height_cm'}] or error_message)
+    """
+    if manifest:
+        try:
+            entries = json.loads(manifest)
+        except ValueError:
+            return False, 'items must be a JSON list'
+        if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+            return False, 'items must be a JSON list of objects'
+        if len(entries) != count:
+            return False, f'items has {len(entries)} entries for {count} images'
+    else:
+        entries = [{}] * count
+
+    items = []
+    for index, entry in enumerate(entries):
+        height = entry.get('height_cm', default_height)
+        if height is not None:
+            try:
+                height = float(height)
+            except (TypeError, ValueError):
+                return False, f'Item {index}: height_cm must be a number'
+            if height <= 0:
+                return False, f'Item {index}: height_cm must be positive'
+        items.append({'index': index, 'id': entry.get('id', index), 'height_cm': height})
+    return True, items
+
+def run_batch(items: List[Dict], measure: Callable[[Dict], Dict],
+              concurrency: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Measure items concurrently, yielding results in completion order
+
+    Pending items are cancelled if the consumer stops early (e.g. the
+    client disconnected from the stream).
+
+    Args:
+        items: Items from parse_items(), plus whatever measure() needs
+        measure: Measures one item; returns a result dict with 'success'
+        concurrency: Worker threads (defaults to batch_concurrency())
+
+    Yields:
+        Result dicts with 'index', 'id' and 'elapsed_ms' added
+    """
+    executor = ThreadPoolExecutor(max_workers=concurrency or batch_concurrency(),
+                                  thread_name_prefix='measulor-batch')
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            result = measure(item)
+            outcome = 'success' if result.get('success') else 'failed'
+        except Exception as e:
+            result = {'success': False, 'message': f'Processing error: {str(e)}'}
+            outcome = 'error'
+        BATCH_ITEMS.inc(outcome=outcome)
+        return dict(result, elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    try:
+        pending = {executor.submit(timed, item): item for item in items}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                yield {'index': item['index'], 'id': item['id'], **future.result()}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -6,6 +6,8 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 import math
 
+from .bootstrap_confidence import bootstrap_confidence_intervals, measurement_matrix
+
 # MediaPipe landmark indices
 LANDMARKS = {
     'left_shoulder': 11,
@@ -193,8 +195,12 @@ def calculate_measurements_from_poses(poses: List[Dict],
         
         # Average measurements across all frames
         avg_measurements = {}
-        measurement_keys = [k for k in all_measurements[0].keys() 
-                          if k not in ['calibration_factor', 'unit', 'error']]
+        # Keys from every frame: a measurement missing from the first frame
+        # can still be present in the others
+        measurement_keys = []
+        for m in all_measurements:
+            measurement_keys.extend(k for k in m if k not in measurement_keys
+                                    and k not in ['calibration_factor', 'unit', 'error'])
         
         for key in measurement_keys:
             values = [m[key] for m in all_measurements if key in m]
@@ -202,6 +208,15 @@ def calculate_measurements_from_poses(poses: List[Dict],
                 avg_measurements[key] = np.mean(values)
                 avg_measurements[f'{key}_std'] = np.std(values)
         
+        # Bootstrap confidence intervals over the per-frame measurement matrix;
+        # each column resamples the frames its mean above was taken over
+        interval_keys = [k for k in measurement_keys
+                         if any(isinstance(m.get(k), (int, float)) for m in all_measurements)]
+        avg_measurements['confidence_intervals'] = bootstrap_confidence_intervals(
+            measurement_matrix(all_measurements, interval_keys),
+            interval_keys
+        )
+        
         avg_measurements['calibration_factor'] = calculator.calibration_factor
         avg_measurements['unit'] = all_measurements[0].get('unit', 'pixels')
         avg_measurements['frames_used'] = len(all_measurements)
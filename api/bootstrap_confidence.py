@@ -0,0 +1,218 @@
+"""Bootstrap Confidence Intervals
+Vectorized percentile bootstrap over per-frame measurement matrices, or over
+per-frame landmarks for estimators computed from averaged landmarks
+"""
+
+import warnings
+
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+# Configuration
+DEFAULT_CONFIDENCE_LEVEL = 0.95
+MAX_RESAMPLES = 1000               # Upper bound on bootstrap resamples (B)
+MIN_RESAMPLES = 100                # Below this the percentiles get too noisy
+BOOTSTRAP_ELEMENT_BUDGET = 250000  # Target elements in the (B x N x K) resample tensor (soft, see resample_count)
+BOOTSTRAP_SEED = 0                 # Fixed seed so identical inputs give identical intervals
+
+def resample_count(num_frames: int, num_measurements: int,
+                   budget: int = BOOTSTRAP_ELEMENT_BUDGET) -> int:
+    """
+    Number of resamples that fits the compute budget
+
+    The budget is soft: MIN_RESAMPLES wins over it, so once N * K exceeds
+    budget / MIN_RESAMPLES (2500 by default) the resample tensor grows past
+    the budget, linearly in N * K.
+
+    Args:
+        num_frames: Rows in the measurement matrix (N)
+        num_measurements: Columns in the measurement matrix (K)
+        budget: Target number of gathered elements (B * N * K)
+
+    Returns:
+        Number of resamples B, clamped to [MIN_RESAMPLES, MAX_RESAMPLES]
+    """
+    per_resample = max(1, num_frames * num_measurements)
+    return int(min(MAX_RESAMPLES, max(MIN_RESAMPLES, budget // per_resample)))
+
+def bootstrap_confidence_intervals(matrix: np.ndarray,
+                                   keys: List[str],
+                                   confidence_level: float = DEFAULT_CONFIDENCE_LEVEL,
+                                   n_resamples: Optional[int] = None,
+                                   seed: int = BOOTSTRAP_SEED) -> Dict:
+    """
+    Percentile bootstrap confidence intervals for the mean of each column
+
+    All resamples are drawn as a single (B x N) index array and gathered in
+    one fancy-indexing step, so the cost is bounded by B * N * K regardless
+    of how many measurements are requested. NaN cells (frames without that
+    measurement) are left out of each mean, as they are of the reported one.
+
+    Args:
+        matrix: Per-frame measurements, shape (N frames, K measurements)
+        keys: Measurement names for the K columns
+        confidence_level: Two-sided interval coverage (e.g. 0.95)
+        n_resamples: Number of resamples; derived from the budget if None
+        seed: Random seed for the resampling indices
+
+    Returns:
+        Dictionary with per-measurement intervals and bootstrap metadata
+    """
+    data = np.asarray(matrix, dtype=np.float64)
+    if data.ndim != 2 or data.shape[1] != len(keys):
+        raise ValueError(f"Expected matrix of shape (N, {len(keys)}), got {data.shape}")
+
+    num_frames, num_measurements = data.shape
+    if num_frames < 2:
+        return {
+            'method': 'percentile_bootstrap',
+            'confidence_level': confidence_level,
+            'resamples': 0,
+            'frames': num_frames,
+            'intervals': {}
+        }
+
+    if n_resamples is None:
+        n_resamples = resample_count(num_frames, num_measurements)
+
+    # (B, N, K) gather -> (B, K) resample means
+    replicates = resample_means(data, n_resamples, seed)
+    return _percentile_intervals(_nan_mean(data, axis=0), replicates, keys, confidence_level, num_frames)
+
+def _nan_mean(values: np.ndarray, axis: int) -> np.ndarray:
+    """Mean ignoring NaN cells; NaN (without a warning) where a slice has none"""
+    if not np.isnan(values).any():
+        return values.mean(axis=axis)
+    counts = (~np.isnan(values)).sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nansum(values, axis=axis) / counts
+
+def resample_means(samples: np.ndarray, n_resamples: int, seed: int = BOOTSTRAP_SEED) -> np.ndarray:
+    """
+    Means of bootstrap resamples of the rows of an array (ignoring NaN cells)
+
+    Args:
+        samples: Per-frame data, shape (N, ...)
+        n_resamples: Number of resamples (B)
+        seed: Random seed for the resampling indices
+
+    Returns:
+        Array of shape (B, ...)
+    """
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, len(samples), size=(n_resamples, len(samples)))
+    return _nan_mean(samples[indices], axis=1)
+
+def bootstrap_statistic_intervals(samples: np.ndarray,
+                                  statistic: Callable[[np.ndarray], np.ndarray],
+                                  keys: List[str],
+                                  confidence_level: float = DEFAULT_CONFIDENCE_LEVEL,
+                                  n_resamples: Optional[int] = None,
+                                  seed: int = BOOTSTRAP_SEED) -> Dict:
+    """
+    Percentile bootstrap intervals for a statistic of the per-frame mean
+
+    For estimators that average the frames first and then measure (e.g.
+    lengths between averaged landmarks): each resample of frames is
+    averaged and passed through the same statistic as the reported value,
+    so the interval brackets the number that is reported.
+
+    Args:
+        samples: Per-frame data, shape (N, ...)
+        statistic: Maps a stack of means, shape (B, ...), to (B, K) values
+        keys: Names for the K values
+        confidence_level: Two-sided interval coverage (e.g. 0.95)
+        n_resamples: Number of resamples; derived from the budget if None
+        seed: Random seed for the resampling indices
+
+    Returns:
+        Dictionary with per-measurement intervals ('estimate' is the
+        reported value) and bootstrap metadata
+    """
+    data = np.asarray(samples, dtype=np.float64)
+    num_frames = len(data)
+    if num_frames < 2:
+        return {
+            'method': 'percentile_bootstrap',
+            'confidence_level': confidence_level,
+            'resamples': 0,
+            'frames': num_frames,
+            'intervals': {}
+        }
+
+    if n_resamples is None:
+        n_resamples = resample_count(num_frames, data[0].size)
+
+    estimate = np.asarray(statistic(data.mean(axis=0)[np.newaxis]))[0]
+    replicates = np.asarray(statistic(resample_means(data, n_resamples, seed)))
+    if replicates.shape != (n_resamples, len(keys)):
+        raise ValueError(f"Statistic must return shape (B, {len(keys)}), got {replicates.shape}")
+    return _percentile_intervals(estimate, replicates, keys, confidence_level, num_frames,
+                                 center_key='estimate')
+
+def _percentile_intervals(center: np.ndarray, replicates: np.ndarray, keys: List[str],
+                          confidence_level: float, num_frames: int, center_key: str = 'mean') -> Dict:
+    alpha = (1.0 - confidence_level) / 2.0
+    # Resamples that drew no usable frame for a measurement are NaN; skip them
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        lower, upper = np.nanquantile(replicates, [alpha, 1.0 - alpha], axis=0)
+
+    intervals = {}
+    for i, key in enumerate(keys):
+        if not np.isfinite(center[i]) or not np.isfinite(lower[i]):
+            continue
+        intervals[key] = {
+            center_key: float(center[i]),
+            'lower': float(lower[i]),
+            'upper': float(upper[i]),
+            'width': float(upper[i] - lower[i])
+        }
+
+    return {
+        'method': 'percentile_bootstrap',
+        'confidence_level': confidence_level,
+        'resamples': int(len(replicates)),
+        'frames': int(num_frames),
+        'intervals': intervals
+    }
+
+def measurement_matrix(per_frame_measurements: List[Dict],
+                       keys: List[str]) -> np.ndarray:
+    """
+    Stack per-frame measurement dictionaries into an (N x K) matrix
+
+    Every frame keeps its row; a measurement a frame lacks (or that is not
+    a number) is NaN, so each column covers the same frames as the mean of
+    that measurement.
+
+    Args:
+        per_frame_measurements: One measurement dictionary per frame
+        keys: Measurement names to use as columns
+
+    Returns:
+        Measurement matrix of shape (N, K)
+    """
+    rows = [[m[k] if isinstance(m.get(k), (int, float)) else np.nan for k in keys]
+            for m in per_frame_measurements]
+    return np.asarray(rows, dtype=np.float64).reshape(len(rows), len(keys))
+
+def select_intervals(confidence_intervals: Dict, fields: List[str]) -> Dict:
+    """
+    Pick the intervals for a subset of measurements, rounded for display
+
+    Args:
+        confidence_intervals: Output of bootstrap_confidence_intervals()
+        fields: Measurement names to keep
+
+    Returns:
+        {field: {'lower', 'upper'}} for the fields that have an interval
+    """
+    intervals = confidence_intervals.get('intervals', {}) if confidence_intervals else {}
+    return {
+        field: {
+            'lower': round(intervals[field]['lower'], 2),
+            'upper': round(intervals[field]['upper'], 2)
+        }
+        for field in fields if field in intervals
+    }
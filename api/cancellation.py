@@ -0,0 +1,155 @@
+"""Request Deadlines and Cancellation
+Cancellation token created by request handlers and checked by pipeline stages
+between units of work, so abandoned requests stop burning CPU
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import Callable, Optional
+
+# Configuration: stay under nginx's proxy_read_timeout (120s)
+REQUEST_DEADLINE = float(os.getenv('MEASULOR_REQUEST_DEADLINE_SECONDS', '110'))
+JOB_DEADLINE = float(os.getenv('MEASULOR_JOB_DEADLINE_SECONDS', '900'))
+DISCONNECT_CHECK_INTERVAL = 0.5  # Seconds between client socket probes
+REQUEST_START_KEY = 'measulor.request_start'  # WSGI environ key set on arrival
+
+# Reason used when a queue worker loses its lease (the job is not failed)
+LEASE_LOST = 'lease lost'
+
+class OperationCancelled(Exception):
+    """Raised by CancellationToken.check() once the token has tripped"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class CancellationToken:
+    """Deadline plus explicit and client-disconnect cancellation"""
+
+    def __init__(self, timeout_seconds: Optional[float] = None,
+                 disconnected: Optional[Callable[[], bool]] = None,
+                 started_at: Optional[float] = None):
+        """
+        Args:
+            timeout_seconds: Seconds until the deadline (None for no deadline)
+            disconnected: Probe returning True once the client has gone away
+            started_at: time.monotonic() the timeout counts from (default now)
+        """
+        start = time.monotonic() if started_at is None else started_at
+        self.deadline = start + timeout_seconds if timeout_seconds else None
+        self._disconnected = disconnected
+        self._next_probe = 0.0
+        self._reason = None
+        self._lock = threading.Lock()
+
+    def cancel(self, reason: str = 'cancelled'):
+        """Trip the token (first reason wins)"""
+        with self._lock:
+            if self._reason is None:
+                self._reason = reason
+
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without one"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        if self._reason is not None:
+            return True
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            self.cancel('deadline exceeded')
+        elif self._disconnected is not None and now >= self._next_probe:
+            # Probing the socket is a syscall; rate-limit it
+            self._next_probe = now + DISCONNECT_CHECK_INTERVAL
+            if self._disconnected():
+                self.cancel('client disconnected')
+        return self._reason is not None
+
+    def check(self):
+        """
+        Raise if the token has tripped; call between units of work
+
+        Raises:
+            OperationCancelled
+        """
+        if self.cancelled:
+            raise OperationCancelled(self._reason)
+
+def check_cancelled(token: Optional[CancellationToken]):
+    """check() that accepts None, for stages called without a token"""
+    if token is not None:
+        token.check()
+
+def client_disconnect_probe(environ) -> Optional[Callable[[], bool]]:
+    """
+    Probe for a closed client connection, where the server exposes its socket
+
+    gunicorn's sync workers put the socket in the WSGI environ. Once the
+    request body has been read, a readable socket with no data means the
+    peer (the client, or nginx after the client left) closed it.
+
+    Args:
+        environ: WSGI environ
+
+    Returns:
+        Callable returning True once the client disconnected, or None
+    """
+    sock = environ.get('gunicorn.socket')
+    if sock is None:
+        return None
+
+    def disconnected() -> bool:
+        try:
+            return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            return True
+
+    return disconnected
+
+def init_request_deadline(app):
+    """
+    Record when each request arrives on a Flask app
+
+    Request deadlines count from this point, so time spent waiting for an
+    admission slot or another request's result is part of the deadline.
+
+    Args:
+        app: Flask application
+    """
+    from flask import request
+
+    @app.before_request
+    def _mark_request_start():
+        request.environ[REQUEST_START_KEY] = time.monotonic()
+
+def request_started_at() -> float:
+    """time.monotonic() when the current request arrived (now if unrecorded)"""
+    from flask import request
+    return request.environ.get(REQUEST_START_KEY) or time.monotonic()
+
+def request_remaining(timeout_seconds: float = REQUEST_DEADLINE) -> float:
+    """Seconds left before the current request's deadline"""
+    return max(0.0, request_started_at() + timeout_seconds - time.monotonic())
+
+def request_token(timeout_seconds: float = REQUEST_DEADLINE) -> CancellationToken:
+    """
+    Token for the current Flask request: deadline plus disconnect detection
+
+    Args:
+        timeout_seconds: Request deadline, counted from the request's arrival
+
+    Returns:
+        CancellationToken
+    """
+    from flask import request
+    return CancellationToken(timeout_seconds, client_disconnect_probe(request.environ),
+                             started_at=request_started_at())
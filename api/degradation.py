@@ -0,0 +1,173 @@
+"""Load-Adaptive Degradation
+Reads a live load signal (CPU load, job backlog) and lowers frame count,
+processing resolution and model complexity within configured bounds, so
+traffic spikes produce slightly less precise results instead of timeouts
+"""
+
+import math
+import os
+from typing import Dict, Optional
+
+from .metrics import registry
+from .thread_governor import worker_count
+
+# Configuration
+MAX_LEVEL = int(os.getenv('MEASULOR_DEGRADE_MAX_LEVEL', '3'))  # 0 disables degradation
+LEVEL_THRESHOLDS = tuple(float(t) for t in os.getenv('MEASULOR_DEGRADE_THRESHOLDS', '1.25,1.75,2.5').split(','))
+MIN_FRAMES = int(os.getenv('MEASULOR_DEGRADE_MIN_FRAMES', '12'))
+MIN_DIMENSION = int(os.getenv('MEASULOR_DEGRADE_MIN_DIMENSION', '480'))
+ALLOW_MODEL_DOWNGRADE = os.getenv('MEASULOR_DEGRADE_MODEL', '1') == '1'
+
+# Settings per level; level 0 is full quality
+DEGRADATION_LEVELS = (
+    {'frame_scale': 1.0, 'max_dimension': None, 'reduced_model': False},
+    {'frame_scale': 0.75, 'max_dimension': 960, 'reduced_model': False},
+    {'frame_scale': 0.5, 'max_dimension': 720, 'reduced_model': True},
+    {'frame_scale': 0.4, 'max_dimension': 480, 'reduced_model': True}
+)
+
+# Lighter detector profile used at reduced-model levels
+REDUCED_PROFILES = {
+    'video': 'video_lite',
+    'video_3d': 'video_3d_lite'
+}
+
+DEGRADATION_LEVEL = registry.gauge(
+    'measulor_degradation_level',
+    'Degradation level applied to the last run of each pipeline',
+    ('pipeline',)
+)
+LOAD_SIGNAL = registry.gauge(
+    'measulor_load_signal',
+    'Load inputs to the degradation controller (1.0 = saturated)',
+    ('source',)
+)
+
+def cpu_load() -> Optional[float]:
+    """1-minute load average per core on the box, or None where unsupported"""
+    if not hasattr(os, 'getloadavg'):
+        return None
+    # The load average counts every core, so divide by all of them rather
+    # than this worker's affinity set (a share of them with MEASULOR_PIN_WORKERS)
+    return os.getloadavg()[0] / (os.cpu_count() or 1)
+
+_queue = None
+
+def queue_backlog() -> Optional[float]:
+    """Waiting distributed jobs per worker process, or None without a queue"""
+    global _queue
+    from .job_queue import QUEUE_URL, open_job_queue
+
+    if not QUEUE_URL:
+        return None
+    try:
+        if _queue is None:
+            _queue = open_job_queue(QUEUE_URL)
+        stats = _queue.stats()
+    except Exception:
+        return None
+    return (stats['ready'] + stats['delayed']) / worker_count()
+
+def load_signal() -> Dict:
+    """
+    Current load inputs
+
+    Returns:
+        {'cpu', 'queue', 'load'}; 'load' is the highest available input
+    """
+    signal = {'cpu': cpu_load(), 'queue': queue_backlog()}
+    inputs = [value for value in signal.values() if value is not None]
+    signal['load'] = max(inputs) if inputs else 0.0
+    for source, value in signal.items():
+        if value is not None:
+            LOAD_SIGNAL.set(value, source=source)
+    return signal
+
+def level_for_load(load: float, max_level: Optional[int] = None) -> int:
+    """
+    Map a load value to a degradation level
+
+    Args:
+        load: Load from load_signal()
+        max_level: Highest level allowed (defaults to MAX_LEVEL)
+
+    Returns:
+        Level between 0 and max_level
+    """
+    level = sum(1 for threshold in LEVEL_THRESHOLDS if load >= threshold)
+    max_level = MAX_LEVEL if max_level is None else max_level
+    return max(0, min(level, max_level, len(DEGRADATION_LEVELS) - 1))
+
+class DegradationPlan:
+    """Processing settings chosen for one pipeline run"""
+
+    def __init__(self, pipeline: str, level: int, max_frames: int, requested_frames: int,
+                 max_dimension: Optional[int], detector_profile: str, signal: Dict):
+        self.pipeline = pipeline
+        self.level = level
+        self.max_frames = max_frames
+        self.requested_frames = requested_frames
+        self.max_dimension = max_dimension
+        self.detector_profile = detector_profile
+        self.signal = signal
+
+    @property
+    def degraded(self) -> bool:
+        return self.level > 0
+
+    def frame_interval(self, base: int) -> int:
+        """
+        Video sampling interval that spreads the plan's frames over the span
+        a full-quality run covers (not just its first max_frames samples)
+
+        Args:
+            base: Interval at full quality (every Nth frame)
+
+        Returns:
+            Interval for this plan
+        """
+        return max(1, math.ceil(base * self.requested_frames / self.max_frames))
+
+    def to_dict(self) -> Dict:
+        """Entry for the result's quality section"""
+        return {
+            'level': self.level,
+            'degraded': self.degraded,
+            'max_frames': self.max_frames,
+            'requested_frames': self.requested_frames,
+            'max_dimension': self.max_dimension,
+            'detector_profile': self.detector_profile,
+            'load': {k: (round(v, 2) if v is not None else None) for k, v in self.signal.items()}
+        }
+
+def plan_degradation(pipeline: str, max_frames: int, detector_profile: str,
+                     signal: Optional[Dict] = None) -> DegradationPlan:
+    """
+    Choose processing settings for a pipeline run from the current load
+
+    Args:
+        pipeline: Pipeline name (metric label)
+        max_frames: Frames requested at full quality
+        detector_profile: Full-quality detector profile
+        signal: Load inputs (defaults to load_signal())
+
+    Returns:
+        DegradationPlan
+    """
+    signal = signal if signal is not None else load_signal()
+    level = level_for_load(signal['load'])
+    settings = DEGRADATION_LEVELS[level]
+
+    frames = min(max_frames, max(MIN_FRAMES, round(max_frames * settings['frame_scale'])))
+    dimension = settings['max_dimension']
+    if dimension is not None:
+        dimension = max(dimension, MIN_DIMENSION)
+    profile = detector_profile
+    if settings['reduced_model'] and ALLOW_MODEL_DOWNGRADE:
+        profile = REDUCED_PROFILES.get(detector_profile, detector_profile)
+
+    DEGRADATION_LEVEL.set(level, pipeline=pipeline)
+    if level > 0:
+        print(f"Load {signal['load']:.2f}: {pipeline} degraded to level {level} "
+              f"({frames} frames, max {dimension}px, {profile})")
+    return DegradationPlan(pipeline, level, frames, max_frames, dimension, profile, signal)
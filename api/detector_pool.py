@@ -0,0 +1,151 @@
+"""Pose Detector Pool
+Per-process pool of reusable MediaPipe Pose instances, keyed by detector profile
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Detector profiles used by the endpoints and pipelines
+DETECTOR_PROFILES = {
+    # Single photos (/api/process, /api/measure), two passes per photo (person_crop)
+    'image': {
+        'static_image_mode': True,
+        'model_complexity': 1,
+        'min_detection_confidence': 0.5
+    },
+    # 2D video pipeline (tracking between frames)
+    'video': {
+        'static_image_mode': False,
+        'model_complexity': 1,
+        'min_detection_confidence': 0.5,
+        'min_tracking_confidence': 0.5
+    },
+    # 3D reconstruction (world landmarks, highest quality model)
+    'video_3d': {
+        'static_image_mode': False,
+        'model_complexity': 2,
+        'min_detection_confidence': 0.5,
+        'min_tracking_confidence': 0.5
+    },
+    # Reduced-complexity variants used under load (see degradation.py)
+    'video_lite': {
+        'static_image_mode': False,
+        'model_complexity': 0,
+        'min_detection_confidence': 0.5,
+        'min_tracking_confidence': 0.5
+    },
+    'video_3d_lite': {
+        'static_image_mode': False,
+        'model_complexity': 1,
+        'min_detection_confidence': 0.5,
+        'min_tracking_confidence': 0.5
+    }
+}
+
+MAX_IDLE_PER_PROFILE = int(os.getenv('MEASULOR_MAX_IDLE_DETECTORS', '2'))
+
+_lock = threading.Lock()
+_idle: Dict[str, List] = {}
+_owner_pid = os.getpid()
+
+def _check_fork():
+    """
+    Drop detectors inherited across fork()
+
+    MediaPipe graphs own threads that do not survive fork, so a worker must
+    never reuse instances created in the gunicorn master.
+    """
+    global _owner_pid
+    if _owner_pid != os.getpid():
+        _idle.clear()
+        _owner_pid = os.getpid()
+
+def create_detector(profile: str):
+    """
+    Create a new MediaPipe Pose instance for a profile
+
+    Args:
+        profile: Key of DETECTOR_PROFILES
+
+    Returns:
+        mediapipe Pose solution
+    """
+    if profile not in DETECTOR_PROFILES:
+        raise ValueError(f"Unknown detector profile: {profile}")
+    # Lazy load mediapipe so importing this module stays cheap
+    import mediapipe as mp
+    return mp.solutions.pose.Pose(**DETECTOR_PROFILES[profile])
+
+def acquire_detector(profile: str):
+    """
+    Take an idle detector for a profile, creating one if none is idle
+
+    Args:
+        profile: Key of DETECTOR_PROFILES
+
+    Returns:
+        mediapipe Pose solution; hand it back with release_detector()
+    """
+    with _lock:
+        _check_fork()
+        idle = _idle.get(profile)
+        if idle:
+            return idle.pop()
+    return create_detector(profile)
+
+def release_detector(profile: str, detector):
+    """
+    Return a detector to the pool
+
+    Tracking state is reset so the next user does not inherit landmarks from
+    an unrelated video. Detectors beyond the idle limit are closed.
+
+    Args:
+        profile: Profile the detector was acquired for
+        detector: Detector from acquire_detector()
+    """
+    if detector is None:
+        return
+    try:
+        detector.reset()
+    except Exception:
+        detector.close()
+        return
+
+    with _lock:
+        _check_fork()
+        idle = _idle.setdefault(profile, [])
+        if len(idle) < MAX_IDLE_PER_PROFILE:
+            idle.append(detector)
+            return
+    detector.close()
+
+@contextmanager
+def pooled_detector(profile: str):
+    """
+    Borrow a detector for the duration of a block
+
+    Args:
+        profile: Key of DETECTOR_PROFILES
+
+    Yields:
+        mediapipe Pose solution
+    """
+    detector = acquire_detector(profile)
+    try:
+        yield detector
+    finally:
+        release_detector(profile, detector)
+
+def pool_stats() -> Dict[str, int]:
+    """
+    Get idle detector counts per profile
+
+    Returns:
+        {profile: idle_count}
+    """
+    with _lock:
+        _check_fork()
+        return {profile: len(idle) for profile, idle in _idle.items()}
@@ -8,6 +8,8 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 from enum import Enum
 
+from .cancellation import OperationCancelled
+
 class ErrorSeverity(Enum):
     """Error severity levels"""
     INFO = "info"
@@ -248,6 +250,9 @@ def safe_execute(func, category: ErrorCategory, *args, **kwargs):
     try:
         result = func(*args, **kwargs)
         return True, result
+    except OperationCancelled:
+        # Not an error of the tool; the pipeline stops
+        raise
     except Exception as e:
         error_response = handle_pipeline_error(
             e,
@@ -260,3 +265,35 @@ def safe_execute(func, category: ErrorCategory, *args, **kwargs):
             }
         )
         return False, error_response
+
+def safe_execute_tool(func, category: ErrorCategory, *args, **kwargs):
+    """
+    Safely execute a pipeline tool that returns its own (success, result)
+    
+    Unwraps the tool's result so callers get the value directly, and turns
+    a tool-reported failure into a formatted error response.
+    
+    Args:
+        func: Tool function returning (success, result_or_error)
+        category: Error category
+        *args: Function arguments
+        **kwargs: Function keyword arguments
+    
+    Returns:
+        (success, result_or_error)
+    """
+    success, result = safe_execute(func, category, *args, **kwargs)
+    if not success:
+        return False, result
+    
+    tool_success, value = result
+    if tool_success:
+        return True, value
+    
+    message = value.get('error', str(value)) if isinstance(value, dict) else str(value)
+    return False, handle_pipeline_error(
+        ValueError(message),
+        category,
+        ErrorSeverity.WARNING,
+        {'function': func.__name__}
+    )
@@ -6,6 +6,8 @@ import cv2
 import numpy as np
 from typing import List, Tuple, Optional
 
+from .cancellation import CancellationToken, OperationCancelled, check_cancelled
+
 # Configuration
 DEFAULT_FRAME_INTERVAL = 5  # Extract every 5th frame
 MAX_FRAMES_TO_PROCESS = 30  # Maximum frames to extract
@@ -43,7 +45,9 @@ def get_video_info(video_path: str) -> Optional[dict]:
 
 def extract_frames(video_path: str, 
                   frame_interval: int = DEFAULT_FRAME_INTERVAL,
-                  max_frames: int = MAX_FRAMES_TO_PROCESS) -> Tuple[bool, any]:
+                  max_frames: int = MAX_FRAMES_TO_PROCESS,
+                  max_dimension: Optional[int] = None,
+                  cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
     """
     Extract frames from video at specified intervals
     
@@ -51,10 +55,16 @@ def extract_frames(video_path: str,
         video_path: Path to video file
         frame_interval: Extract every Nth frame
         max_frames: Maximum number of frames to extract
+        max_dimension: Downscale frames whose longer side exceeds this
+        cancel_token: Checked before each decoded frame
     
     Returns:
         (success, frames_list or error_message)
+    
+    Raises:
+        OperationCancelled: The token tripped
     """
+    cap = None
     try:
         cap = cv2.VideoCapture(video_path)
         
@@ -66,6 +76,7 @@ def extract_frames(video_path: str,
         extracted_count = 0
         
         while cap.isOpened() and extracted_count < max_frames:
+            check_cancelled(cancel_token)
             ret, frame = cap.read()
             
             if not ret:
@@ -73,21 +84,74 @@ def extract_frames(video_path: str,
             
             # Extract frame at specified interval
             if frame_number % frame_interval == 0:
+                if max_dimension and max(frame.shape[:2]) > max_dimension:
+                    scale = max_dimension / max(frame.shape[:2])
+                    frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
                 frames.append(frame)
                 extracted_count += 1
             
             frame_number += 1
         
-        cap.release()
-        
         # Check if we have enough frames
         if len(frames) < MIN_FRAMES_REQUIRED:
             return False, f"Too few frames extracted. Got {len(frames)}, need at least {MIN_FRAMES_REQUIRED}"
         
         return True, frames
     
+    except OperationCancelled:
+        raise
     except Exception as e:
         return False, f"Error extracting frames: {str(e)}"
+    
+    finally:
+        if cap is not None:
+            cap.release()
+
+def decode_frame_images(images: List[bytes],
+                        max_frames: int = MAX_FRAMES_TO_PROCESS,
+                        max_dimension: Optional[int] = None,
+                        cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
+    """
+    Decode frames sampled by the client (JPEG/PNG) into the same BGR frames
+    extract_frames returns, without decoding a video
+    
+    Args:
+        images: Encoded frames in capture order
+        max_frames: Maximum number of frames; extra ones are skipped evenly before decoding
+        max_dimension: Downscale frames whose longer side exceeds this
+        cancel_token: Checked before each decoded frame
+    
+    Returns:
+        (success, frames_list or error_message)
+    
+    Raises:
+        OperationCancelled: The token tripped
+    """
+    try:
+        if len(images) < MIN_FRAMES_REQUIRED:
+            return False, f"Too few frames uploaded. Got {len(images)}, need at least {MIN_FRAMES_REQUIRED}"
+        
+        if len(images) > max_frames:
+            indices = np.linspace(0, len(images) - 1, max_frames).round().astype(int)
+            images = [images[i] for i in indices]
+        
+        frames = []
+        for i, data in enumerate(images):
+            check_cancelled(cancel_token)
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                return False, f"Could not decode frame {i + 1}"
+            if max_dimension and max(frame.shape[:2]) > max_dimension:
+                scale = max_dimension / max(frame.shape[:2])
+                frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            frames.append(frame)
+        
+        return True, frames
+    
+    except OperationCancelled:
+        raise
+    except Exception as e:
+        return False, f"Error decoding frames: {str(e)}"
 
 def extract_single_frame(video_path: str, frame_position: int = 0) -> Tuple[bool, any]:
     """
@@ -120,6 +184,53 @@ def extract_single_frame(video_path: str, frame_position: int = 0) -> Tuple[bool
     except Exception as e:
         return False, f"Error extracting frame: {str(e)}"
 
+def extract_thumbnails(video_path: str, count: int = 8,
+                       size: int = 32) -> Tuple[bool, any]:
+    """
+    Extract tiny grayscale frames at evenly spaced positions in the video
+    
+    Positions are fractions of the clip, so re-exports at another frame rate
+    or resolution sample the same moments.
+    
+    Args:
+        video_path: Path to video file
+        count: Number of frames
+        size: Side of the square thumbnails in pixels
+    
+    Returns:
+        (success, (thumbnails_list, duration_seconds) or error_message)
+    """
+    cap = None
+    try:
+        cap = cv2.VideoCapture(video_path)
+        
+        if not cap.isOpened():
+            return False, "Could not open video file"
+        
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if frame_count < count:
+            return False, f"Too few frames for a fingerprint ({frame_count})"
+        
+        thumbnails = []
+        for i in range(count):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int((i + 0.5) * frame_count / count))
+            ret, frame = cap.read()
+            if not ret:
+                return False, f"Could not read frame {i + 1} of {count}"
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            thumbnails.append(cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA))
+        
+        duration = frame_count / fps if fps > 0 else 0
+        return True, (thumbnails, duration)
+    
+    except Exception as e:
+        return False, f"Error extracting thumbnails: {str(e)}"
+    
+    finally:
+        if cap is not None:
+            cap.release()
+
 def extract_frames_by_time(video_path: str, 
                           time_intervals: List[float]) -> Tuple[bool, any]:
     """
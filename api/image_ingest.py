@@ -0,0 +1,85 @@
+"""Image Ingest
+Decodes uploaded photos for single-image measurement: JPEGs are decoded at
+reduced resolution with DCT scaling (PIL draft mode), EXIF orientation is
+applied, and the result is a contiguous RGB buffer MediaPipe can use as-is
+"""
+
+import io
+import os
+from typing import Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Configuration
+# The pose model runs on 256 px inputs; decoding larger only adds cost
+DECODE_MAX_DIMENSION = int(os.getenv('MEASULOR_IMAGE_DECODE_MAX_DIMENSION', '1280'))
+
+class IngestedImage:
+    """Decoded RGB pixels plus the upload's full (oriented) resolution"""
+
+    def __init__(self, rgb: np.ndarray, original_size: Tuple[int, int]):
+        """
+        Args:
+            rgb: HxWx3 uint8 C-contiguous array
+            original_size: (width, height) of the upload after EXIF orientation
+        """
+        self.rgb = rgb
+        self.original_size = original_size
+
+    @property
+    def decoded_size(self) -> Tuple[int, int]:
+        """(width, height) actually decoded"""
+        return self.rgb.shape[1], self.rgb.shape[0]
+
+    @property
+    def scale(self) -> float:
+        """Original pixels per decoded pixel"""
+        return self.original_size[0] / self.rgb.shape[1]
+
+def _orientation(image: Image.Image) -> int:
+    """EXIF orientation tag (1 = upright)"""
+    try:
+        return image.getexif().get(0x0112, 1)
+    except Exception:
+        return 1
+
+def ingest_image(image: Union[Image.Image, bytes], max_dimension: int = DECODE_MAX_DIMENSION) -> IngestedImage:
+    """
+    Decode a photo at roughly the resolution pose detection needs
+
+    Args:
+        image: PIL image from Image.open (not yet loaded) or encoded bytes
+        max_dimension: Longest side to decode at; JPEG DCT scaling rounds so
+            the decoded image is never smaller than this
+
+    Returns:
+        IngestedImage
+    """
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+
+    orientation = _orientation(image)
+    width, height = image.size
+    # Orientations 5-8 include a 90 degree rotation
+    original_size = (height, width) if orientation in (5, 6, 7, 8) else (width, height)
+    longest = max(width, height)
+    if longest > max_dimension:
+        if image.format == 'JPEG':
+            # Decode at 1/2, 1/4 or 1/8 scale in the IDCT instead of
+            # decoding full size and resizing
+            ratio = max_dimension / longest
+            image.draft('RGB', (max(1, int(width * ratio)), max(1, int(height * ratio))))
+        else:
+            factor = longest // max_dimension
+            if factor > 1:
+                if image.mode not in ('L', 'RGB'):
+                    # reduce() rejects palette and 1-bit images, among others
+                    image = image.convert('RGB')
+                image = image.reduce(factor)
+
+    if orientation != 1:
+        image = ImageOps.exif_transpose(image)  # Copies, so only when needed
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return IngestedImage(np.ascontiguousarray(np.asarray(image)), original_size)
@@ -1,6 +1,7 @@
 from flask import Flask, jsonify, request
 import base64
 import io
+import json
 import os
 import random
 import time
@@ -10,13 +11,32 @@ import secrets
 from cryptography.fernet import Fernet
 from datetime import datetime, timedelta
 from PIL import Image
+from werkzeug.exceptions import RequestEntityTooLarge
 
 import requests
 from .keygen_integration import verify_license_with_keygen
-from .video_3d_measurement_pipeline import Video3DMeasurementPipeline
-from .measure import process_image_measurements
+# MediaPipe (api.measure) and the 3D stack (trimesh, scipy) are imported by the
+# routes that use them, so license-only workers and cold starts skip them
+from .metrics import instrument_app, metrics_response
+from .server_timing import init_server_timing, timed_phase
+from .request_profiler import init_request_profiler
+from .cancellation import init_request_deadline, request_remaining
+from .warmup import readiness
+from .thread_governor import effective_config
+from .admission import (AdmissionRejected, admission_controlled, admitted, get_controller, reject_if_saturated,
+                        rejection_response)
+from .result_cache import cache_key, get_result_cache, hash_bytes
+from .video_upload import (MAX_FRAMES_UPLOAD_BYTES, MAX_IMAGE_UPLOAD_BYTES, MAX_UPLOADED_FRAMES, UploadRequest,
+                           ingest_file, limited_body, read_body, streamed_uploads, upload_too_large_response)
 
 app = Flask(__name__)
+# Video uploads stream to unique scratch files (see video_upload.streamed_uploads)
+app.request_class = UploadRequest
+instrument_app(app)
+init_server_timing(app)
+init_request_profiler(app)
+# Synchronous video deadlines count from arrival, including admission waits
+init_request_deadline(app)
 
 
 # License key system with cryptography
@@ -194,13 +214,16 @@ def index():
                     <li>Position yourself 6-8 feet from camera</li>
                     <li>Stand straight with arms slightly away from body</li>
                     <li>Ensure good lighting</li>
-                    <li>Click "Measure Now" to capture</li>
+                    <li>Click "Measure Now" to capture, or "Measure from Video" and turn slowly for a 3D scan</li>
                 </ol>
             </div>
             
             <div class="controls">
                 <button class="btn-primary" id="startBtn" onclick="startCamera()">Start Camera</button>
                 <button class="btn-secondary hidden" id="captureBtn" onclick="capturePhoto()">Measure Now</button>
+                <button class="btn-secondary" id="sequenceBtn" onclick="captureFrameSequence()" style="display:none;">
+                    🎥 Measure from Video
+                </button>
                 <button class="btn-secondary" id="switchBtn" onclick="switchCamera()" style="display:none;">🔄 Switch Camera</button>
             </div>
         </div>
@@ -282,29 +305,33 @@ def index():
                 document.getElementById('startBtn').style.display = 'none';
                 document.getElementById('switchBtn').style.display = 'block';
                 document.getElementById('captureBtn').style.display = 'block';
+                document.getElementById('sequenceBtn').style.display = 'block';
                 document.getElementById('status').textContent = 'Camera ready - Click Measure Now to capture';
             } catch (error) {
                 document.getElementById('status').textContent = 'Camera access denied';
             }
         }
 
+        // Pose landmarks are resolution-independent beyond this size, so the
+        // photo is downscaled in the browser and sent as binary JPEG
+        const PHOTO_MAX_DIMENSION = 1280;
+
         function capturePhoto() {
             const video = document.getElementById('video');
             const canvas = document.getElementById('canvas');
-            canvas.width = video.videoWidth;
-            canvas.height = video.videoHeight;
-            canvas.getContext('2d').drawImage(video, 0, 0);
+            const scale = Math.min(1, PHOTO_MAX_DIMENSION / Math.max(video.videoWidth, video.videoHeight));
+            canvas.width = Math.round(video.videoWidth * scale);
+            canvas.height = Math.round(video.videoHeight * scale);
+            canvas.getContext('2d').drawImage(video, 0, 0, canvas.width, canvas.height);
             
             document.getElementById('status').textContent = 'Processing measurements...';
             
-            fetch('/api/process', {
+            new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', 0.85))
+            .then(blob => fetch('/api/process', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    image: canvas.toDataURL('image/jpeg', 0.8), 
-                    license_key: activeLicenseKey 
-                })
-            })
+                headers: { 'Content-Type': 'image/jpeg', 'X-License-Key': activeLicenseKey || '' },
+                body: blob
+            }))
             .then(r => r.json())
             .then(data => {
                 if (data.success) {
@@ -329,6 +356,52 @@ def index():
             });
         }
 
+        // Video mode: sample downscaled frames in the browser and upload only
+        // those, instead of recording and uploading a whole video
+        const SEQUENCE_FRAMES = 24;
+        const SEQUENCE_INTERVAL_MS = 150;
+        const SEQUENCE_MAX_DIMENSION = 640;
+
+        async function captureFrameSequence() {
+            const video = document.getElementById('video');
+            const scale = Math.min(1, SEQUENCE_MAX_DIMENSION / Math.max(video.videoWidth, video.videoHeight));
+            const canvas = document.createElement('canvas');
+            canvas.width = Math.round(video.videoWidth * scale);
+            canvas.height = Math.round(video.videoHeight * scale);
+            const context = canvas.getContext('2d');
+            
+            const form = new FormData();
+            const timestamps = [];
+            const start = performance.now();
+            document.getElementById('status').textContent = 'Recording - turn slowly in place...';
+            for (let i = 0; i < SEQUENCE_FRAMES; i++) {
+                context.drawImage(video, 0, 0, canvas.width, canvas.height);
+                const blob = await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', 0.8));
+                form.append('frames', blob, `frame${i}.jpg`);
+                timestamps.push((performance.now() - start) / 1000);
+                await new Promise(resolve => setTimeout(resolve, SEQUENCE_INTERVAL_MS));
+            }
+            form.append('timestamps', JSON.stringify(timestamps));
+            form.append('pipeline', '3d');
+            
+            document.getElementById('status').textContent = 'Processing 3D measurements...';
+            try {
+                const response = await fetch('/api/measure-frames', { method: 'POST', body: form });
+                const data = await response.json();
+                if (data.success) {
+                    const rows = Object.entries(data.data.key_measurements).map(([name, value]) =>
+                        `<div class="measure-item"><span>${name.replace(/_/g, ' ')}:</span><span>${value}</span></div>`);
+                    document.getElementById('results').innerHTML = '<h3>Your 3D Measurements</h3>' + rows.join('');
+                    document.getElementById('results').style.display = 'block';
+                    document.getElementById('status').textContent = 'Measurement complete!';
+                } else {
+                    document.getElementById('status').textContent = data.message || 'Measurement failed. Please try again.';
+                }
+            } catch (error) {
+                document.getElementById('status').textContent = 'Error processing measurements';
+            }
+        }
+
         async function switchCamera() {
             if (currentStream) {
                 currentStream.getTracks().forEach(track => track.stop());
@@ -357,24 +430,58 @@ def index():
 </html>
 '''
 
+def _process_request_image():
+    """
+    Image bytes and license key from an /api/process request
+
+    Accepts raw image bytes (Content-Type image/* or application/octet-stream,
+    license in the X-License-Key header or ?license_key=), multipart ('image'
+    file plus 'license_key' field), or the original JSON with a base64 data URL.
+
+    Returns:
+        (image_bytes or None, license_key)
+    """
+    if request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+        license_key = request.headers.get('X-License-Key') or request.args.get('license_key', '')
+        return read_body(MAX_IMAGE_UPLOAD_BYTES) or None, license_key
+    if request.mimetype == 'multipart/form-data':
+        file = request.files.get('image')
+        return (file.read() if file else None), request.form.get('license_key', '')
+
+    try:
+        data = json.loads(read_body(MAX_IMAGE_UPLOAD_BYTES) or b'{}')
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    image_data = data.get('image', '')
+    if not image_data:
+        return None, data.get('license_key', '')
+    if 'base64,' in image_data:
+        image_data = image_data.split('base64,')[1]
+    return base64.b64decode(image_data), data.get('license_key', '')
+
 @app.route('/api/process', methods=['POST'])
+@limited_body(MAX_IMAGE_UPLOAD_BYTES)
 def process_image():
     try:
-        data = request.json
-        image_data = data.get('image', '')
-        if not image_data:
-            return jsonify({'success': False, 'message': 'No image provided'})
-        if 'base64,' in image_data:
-            image_data = image_data.split('base64,')[1]
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        width, height = image.size
-        license_key = data.get('license_key', '')        
+        with timed_phase('decode'):
+            image_bytes, license_key = _process_request_image()
+            if not image_bytes:
+                return jsonify({'success': False, 'message': 'No image provided'})
+            image = Image.open(io.BytesIO(image_bytes))
+            width, height = image.size
         # Check license and generate appropriate measurements
-        is_licensed = verify_license(license_key)
+        with timed_phase('license'):
+            is_licensed = verify_license(license_key)
         if is_licensed:            
-            # Real measurements using image analysis with MediaPipe
-            result = process_image_measurements(image)
+            # Real measurements using image analysis with MediaPipe; repeat
+            # uploads of the same image are served from the result cache
+            from .measure import process_image_measurements
+            key = cache_key(hash_bytes(image_bytes), endpoint='measure_image', profile='image')
+            result, _ = get_result_cache().get_or_compute(
+                key, lambda: process_image_measurements(image),
+                cacheable=lambda r: r.get('success', False))
             if not result.get('success', False):
                 return jsonify({'success': False, 'message': result.get('message', 'Failed to process image with MediaPipe')})
             
@@ -405,6 +512,8 @@ def process_image():
             measurements = generate_demo_measurements(width, height)
             message = 'Demo measurements generated'       
         return jsonify({'success': True, 'measurements': measurements, 'message': message})
+    except RequestEntityTooLarge:
+        return upload_too_large_response(MAX_IMAGE_UPLOAD_BYTES)
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
@@ -443,7 +552,19 @@ def check_license():
 
 @app.route('/api/health')
 def health():
-    return jsonify({'status': 'ok', 'message': 'Measulor API running', 'mode': 'demo'})
+    # Not ready (503) until this worker has warmed its detectors, so the
+    # load balancer never routes to a cold worker
+    ready = readiness()
+    if not ready['ready']:
+        return jsonify({'status': 'warming', 'message': 'Measulor API warming up', 'warmup': ready,
+                        'threads': effective_config()}), 503
+    return jsonify({'status': 'ok', 'message': 'Measulor API running', 'mode': 'demo', 'warmup': ready,
+                    'threads': effective_config()})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics (box-wide with MEASULOR_METRICS_DIR, else this worker's)"""
+    return metrics_response()
 
 # Key Generation Integration - Bulk License Key Generation
 @app.route('/api/keygen/generate', methods=['POST'])
@@ -560,7 +681,103 @@ def keygen_stats():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _video_result_cacheable(value):
+    """Only full-quality successes are reused; degraded runs are recomputed"""
+    if value['status'] != 200:
+        return False
+    full_results = value['body']['full_results']
+    quality = full_results.get('quality') or full_results.get('quality_analysis') or {}
+    return not quality.get('degradation', {}).get('degraded', False)
+
+def _run_video_3d(video_path, reference_height):
+    """Run the 3D pipeline on a saved upload; returns {'status', 'body'}"""
+    # Stops early if the client disconnects or the deadline (under nginx's
+    # timeout, counted from the request's arrival) passes
+    from .video_3d_measurement_pipeline import Video3DMeasurementPipeline
+    from .cancellation import request_token
+    cancel_token = request_token()
+    pipeline = Video3DMeasurementPipeline(reference_height)
+    success, result = pipeline.process_video(video_path, max_frames=30, cancel_token=cancel_token)
+    
+    if success:
+        return {'status': 200, 'body': {
+            'success': True,
+            'data': pipeline.get_summary(),
+            'pipeline': '3D reconstruction',
+            'full_results': result
+        }}
+    elif cancel_token.cancelled:
+        return {'status': 504, 'body': {
+            'success': False,
+            'message': f'Processing stopped: {cancel_token.reason}'
+        }}
+    else:
+        return {'status': 400, 'body': result}
+
+def _client_identity(data=None):
+    """License key the client sent (X-License-Key header or a license_key field), if any
+
+    Unverified: _measure_video_3d_file checks it before scoping reuse to it.
+    """
+    return request.headers.get('X-License-Key') or (data if data is not None else request.form).get('license_key') or None
+
+def _measure_video_3d_file(video_path, content_hash, reference_height, license_key=None):
+    """
+    3D measurement of a video on disk, through the result cache
+
+    Identical uploads (same bytes, height and profile) are answered from the
+    result cache, and re-exports of an already measured clip from its result
+    (video_fingerprint); only a miss takes a 'video_3d' admission slot.
+    Similar clips only match within one verified license: two people filmed
+    by the same fixed camera look alike to the fingerprint.
+    """
+    params = {'endpoint': 'measure_video_3d', 'reference_height_cm': reference_height,
+              'max_frames': 30, 'profile': 'video_3d'}
+    key = cache_key(content_hash, **params)
+    cache = get_result_cache()
+    similar = {}
+    
+    def compute():
+        # A re-export of an already measured clip reuses its result
+        from .video_fingerprint import compute_fingerprint, get_fingerprint_index
+        index = get_fingerprint_index() if license_key else None
+        if index is not None and not (index.policy.enabled and verify_license(license_key)):
+            index = None
+        fingerprint = None
+        if index is not None:
+            # Fingerprint matches must share the parameters and the license
+            scope = cache_key('', client=license_key, **params)
+            with timed_phase('fingerprint'):
+                ok, result = compute_fingerprint(video_path)
+            if ok:
+                fingerprint = result
+                match = index.lookup(fingerprint, scope)
+                value = cache.get(match['result_key'])[0] if match else None
+                if value is not None:
+                    similar.update(match)
+                    return value
+        
+        with admitted('video_3d'):
+            value = _run_video_3d(video_path, reference_height)
+        if fingerprint is not None and _video_result_cacheable(value):
+            index.add(fingerprint, scope, key)
+        return value
+    
+    try:
+        value, outcome = cache.get_or_compute(key, compute, cacheable=_video_result_cacheable,
+                                              wait_timeout=request_remaining())
+    except AdmissionRejected as e:
+        return rejection_response(e)
+    
+    response = jsonify(value['body'])
+    response.headers['X-Measulor-Cache'] = 'similar' if similar else outcome
+    if similar:
+        response.headers['X-Measulor-Similarity'] = f"{similar['distance']:.2f}"
+    return response, value['status']
+
 @app.route('/api/measure-video-3d', methods=['POST'])
+@reject_if_saturated('video_3d')
+@streamed_uploads()
 def measure_video_3d():
     """
     Process video for body measurements using 3D reconstruction
@@ -569,14 +786,17 @@ def measure_video_3d():
     Returns: Body measurements from 3D model analysis
     """
     try:
-        # Get video file from request
-        if 'video' not in request.files:
+        # Get video file from request; it streams to a unique scratch file,
+        # size-checked and hashed in the same pass
+        with timed_phase('upload'):
+            files = request.files
+        if 'video' not in files:
             return jsonify({
                 'success': False,
                 'message': 'No video file provided'
             }), 400
         
-        video_file = request.files['video']
+        video_file = files['video']
         
         if video_file.filename == '':
             return jsonify({
@@ -584,40 +804,374 @@ def measure_video_3d():
                 'message': 'No video file selected'
             }), 400
         
+        success, upload = ingest_file(video_file)
+        if not success:
+            return upload_too_large_response()
+        
         # Get optional reference height
         reference_height = request.form.get('height_cm', type=float)
         
-        # Save video temporarily
-        import tempfile
-        temp_path = os.path.join(tempfile.gettempdir(), 'upload_' + video_file.filename)
-        video_file.save(temp_path)
+        return _measure_video_3d_file(upload.path, upload.sha256, reference_height, _client_identity())
+    
+    except RequestEntityTooLarge:
+        return upload_too_large_response()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+def _run_client_frames(images, frame_info, pipeline_name, reference_height):
+    """Run a pipeline on client-sampled frames; returns {'status', 'body'}"""
+    from .cancellation import request_token
+    if pipeline_name == '3d':
+        from .video_3d_measurement_pipeline import Video3DMeasurementPipeline as Pipeline
+    else:
+        from .video_measurement_pipeline import VideoMeasurementPipeline as Pipeline
+    cancel_token = request_token()
+    pipeline = Pipeline(reference_height)
+    success, result = pipeline.process_frames(images, frame_info, max_frames=30, cancel_token=cancel_token)
+    
+    if success:
+        return {'status': 200, 'body': {
+            'success': True,
+            'data': pipeline.get_summary(),
+            'pipeline': '3D reconstruction' if pipeline_name == '3d' else '2D pose analysis',
+            'full_results': result
+        }}
+    elif cancel_token.cancelled:
+        return {'status': 504, 'body': {
+            'success': False,
+            'message': f'Processing stopped: {cancel_token.reason}'
+        }}
+    elif isinstance(result, dict):
+        return {'status': 400, 'body': result}
+    else:
+        return {'status': 400, 'body': {'success': False, 'message': result}}
+
+@app.route('/api/measure-frames', methods=['POST'])
+@limited_body(MAX_FRAMES_UPLOAD_BYTES)
+def measure_frames():
+    """
+    Body measurements from frames the client sampled from its camera or a
+    local video, skipping server-side video decoding
+    Accepts: multipart 'frames' (JPEG/PNG files in capture order), optional
+    'timestamps' (JSON list of seconds), 'pipeline' ('3d' or '2d'), 'height_cm'
+    Returns: Same response as /api/measure-video-3d
+    """
+    import hashlib
+    import json
+    from .video_jobs import VIDEO_PIPELINES
+    from .frame_extractor import MIN_FRAMES_REQUIRED
+    
+    try:
+        with timed_phase('upload'):
+            frame_files = request.files.getlist('frames')
+        if not frame_files:
+            return jsonify({'success': False, 'message': 'No frames provided'}), 400
+        if len(frame_files) > MAX_UPLOADED_FRAMES:
+            return jsonify({'success': False, 'message': f'Too many frames. Maximum: {MAX_UPLOADED_FRAMES}'}), 400
+        
+        pipeline = request.form.get('pipeline', '3d')
+        if pipeline not in VIDEO_PIPELINES:
+            return jsonify({
+                'success': False,
+                'message': f"Unknown pipeline. Use one of: {', '.join(VIDEO_PIPELINES)}"
+            }), 400
+        reference_height = request.form.get('height_cm', type=float)
         
-        # Process video through 3D pipeline
-        pipeline = Video3DMeasurementPipeline(reference_height)
-        success, result = pipeline.process_video(temp_path, max_frames=30)
+        images = [f.read() for f in frame_files]
+        timestamps = json.loads(request.form.get('timestamps') or 'null')
+        if timestamps is not None:
+            if len(timestamps) != len(images):
+                return jsonify({'success': False, 'message': 'timestamps must have one entry per frame'}), 400
+            # Put frames in capture order whatever order the parts arrived in
+            order = sorted(range(len(images)), key=lambda i: float(timestamps[i]))
+            images = [images[i] for i in order]
+            timestamps = [float(timestamps[i]) for i in order]
         
-        # Cleanup temp file
         try:
-            os.remove(temp_path)
-        except:
-            pass
+            # Header only; frames are decoded by the pipeline
+            width, height = Image.open(io.BytesIO(images[0])).size
+        except OSError:
+            return jsonify({'success': False, 'message': 'Frames must be JPEG or PNG images'}), 400
+        duration = timestamps[-1] - timestamps[0] if timestamps else 0
+        frame_info = {
+            'filename': None,
+            'source': 'client_frames',
+            'duration': duration,
+            'fps': (len(images) - 1) / duration if duration > 0 else 0,
+            'frame_count': len(images),
+            'width': width,
+            'height': height
+        }
+        if len(images) < MIN_FRAMES_REQUIRED:
+            return jsonify({
+                'success': False,
+                'message': f'Too few frames. Got {len(images)}, need at least {MIN_FRAMES_REQUIRED}'
+            }), 400
+        
+        digest = hashlib.sha256()
+        for data in images:
+            digest.update(hashlib.sha256(data).digest())
+        key = cache_key(digest.hexdigest(), endpoint='measure_frames', pipeline=pipeline,
+                        reference_height_cm=reference_height, max_frames=30)
+        
+        def compute():
+            # 3D runs cost the same whether the frames came from a video or the client
+            with admitted('video_3d' if pipeline == '3d' else 'video_frames'):
+                return _run_client_frames(images, frame_info, pipeline, reference_height)
+        
+        try:
+            value, outcome = get_result_cache().get_or_compute(key, compute, cacheable=_video_result_cacheable,
+                                                               wait_timeout=request_remaining())
+        except AdmissionRejected as e:
+            return rejection_response(e)
+        
+        response = jsonify(value['body'])
+        response.headers['X-Measulor-Cache'] = outcome
+        return response, value['status']
+    
+    except RequestEntityTooLarge:
+        return upload_too_large_response(MAX_FRAMES_UPLOAD_BYTES)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': f'Invalid frame upload: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+def _submit_video_job(pipeline, reference_height, extension, move_input):
+    """
+    Create a video job and hand its input to the job runner
+    
+    Args:
+        pipeline: '3d' or '2d'
+        reference_height: Optional reference height in cm
+        extension: Video file extension
+        move_input: Moves the input video to the given path and returns it
+    
+    Returns:
+        202 response with the job ID, or 400 for an unknown pipeline
+    """
+    from .video_jobs import VIDEO_PIPELINES, JOB_MAX_FRAMES, get_job_store, get_job_runner
+    
+    if pipeline not in VIDEO_PIPELINES:
+        return jsonify({
+            'success': False,
+            'message': f"Unknown pipeline. Use one of: {', '.join(VIDEO_PIPELINES)}"
+        }), 400
+    
+    store = get_job_store()
+    store.purge_expired()
+    job = store.create(pipeline, {
+        'reference_height_cm': reference_height,
+        'max_frames': JOB_MAX_FRAMES
+    })
+    
+    video_path = move_input(store.upload_path(job['job_id'], extension))
+    get_job_runner().submit(job['job_id'], video_path)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'status_url': f"/api/jobs/{job['job_id']}"
+    }), 202
+
+@app.route('/api/jobs', methods=['POST'])
+@admission_controlled('video_upload')
+@streamed_uploads()
+def submit_video_job():
+    """
+    Queue a video for asynchronous processing
+    Accepts: video file, optional height_cm and pipeline ('3d' or '2d')
+    Returns: 202 with a job ID to poll at /api/jobs/<job_id>
+    """
+    try:
+        from .video_upload import allowed_file, ALLOWED_EXTENSIONS
+        
+        with timed_phase('upload'):
+            files = request.files
+        if 'video' not in files or files['video'].filename == '':
+            return jsonify({'success': False, 'message': 'No video file provided'}), 400
         
-        if success:
-            summary = pipeline.get_summary()
+        video_file = files['video']
+        if not allowed_file(video_file.filename):
             return jsonify({
-                'success': True,
-                'data': summary,
-                'pipeline': '3D reconstruction',
-                'full_results': result
-            })
-        else:
-            return jsonify(result), 400
+                'success': False,
+                'message': f"Invalid file format. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
+            }), 400
+        
+        extension = video_file.filename.rsplit('.', 1)[1].lower()
+        success, upload = ingest_file(video_file, '.' + extension)
+        if not success:
+            return upload_too_large_response()
+        
+        return _submit_video_job(request.form.get('pipeline', '3d'), request.form.get('height_cm', type=float),
+                                 extension, upload.move_to)
     
+    except RequestEntityTooLarge:
+        return upload_too_large_response()
     except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+@app.route('/api/jobs/<job_id>')
+def get_video_job(job_id):
+    """Status of a queued video job; includes the result once finished"""
+    from .video_jobs import get_job_store
+    
+    try:
+        job = get_job_store().get(job_id)
+    except ValueError:
+        job = None
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found or expired'}), 404
+    
+    response = {
+        'success': True,
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'pipeline': job['pipeline'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    }
+    if job['status'] == 'succeeded':
+        response['result'] = job['result']
+    elif job['status'] == 'failed':
+        response['error'] = job['error']
+    return jsonify(response)
+
+def _upload_response(status, code=200):
+    """Upload status with the tus-style Upload-Offset header"""
+    response = jsonify({'success': True, **status, 'upload_url': f"/api/uploads/{status['upload_id']}"})
+    response.headers['Upload-Offset'] = str(status['offset'])
+    return response, code
+
+def _upload_error_response(error):
+    body = {'success': False, 'message': error.message}
+    if error.offset is not None:
+        body['offset'] = error.offset
+    response = jsonify(body)
+    if error.offset is not None:
+        response.headers['Upload-Offset'] = str(error.offset)
+    return response, error.status
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """
+    Start a resumable video upload
+    Accepts: JSON {filename, size}
+    Returns: 201 with upload_id; send chunks with PATCH /api/uploads/<upload_id>
+    """
+    from .resumable_upload import UploadError, get_upload_store
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        store = get_upload_store()
+        store.purge_expired()
+        return _upload_response(store.create(data.get('filename', ''), int(data.get('size') or 0)), 201)
+    except UploadError as e:
+        return _upload_error_response(e)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'size must be an integer'}), 400
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Resume point of an upload (offset of the next chunk)"""
+    from .resumable_upload import UploadError, get_upload_store
+    
+    try:
+        status = get_upload_store().get(upload_id)
+    except UploadError as e:
+        return _upload_error_response(e)
+    if status is None:
+        return jsonify({'success': False, 'message': 'Upload not found or expired'}), 404
+    return _upload_response(status)
+
+@app.route('/api/uploads/<upload_id>', methods=['PATCH'])
+def append_upload(upload_id):
+    """
+    Append a chunk
+    Accepts: raw bytes, with the Upload-Offset header set to the current offset
+    Returns: Upload status; 409 with the server's offset if they disagree
+    """
+    from .resumable_upload import UploadError, get_upload_store
+    
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.args.get('offset', '')))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Upload-Offset header is required'}), 400
+    try:
+        with timed_phase('upload'):
+            status = get_upload_store().append(upload_id, offset, request.stream, request.content_length)
+    except UploadError as e:
+        return _upload_error_response(e)
+    return _upload_response(status)
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def delete_upload(upload_id):
+    """Abort an upload"""
+    from .resumable_upload import UploadError, get_upload_store
+    
+    try:
+        get_upload_store().delete(upload_id)
+    except UploadError as e:
+        return _upload_error_response(e)
+    return '', 204
+
+@app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """
+    Complete an upload and run it through the video pipelines
+    Accepts: JSON {pipeline: '3d' | '2d', height_cm, mode: 'job' | 'sync', sha256}
+    Returns: 202 with a job ID (mode 'job'), or the /api/measure-video-3d
+    response (mode 'sync', 3D only)
+    """
+    from .resumable_upload import UploadError, get_upload_store
+    from .video_jobs import VIDEO_PIPELINES
+    
+    data = request.get_json(silent=True) or {}
+    pipeline = data.get('pipeline', '3d')
+    mode = data.get('mode', 'job')
+    if pipeline not in VIDEO_PIPELINES:
         return jsonify({
             'success': False,
-            'message': f'Error: {str(e)}'
-        }), 500
+            'message': f"Unknown pipeline. Use one of: {', '.join(VIDEO_PIPELINES)}"
+        }), 400
+    if mode not in ('job', 'sync') or (mode == 'sync' and pipeline != '3d'):
+        return jsonify({'success': False, 'message': "mode must be 'job', or 'sync' with pipeline '3d'"}), 400
+    try:
+        reference_height = float(data['height_cm']) if data.get('height_cm') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'height_cm must be a number'}), 400
+    
+    if mode == 'sync':
+        # Refuse while saturated before finalize hashes the whole upload
+        try:
+            get_controller('video_3d').check_capacity()
+        except AdmissionRejected as e:
+            return rejection_response(e)
+    try:
+        video_path, extension, content_hash = get_upload_store().finalize(upload_id, data.get('sha256'))
+    except UploadError as e:
+        return _upload_error_response(e)
+    
+    try:
+        if mode == 'sync':
+            response, status = _measure_video_3d_file(video_path, content_hash, reference_height,
+                                                      _client_identity(data))
+            if status in (429, 504):
+                # Not measured; keep the upload so the client can retry finalize
+                get_upload_store().restore(upload_id, video_path)
+            return response, status
+        import shutil
+        return _submit_video_job(pipeline, reference_height, extension,
+                                 lambda destination: shutil.move(video_path, destination))
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+    finally:
+        # Left behind by sync mode, or by a job that was never submitted
+        if os.path.exists(video_path):
+            os.remove(video_path)
 
 if __name__ == '__main__':
     app.run()
@@ -0,0 +1,624 @@
+"""Video Job Queue
+Pluggable queue with leases, retries and visibility timeouts so video jobs can
+run on separate worker nodes. Backends: SQLite (single box, tests) and any
+Redis-protocol server (production).
+
+Queue URLs (MEASULOR_QUEUE_URL):
+    sqlite:////var/lib/measulor/queue.db
+    redis://:password@host:6379/0
+"""
+
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# Configuration
+QUEUE_URL = os.getenv('MEASULOR_QUEUE_URL', '')
+VISIBILITY_TIMEOUT = float(os.getenv('MEASULOR_QUEUE_VISIBILITY_TIMEOUT', '300'))
+MAX_ATTEMPTS = int(os.getenv('MEASULOR_QUEUE_MAX_ATTEMPTS', '3'))
+RETRY_DELAY = float(os.getenv('MEASULOR_QUEUE_RETRY_DELAY', '10'))
+RECORD_TTL = int(os.getenv('MEASULOR_JOB_TTL_SECONDS', '3600'))
+ACTIVE_RECORD_TTL = 24 * 3600  # Upper bound for records of jobs that never finish
+BLOB_CHUNK_SIZE = 1024 * 1024  # Input videos are copied in pieces this size, never read whole
+
+class Lease:
+    """A message handed to one worker until acked, nacked or timed out"""
+
+    def __init__(self, message_id: str, job_id: str, payload: Dict, attempts: int, token: str):
+        self.message_id = message_id
+        self.job_id = job_id
+        self.payload = payload
+        self.attempts = attempts
+        self.token = token
+
+    def __repr__(self):
+        return f"Lease(job_id={self.job_id!r}, attempts={self.attempts})"
+
+class JobQueue:
+    """Queue interface shared by the backends
+
+    Besides messages, a backend stores job records and input blobs, so
+    workers on other nodes need no shared filesystem.
+    """
+
+    def __init__(self, visibility_timeout: float = VISIBILITY_TIMEOUT,
+                 max_attempts: int = MAX_ATTEMPTS, retry_delay: float = RETRY_DELAY):
+        """
+        Args:
+            visibility_timeout: Seconds a lease stays valid without extend()
+            max_attempts: Leases per message before it is dead-lettered
+            retry_delay: Base delay before a nacked message is retried
+        """
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    # Messages
+    def enqueue(self, job_id: str, payload: Dict) -> str:
+        raise NotImplementedError
+
+    def lease(self, visibility_timeout: Optional[float] = None) -> Optional[Lease]:
+        """Take the next available message, or None if the queue is empty"""
+        raise NotImplementedError
+
+    def extend(self, lease: Lease, visibility_timeout: Optional[float] = None) -> bool:
+        """Push a lease deadline out; False if the lease was lost"""
+        raise NotImplementedError
+
+    def ack(self, lease: Lease) -> bool:
+        """Remove a finished message; False if the lease was lost"""
+        raise NotImplementedError
+
+    def nack(self, lease: Lease, error: str, retry: bool = True) -> str:
+        """
+        Give a message back after a failure
+
+        Returns:
+            'retry', 'dead' or 'lost'
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Message counts: ready, leased, delayed, dead"""
+        raise NotImplementedError
+
+    # Job state
+    def save_record(self, job_id: str, record: Dict, ttl: int):
+        raise NotImplementedError
+
+    def load_record(self, job_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def delete_record(self, job_id: str):
+        raise NotImplementedError
+
+    def save_blob(self, job_id: str, data: bytes, ttl: int = ACTIVE_RECORD_TTL):
+        raise NotImplementedError
+
+    def load_blob(self, job_id: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def delete_blob(self, job_id: str):
+        raise NotImplementedError
+
+    def save_blob_file(self, job_id: str, path: str, ttl: int = ACTIVE_RECORD_TTL):
+        """Store a file as the job's blob without reading it into memory; the file is consumed"""
+        raise NotImplementedError
+
+    def load_blob_file(self, job_id: str, path: str) -> bool:
+        """Write the job's blob to a file without reading it into memory; False if it is gone"""
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """Delete expired records and blobs; returns rows removed (0 where the backend expires keys)"""
+        return 0
+
+    def _retry_at(self, attempts: int) -> float:
+        return time.time() + self.retry_delay * max(1, attempts)
+
+    def _mark_dead(self, job_id: str, error: str):
+        """Fail the job record of a dead-lettered message"""
+        record = self.load_record(job_id)
+        if record is not None and record.get('status') not in ('succeeded', 'failed'):
+            record.update(status='failed', error=error, updated_at=time.time())
+            self.save_record(job_id, record, RECORD_TTL)
+        self.delete_blob(job_id)
+
+class SQLiteJobQueue(JobQueue):
+    """SQLite backend for a single box (web and workers share the file)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'ready',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,
+            leased_until REAL,
+            token TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS messages_ready ON messages (status, available_at);
+        CREATE TABLE IF NOT EXISTS records (
+            job_id TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS blobs (
+            job_id TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS blob_files (
+            job_id TEXT PRIMARY KEY, path TEXT NOT NULL, expires_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, **kwargs):
+        """
+        Args:
+            path: Database file
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.blob_dir = os.path.abspath(path) + '.blobs'  # Input videos (blob_files)
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread and process
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def enqueue(self, job_id: str, payload: Dict) -> str:
+        cursor = self._conn().execute(
+            'INSERT INTO messages (job_id, payload, available_at) VALUES (?, ?, ?)',
+            (job_id, json.dumps(payload), time.time())
+        )
+        return str(cursor.lastrowid)
+
+    def lease(self, visibility_timeout: Optional[float] = None) -> Optional[Lease]:
+        conn = self._conn()
+        now = time.time()
+        dead = []
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Expired leases: retry, or dead-letter after max_attempts
+            expired = conn.execute(
+                "SELECT id, job_id, attempts FROM messages WHERE status = 'leased' AND leased_until < ?",
+                (now,)
+            ).fetchall()
+            for message_id, job_id, attempts in expired:
+                if attempts >= self.max_attempts:
+                    conn.execute("UPDATE messages SET status = 'dead', error = ? WHERE id = ?",
+                                 ('visibility timeout exceeded', message_id))
+                    dead.append(job_id)
+                else:
+                    conn.execute("UPDATE messages SET status = 'ready', token = NULL, available_at = ? "
+                                 "WHERE id = ?", (now, message_id))
+
+            row = conn.execute(
+                "SELECT id, job_id, payload, attempts FROM messages "
+                "WHERE status = 'ready' AND available_at <= ? ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            lease = None
+            if row is not None:
+                message_id, job_id, payload, attempts = row
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE messages SET status = 'leased', attempts = attempts + 1, token = ?, "
+                    "leased_until = ? WHERE id = ?",
+                    (token, now + (visibility_timeout or self.visibility_timeout), message_id)
+                )
+                lease = Lease(str(message_id), job_id, json.loads(payload), attempts + 1, token)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        for job_id in dead:
+            self._mark_dead(job_id, 'Job exceeded its retry limit (worker lost)')
+        return lease
+
+    @staticmethod
+    def _owned(lease: Lease) -> Tuple[str, Tuple[str, str]]:
+        """WHERE clause and parameters matching the message while this lease holds it"""
+        return "id = ? AND token = ? AND status = 'leased'", (lease.message_id, lease.token)
+
+    def extend(self, lease: Lease, visibility_timeout: Optional[float] = None) -> bool:
+        owned, params = self._owned(lease)
+        cursor = self._conn().execute(
+            f"UPDATE messages SET leased_until = ? WHERE {owned}",
+            (time.time() + (visibility_timeout or self.visibility_timeout),) + params
+        )
+        return cursor.rowcount == 1
+
+    def ack(self, lease: Lease) -> bool:
+        owned, params = self._owned(lease)
+        cursor = self._conn().execute(f"DELETE FROM messages WHERE {owned}", params)
+        return cursor.rowcount == 1
+
+    def nack(self, lease: Lease, error: str, retry: bool = True) -> str:
+        owned, params = self._owned(lease)
+        if retry and lease.attempts < self.max_attempts:
+            cursor = self._conn().execute(
+                f"UPDATE messages SET status = 'ready', token = NULL, available_at = ?, error = ? WHERE {owned}",
+                (self._retry_at(lease.attempts), error) + params
+            )
+            return 'retry' if cursor.rowcount == 1 else 'lost'
+        cursor = self._conn().execute(
+            f"UPDATE messages SET status = 'dead', error = ? WHERE {owned}", (error,) + params
+        )
+        return 'dead' if cursor.rowcount == 1 else 'lost'
+
+    def stats(self) -> Dict[str, int]:
+        now = time.time()
+        counts = {'ready': 0, 'leased': 0, 'delayed': 0, 'dead': 0}
+        rows = self._conn().execute(
+            "SELECT CASE WHEN status = 'ready' AND available_at > ? THEN 'delayed' ELSE status END, "
+            "COUNT(*) FROM messages GROUP BY 1", (now,)
+        ).fetchall()
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def save_record(self, job_id: str, record: Dict, ttl: int):
+        self._conn().execute(
+            'INSERT OR REPLACE INTO records (job_id, record, expires_at) VALUES (?, ?, ?)',
+            (job_id, json.dumps(record), time.time() + ttl)
+        )
+
+    def load_record(self, job_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            'SELECT record FROM records WHERE job_id = ? AND expires_at > ?', (job_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete_record(self, job_id: str):
+        self._conn().execute('DELETE FROM records WHERE job_id = ?', (job_id,))
+
+    def save_blob(self, job_id: str, data: bytes, ttl: int = ACTIVE_RECORD_TTL):
+        self._conn().execute(
+            'INSERT OR REPLACE INTO blobs (job_id, data, expires_at) VALUES (?, ?, ?)',
+            (job_id, sqlite3.Binary(data), time.time() + ttl)
+        )
+
+    def load_blob(self, job_id: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            'SELECT data FROM blobs WHERE job_id = ? AND expires_at > ?', (job_id, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def delete_blob(self, job_id: str):
+        conn = self._conn()
+        conn.execute('DELETE FROM blobs WHERE job_id = ?', (job_id,))
+        row = conn.execute('SELECT path FROM blob_files WHERE job_id = ?', (job_id,)).fetchone()
+        if row:
+            conn.execute('DELETE FROM blob_files WHERE job_id = ?', (job_id,))
+            self._remove_file(row[0])
+
+    def save_blob_file(self, job_id: str, path: str, ttl: int = ACTIVE_RECORD_TTL):
+        # Web and workers share the box, so the database only records where
+        # the video was moved to
+        os.makedirs(self.blob_dir, exist_ok=True)
+        stored_path = os.path.join(self.blob_dir, job_id)
+        shutil.move(path, stored_path)
+        self._conn().execute(
+            'INSERT OR REPLACE INTO blob_files (job_id, path, expires_at) VALUES (?, ?, ?)',
+            (job_id, stored_path, time.time() + ttl)
+        )
+
+    def load_blob_file(self, job_id: str, path: str) -> bool:
+        row = self._conn().execute(
+            'SELECT path FROM blob_files WHERE job_id = ? AND expires_at > ?', (job_id, time.time())
+        ).fetchone()
+        if row is None:
+            data = self.load_blob(job_id)
+            if data is None:
+                return False
+            with open(path, 'wb') as f:
+                f.write(data)
+            return True
+        try:
+            shutil.copyfile(row[0], path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def purge_expired(self) -> int:
+        """Delete expired records and blobs; returns rows removed"""
+        now = time.time()
+        conn = self._conn()
+        removed = conn.execute('DELETE FROM records WHERE expires_at <= ?', (now,)).rowcount
+        removed += conn.execute('DELETE FROM blobs WHERE expires_at <= ?', (now,)).rowcount
+        for job_id, path in conn.execute('SELECT job_id, path FROM blob_files WHERE expires_at <= ?',
+                                         (now,)).fetchall():
+            conn.execute('DELETE FROM blob_files WHERE job_id = ?', (job_id,))
+            self._remove_file(path)
+            removed += 1
+        return removed
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+class RespClient:
+    """Minimal Redis protocol (RESP2) client over a plain socket"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._call('AUTH', self.password)
+        if self.db:
+            self._call('SELECT', self.db)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._reader = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            elif isinstance(arg, float):
+                data = repr(arg).encode()
+            else:
+                data = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        return b''.join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by server')
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b'+':
+            return body.decode()
+        if prefix == b'-':
+            raise RespError(body.decode())
+        if prefix == b':':
+            return int(body)
+        if prefix == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b'*':
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f'Unexpected reply: {line!r}')
+
+    def _call(self, *args):
+        self._sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def execute(self, *args):
+        """
+        Run one command, reconnecting once on a dropped connection
+
+        Returns:
+            Decoded reply (bulk strings stay bytes)
+        """
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._call(*args)
+                except (ConnectionError, OSError):
+                    self.close()
+                    if attempt == 2:
+                        raise
+
+class RedisJobQueue(JobQueue):
+    """Backend for any server speaking the Redis protocol
+
+    Keys: ready/processing lists, leased/delayed sorted sets scored by time,
+    a hash per message, and plain strings for job records and blobs. Only
+    basic commands are used (no scripting), so simple stand-ins work.
+    """
+
+    def __init__(self, client: RespClient, prefix: str = 'measulor:', **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, *parts) -> str:
+        return self.prefix + ':'.join(parts)
+
+    def enqueue(self, job_id: str, payload: Dict) -> str:
+        message_id = str(self.client.execute('INCR', self._key('q', 'seq')))
+        self.client.execute('HSET', self._key('q', 'msg', message_id),
+                            'job_id', job_id, 'payload', json.dumps(payload), 'attempts', 0)
+        self.client.execute('LPUSH', self._key('q', 'ready'), message_id)
+        return message_id
+
+    def _reap(self, now: float):
+        """Requeue expired leases and due retries; dead-letter exhausted messages"""
+        c = self.client
+        for raw_id in c.execute('ZRANGEBYSCORE', self._key('q', 'delayed'), '-inf', now) or []:
+            if c.execute('ZREM', self._key('q', 'delayed'), raw_id) == 1:
+                c.execute('LPUSH', self._key('q', 'ready'), raw_id)
+
+        for raw_id in c.execute('ZRANGEBYSCORE', self._key('q', 'leased'), '-inf', now) or []:
+            # ZREM succeeds for exactly one reaper
+            if c.execute('ZREM', self._key('q', 'leased'), raw_id) != 1:
+                continue
+            message_id = raw_id.decode()
+            c.execute('LREM', self._key('q', 'processing'), 0, message_id)
+            attempts = int(c.execute('HGET', self._key('q', 'msg', message_id), 'attempts') or 0)
+            if attempts >= self.max_attempts:
+                c.execute('RPUSH', self._key('q', 'dead'), message_id)
+                job_id = c.execute('HGET', self._key('q', 'msg', message_id), 'job_id')
+                if job_id:
+                    self._mark_dead(job_id.decode(), 'Job exceeded its retry limit (worker lost)')
+            else:
+                c.execute('LPUSH', self._key('q', 'ready'), message_id)
+
+        # A worker that died between RPOPLPUSH and ZADD leaves an unscored id
+        for raw_id in c.execute('LRANGE', self._key('q', 'processing'), 0, -1) or []:
+            if c.execute('ZSCORE', self._key('q', 'leased'), raw_id) is None:
+                c.execute('ZADD', self._key('q', 'leased'), now + self.visibility_timeout, raw_id)
+
+    def lease(self, visibility_timeout: Optional[float] = None) -> Optional[Lease]:
+        c = self.client
+        now = time.time()
+        self._reap(now)
+
+        raw_id = c.execute('RPOPLPUSH', self._key('q', 'ready'), self._key('q', 'processing'))
+        if raw_id is None:
+            return None
+        message_id = raw_id.decode()
+        token = uuid.uuid4().hex
+        c.execute('ZADD', self._key('q', 'leased'), now + (visibility_timeout or self.visibility_timeout), message_id)
+        attempts = c.execute('HINCRBY', self._key('q', 'msg', message_id), 'attempts', 1)
+        c.execute('HSET', self._key('q', 'msg', message_id), 'token', token)
+        fields = c.execute('HGETALL', self._key('q', 'msg', message_id)) or []
+        message = {fields[i].decode(): fields[i + 1] for i in range(0, len(fields), 2)}
+        return Lease(message_id, message['job_id'].decode(),
+                     json.loads(message['payload']), int(attempts), token)
+
+    def _owns(self, lease: Lease) -> bool:
+        token = self.client.execute('HGET', self._key('q', 'msg', lease.message_id), 'token')
+        return token is not None and token.decode() == lease.token
+
+    def extend(self, lease: Lease, visibility_timeout: Optional[float] = None) -> bool:
+        if not self._owns(lease):
+            return False
+        self.client.execute('ZADD', self._key('q', 'leased'),
+                            time.time() + (visibility_timeout or self.visibility_timeout), lease.message_id)
+        return True
+
+    def _release(self, lease: Lease) -> bool:
+        # Only the current lease holder may release the message
+        if not self._owns(lease):
+            return False
+        if self.client.execute('ZREM', self._key('q', 'leased'), lease.message_id) != 1:
+            return False
+        self.client.execute('LREM', self._key('q', 'processing'), 0, lease.message_id)
+        return True
+
+    def ack(self, lease: Lease) -> bool:
+        if not self._release(lease):
+            return False
+        self.client.execute('DEL', self._key('q', 'msg', lease.message_id))
+        return True
+
+    def nack(self, lease: Lease, error: str, retry: bool = True) -> str:
+        if not self._release(lease):
+            return 'lost'
+        c = self.client
+        c.execute('HSET', self._key('q', 'msg', lease.message_id), 'error', error, 'token', '')
+        if retry and lease.attempts < self.max_attempts:
+            c.execute('ZADD', self._key('q', 'delayed'), self._retry_at(lease.attempts), lease.message_id)
+            return 'retry'
+        c.execute('RPUSH', self._key('q', 'dead'), lease.message_id)
+        return 'dead'
+
+    def stats(self) -> Dict[str, int]:
+        c = self.client
+        return {
+            'ready': c.execute('LLEN', self._key('q', 'ready')),
+            'leased': c.execute('ZCARD', self._key('q', 'leased')),
+            'delayed': c.execute('ZCARD', self._key('q', 'delayed')),
+            'dead': c.execute('LLEN', self._key('q', 'dead'))
+        }
+
+    def save_record(self, job_id: str, record: Dict, ttl: int):
+        self.client.execute('SET', self._key('job', job_id), json.dumps(record), 'EX', int(ttl))
+
+    def load_record(self, job_id: str) -> Optional[Dict]:
+        data = self.client.execute('GET', self._key('job', job_id))
+        return json.loads(data) if data else None
+
+    def delete_record(self, job_id: str):
+        self.client.execute('DEL', self._key('job', job_id))
+
+    def save_blob(self, job_id: str, data: bytes, ttl: int = ACTIVE_RECORD_TTL):
+        self.client.execute('SET', self._key('blob', job_id), data, 'EX', int(ttl))
+
+    def load_blob(self, job_id: str) -> Optional[bytes]:
+        return self.client.execute('GET', self._key('blob', job_id))
+
+    def delete_blob(self, job_id: str):
+        self.client.execute('DEL', self._key('blob', job_id))
+
+    def save_blob_file(self, job_id: str, path: str, ttl: int = ACTIVE_RECORD_TTL):
+        key = self._key('blob', job_id)
+        with open(path, 'rb') as f:
+            # The job is enqueued only after the last APPEND, so no worker sees a partial blob
+            self.client.execute('SET', key, f.read(BLOB_CHUNK_SIZE), 'EX', int(ttl))
+            for chunk in iter(lambda: f.read(BLOB_CHUNK_SIZE), b''):
+                self.client.execute('APPEND', key, chunk)
+        os.remove(path)
+
+    def load_blob_file(self, job_id: str, path: str) -> bool:
+        key = self._key('blob', job_id)
+        if not self.client.execute('EXISTS', key):
+            return False
+        size = self.client.execute('STRLEN', key)
+        with open(path, 'wb') as f:
+            for start in range(0, size, BLOB_CHUNK_SIZE):
+                f.write(self.client.execute('GETRANGE', key, start, start + BLOB_CHUNK_SIZE - 1))
+        return True
+
+def open_job_queue(url: str = QUEUE_URL, **kwargs) -> Optional[JobQueue]:
+    """
+    Open the queue named by a URL
+
+    Args:
+        url: sqlite:///path or redis://[:password@]host[:port][/db]; empty for none
+
+    Returns:
+        JobQueue, or None when no URL is configured
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        return SQLiteJobQueue(parsed.path, **kwargs)
+    if parsed.scheme == 'redis':
+        client = RespClient(
+            host=parsed.hostname or '127.0.0.1',
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip('/') or 0),
+            password=parsed.password
+        )
+        return RedisJobQueue(client, **kwargs)
+    raise ValueError(f"Unsupported queue URL scheme: {parsed.scheme}")
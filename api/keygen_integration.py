@@ -27,7 +27,9 @@ if _missing_vars:
     logger.warning(f"Missing Keygen environment variables: {', '.join(_missing_vars)}. "
                    "License validation via Keygen API will not work until these are set.")
 
-KEYGEN_API_URL = f'https://api.keygen.sh/v1/accounts/{KEYGEN_ACCOUNT_ID}/licenses'
+# Override to point at a local stand-in (benchmarks/keygen_stub.py) for load tests
+KEYGEN_API_BASE = os.getenv('KEYGEN_API_BASE', 'https://api.keygen.sh').rstrip('/')
+KEYGEN_API_URL = f'{KEYGEN_API_BASE}/v1/accounts/{KEYGEN_ACCOUNT_ID}/licenses'
 
 # License cache (in-memory with TTL)
 license_cache = {}
@@ -48,7 +50,7 @@ def verify_license_with_keygen(license_key):
             return cached_data.get('valid', False), cached_data.get('data', {})
     
     # Validate with Keygen API
-    url = f'https://api.keygen.sh/v1/accounts/{KEYGEN_ACCOUNT_ID}/licenses/actions/validate-key'
+    url = f'{KEYGEN_API_URL}/actions/validate-key'
     
     headers = {
         'Content-Type': 'application/vnd.api+json; charset=utf-8',
@@ -1,28 +1,52 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import cv2
-import mediapipe as mp
-import numpy as np
+from werkzeug.exceptions import RequestEntityTooLarge
 from PIL import Image
 import io
+import json
 import math
+import time
+
+from .metrics import instrument_app, metrics_response
+from .server_timing import init_server_timing, timed_phase
+from .request_profiler import init_request_profiler
+from .warmup import readiness
+from .thread_governor import effective_config
+from .result_cache import cache_key, get_result_cache, hash_bytes
+from .image_ingest import ingest_image
+from .person_crop import detect_pose
+from .admission import AdmissionRejected, get_controller, rejection_response
+from .batch_measure import BATCH_MAX_BYTES, BATCH_MAX_ITEMS, parse_items, run_batch
+from .video_upload import UploadRequest, limited_body, upload_too_large_response
 
 app = Flask(__name__)
+# Per-view body limits (video_upload.limited_body) also cover chunked bodies
+app.request_class = UploadRequest
 CORS(app)  # Enable CORS for all routes
+instrument_app(app)
+init_server_timing(app)
+init_request_profiler(app)
 
-# Initialize MediaPipe Pose
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(static_image_mode=True, min_detection_confidence=0.5)
+# MediaPipe Pose instances come from the per-process detector pool ('image'
+# profile, borrowed by person_crop.detect_pose), created after fork and warmed
+# by api.warmup
 
 def calculate_distance(point1, point2):
     """Calculate Euclidean distance between two points"""
     return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
 
-def estimate_pixels_per_cm(landmarks, image_height):
+def estimate_pixels_per_cm(landmarks, image_height, reference_height_cm=None):
     """
     Improved calibration using more accurate body proportion ratios
-    Uses head height as a reliable reference (average ~23cm)
+    Uses head height as a reliable reference (average ~23cm), or the
+    person's known height when one is given
     """
+    # Known height: nose to ankle, as in the video pipelines' calibration
+    if reference_height_cm and 0 in landmarks and 27 in landmarks and 28 in landmarks:
+        ankle_y = (landmarks[27][1] + landmarks[28][1]) / 2
+        pixel_height = abs(landmarks[0][1] - ankle_y)
+        if pixel_height > 0:
+            return pixel_height / reference_height_cm
     # Method 1: Use head height (nose to top of head estimation)
     # Since MediaPipe doesn't have exact head top, we use nose to ear distance
     if 0 in landmarks and 7 in landmarks:  # nose to left ear
@@ -91,27 +115,47 @@ def calculate_chest_measurement(landmarks, shoulder_width):
     
     return shoulder_width * 1.3
 
-def process_image_measurements(image_data):
-    """Process image and return measurements with improved accuracy"""
+def process_image_measurements(image_data, reference_height_cm=None):
+    """
+    Process image and return measurements with improved accuracy
+
+    Args:
+        image_data: PIL image (from Image.open) or encoded bytes
+        reference_height_cm: Person's height for calibration (optional)
+    """
     try:
-        # Convert PIL Image to OpenCV format
-        image_np = np.array(image_data)
-        image_rgb = cv2.cvtColor(image_np, cv2.COLOR_BGR2RGB)
-        height, width, _ = image_rgb.shape
+        # Decode at reduced resolution straight to RGB (PIL is already RGB;
+        # MediaPipe takes the buffer without another conversion)
+        with timed_phase('decode'):
+            ingested = ingest_image(image_data)
+        # Landmarks are normalized, so scaling by the original size gives
+        # full-resolution pixel coordinates
+        width, height = ingested.original_size
         
-        # Process with MediaPipe
-        results = pose.process(image_rgb)
+        # Process with MediaPipe: locate the person on a thumbnail, then
+        # refine on a crop (see person_crop)
+        with timed_phase('inference'):
+            pose_landmarks = detect_pose(ingested.rgb, 'image')
         
-        if not results.pose_landmarks:
+        if not pose_landmarks:
             return {'success': False, 'message': 'No person detected in image'}
         
+        with timed_phase('measure'):
+            return _measurements_from_landmarks(pose_landmarks, width, height, reference_height_cm)
+        
+    except Exception as e:
+        return {'success': False, 'message': f'Processing error: {str(e)}'}
+
+def _measurements_from_landmarks(pose_landmarks, width, height, reference_height_cm=None):
+    """Convert MediaPipe landmarks into calibrated measurements"""
+    try:
         # Extract landmarks
         landmarks = {}
-        for idx, landmark in enumerate(results.pose_landmarks.landmark):
+        for idx, landmark in enumerate(pose_landmarks.landmark):
             landmarks[idx] = (landmark.x * width, landmark.y * height)
         
         # Improved calibration
-        pixels_per_cm = estimate_pixels_per_cm(landmarks, height)
+        pixels_per_cm = estimate_pixels_per_cm(landmarks, height, reference_height_cm)
         
         if not pixels_per_cm:
             return {'success': False, 'message': 'Unable to calibrate measurements'}
@@ -185,13 +229,30 @@ def process_image_measurements(image_data):
             'measurements': measurements_cm,
             'calibration': {
                 'pixels_per_cm': round(pixels_per_cm, 2),
-                'method': 'improved_multi_reference'
+                'method': 'reference_height' if reference_height_cm else 'improved_multi_reference'
             }
         }
         
     except Exception as e:
         return {'success': False, 'message': f'Processing error: {str(e)}'}
 
+def _measure_image_bytes(image_bytes, reference_height_cm=None):
+    """
+    Measure an encoded photo through the result cache
+
+    Returns:
+        (result, cache_outcome)
+    """
+    # Only the header is parsed here; process_image_measurements decodes
+    image = Image.open(io.BytesIO(image_bytes))
+    params = {'endpoint': 'measure_image', 'profile': 'image'}
+    if reference_height_cm:
+        params['reference_height_cm'] = reference_height_cm
+    key = cache_key(hash_bytes(image_bytes), **params)
+    return get_result_cache().get_or_compute(
+        key, lambda: process_image_measurements(image, reference_height_cm),
+        cacheable=lambda r: r.get('success', False))
+
 @app.route('/api/measure', methods=['POST'])
 def measure():
     """Main endpoint for measurement processing"""
@@ -201,25 +262,94 @@ def measure():
             return jsonify({'success': False, 'message': 'No image provided'}), 400
         
         file = request.files['image']
+        reference_height = request.form.get('height_cm', type=float)
         
-        # Read and validate image
-        image_bytes = file.read()
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert RGBA to RGB if needed
-        if image.mode == 'RGBA':
-            image = image.convert('RGB')
-        
-        # Process measurements
-        result = process_image_measurements(image)
+        # Process measurements; a repeat of the same image is a cache hit
+        with timed_phase('decode'):
+            image_bytes = file.read()
+        result, outcome = _measure_image_bytes(image_bytes, reference_height)
         
-        if result['success']:
-            return jsonify(result), 200
-        else:
-            return jsonify(result), 400
+        response = jsonify(result)
+        response.headers['X-Measulor-Cache'] = outcome
+        return response, 200 if result['success'] else 400
             
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Error: {str(e)}'
         })
+
+@app.route('/api/measure/batch', methods=['POST'])
+@limited_body(BATCH_MAX_BYTES)
+def measure_batch():
+    """
+    Measure many photos in one request, streaming results as NDJSON
+    Accepts: multipart 'images' (files), optional 'items' (JSON list of
+    {id, height_cm} in file order) and 'height_cm' (default for every item)
+    Returns: One JSON line per image in completion order, then a summary line
+    """
+    # The slot is held until the stream closes, not just until this returns
+    controller = get_controller('measure_batch')
+    try:
+        slot = controller.acquire()
+    except AdmissionRejected as e:
+        return rejection_response(e)
+    start = time.monotonic()
+
+    def release():
+        controller.release(slot, time.monotonic() - start)
+
+    try:
+        files = request.files.getlist('images')
+        if not files:
+            release()
+            return jsonify({'success': False, 'message': 'No images provided'}), 400
+        if len(files) > BATCH_MAX_ITEMS:
+            release()
+            return jsonify({'success': False,
+                            'message': f'Too many images. Maximum per batch: {BATCH_MAX_ITEMS}'}), 400
+        success, items = parse_items(request.form.get('items'), len(files),
+                                     request.form.get('height_cm') or None)
+        if not success:
+            release()
+            return jsonify({'success': False, 'message': items}), 400
+    except RequestEntityTooLarge:
+        release()
+        return upload_too_large_response(BATCH_MAX_BYTES)
+    except Exception as e:
+        release()
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 400
+    
+    for item, file in zip(items, files):
+        item['file'] = file
+    
+    def measure_item(item):
+        result, outcome = _measure_image_bytes(item['file'].read(), item['height_cm'])
+        return dict(result, cache=outcome)
+    
+    def generate():
+        batch_start = time.perf_counter()
+        succeeded = 0
+        for result in run_batch(items, measure_item):
+            succeeded += bool(result.get('success'))
+            yield json.dumps(result) + '\n'
+        yield json.dumps({'done': True, 'count': len(items), 'succeeded': succeeded,
+                          'failed': len(items) - succeeded,
+                          'elapsed_ms': round((time.perf_counter() - batch_start) * 1000, 1)}) + '\n'
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(release)
+    return response
+
+@app.route('/api/health')
+def health():
+    """Readiness: 503 until this worker has finished model warmup"""
+    ready = readiness()
+    return jsonify({'status': 'ok' if ready['ready'] else 'warming', 'warmup': ready,
+                    'threads': effective_config()}), \
+        200 if ready['ready'] else 503
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics (box-wide with MEASULOR_METRICS_DIR, else this worker's)"""
+    return metrics_response()
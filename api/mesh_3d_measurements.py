@@ -8,6 +8,22 @@ from typing import Dict, Tuple, Optional
 from scipy.spatial.distance import euclidean
 import math
 
+from .bootstrap_confidence import bootstrap_statistic_intervals
+from .cancellation import CancellationToken, OperationCancelled, check_cancelled
+
+# Landmark-derived lengths that can be recomputed per frame: (name, [(a, b), ...])
+# Each entry is averaged over its landmark pairs, matching extract_all_measurements()
+PER_FRAME_LENGTHS = [
+    ('shoulder_width', [(11, 12)]),
+    ('hip_width', [(23, 24)]),
+    ('arm_length', [(11, 15), (12, 16)]),
+    ('upper_arm_length', [(11, 13), (12, 14)]),
+    ('forearm_length', [(13, 15), (14, 16)]),
+    ('leg_length', [(23, 27), (24, 28)]),
+    ('inseam', [(25, 27), (26, 28)]),
+]
+MIN_LANDMARK_HEIGHT = 1e-6  # Nose-to-ankle heights at or below this cannot calibrate a set
+
 class Mesh3DMeasurementExtractor:
     """Extracts body measurements from 3D mesh"""
     
@@ -210,6 +226,75 @@ class Mesh3DMeasurementExtractor:
         self.measurements = measurements
         return measurements
     
+    def calculate_landmark_measurements(self,
+                                        landmark_sets: np.ndarray,
+                                        reference_height_m: Optional[float] = None) -> Tuple[np.ndarray, list]:
+        """
+        Landmark-derived lengths for a stack of landmark sets
+
+        Applies the same formulas and calibration as extract_all_measurements(),
+        so a set of averaged landmarks gives the reported values.
+
+        Args:
+            landmark_sets: Landmarks, shape (B, 33, 3 or 4)
+            reference_height_m: Optional reference height (calibrates each set)
+
+        Returns:
+            (measurement matrix of shape (B, K) in cm, list of K measurement names)
+        """
+        points = np.asarray(landmark_sets, dtype=np.float64)[:, :, :3]
+        columns = []
+        keys = []
+        
+        for name, pairs in PER_FRAME_LENGTHS:
+            lengths = [np.linalg.norm(points[:, a] - points[:, b], axis=1) for a, b in pairs]
+            columns.append(np.mean(lengths, axis=0))
+            keys.append(name)
+        
+        # Torso length (shoulder midpoint to hip midpoint)
+        shoulder_mid = (points[:, 11] + points[:, 12]) / 2
+        hip_mid = (points[:, 23] + points[:, 24]) / 2
+        columns.append(np.linalg.norm(shoulder_mid - hip_mid, axis=1))
+        keys.append('torso_length')
+        
+        # Height (nose to average ankle); with a reference it is fixed and
+        # only sets each set's calibration factor
+        height = self._landmark_heights(points)
+        if reference_height_m:
+            # Degenerate sets (nose level with the ankles, NaN) get NaN rows
+            # instead of infinite calibration
+            valid = np.isfinite(height) & (height > MIN_LANDMARK_HEIGHT)
+            calibration = np.where(valid, reference_height_m / np.where(valid, height, 1.0), np.nan)
+        else:
+            calibration = np.ones_like(height)
+        if not reference_height_m:
+            columns.append(height)
+            keys.append('height')
+        
+        matrix = np.stack(columns, axis=1) * calibration[:, np.newaxis] * 100
+        return matrix, keys
+
+    @staticmethod
+    def _landmark_heights(points: np.ndarray) -> np.ndarray:
+        """Nose-to-average-ankle height of each landmark set, shape (B,)"""
+        avg_ankle_y = (points[:, 27, 1] + points[:, 28, 1]) / 2
+        return np.abs(points[:, 0, 1] - avg_ankle_y)
+
+    def measurable_sets(self, landmark_sets: np.ndarray) -> np.ndarray:
+        """
+        Mask of landmark sets that can be measured and calibrated
+
+        Args:
+            landmark_sets: Landmarks, shape (B, 33, 3 or 4)
+
+        Returns:
+            Boolean array of shape (B,): all coordinates finite and a
+            nose-to-ankle height above MIN_LANDMARK_HEIGHT
+        """
+        points = np.asarray(landmark_sets, dtype=np.float64)[:, :, :3]
+        height = self._landmark_heights(points)
+        return np.isfinite(points).all(axis=(1, 2)) & (height > MIN_LANDMARK_HEIGHT)
+    
     def get_formatted_measurements(self) -> Dict:
         """
         Get formatted measurements for display
@@ -235,7 +320,9 @@ class Mesh3DMeasurementExtractor:
 
 def extract_measurements_from_mesh(mesh: trimesh.Trimesh, 
                                    landmarks_3d: np.ndarray,
-                                   reference_height_cm: Optional[float] = None) -> Tuple[bool, any]:
+                                   reference_height_cm: Optional[float] = None,
+                                   frame_landmarks_3d: Optional[np.ndarray] = None,
+                                   cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
     """
     Main function to extract measurements from 3D mesh
     
@@ -243,11 +330,17 @@ def extract_measurements_from_mesh(mesh: trimesh.Trimesh,
         mesh: 3D body mesh
         landmarks_3d: 3D landmark coordinates
         reference_height_cm: Optional reference height in cm
+        frame_landmarks_3d: Optional per-frame landmarks (F, 33, 4) for confidence intervals
+        cancel_token: Checked before measuring and before bootstrapping
     
     Returns:
         (success, measurements_dict or error_message)
+    
+    Raises:
+        OperationCancelled: The token tripped
     """
     try:
+        check_cancelled(cancel_token)
         # Convert reference height to meters if provided
         reference_height_m = reference_height_cm / 100.0 if reference_height_cm else None
         
@@ -257,6 +350,22 @@ def extract_measurements_from_mesh(mesh: trimesh.Trimesh,
         # Extract measurements
         measurements = extractor.extract_all_measurements(reference_height_m)
         
+        # Bootstrap confidence intervals: resample frames, average their
+        # landmarks and measure, exactly as the reported values are computed
+        frame_points = None
+        if frame_landmarks_3d is not None:
+            frame_points = np.asarray(frame_landmarks_3d, dtype=np.float64)[:, :, :3]
+            # Frames with lost landmarks or a zero height would poison every resample
+            frame_points = frame_points[extractor.measurable_sets(frame_points)]
+        if frame_points is not None and len(frame_points) > 1:
+            check_cancelled(cancel_token)
+            _, keys = extractor.calculate_landmark_measurements(frame_points[:1], reference_height_m)
+            measurements['confidence_intervals'] = bootstrap_statistic_intervals(
+                frame_points,
+                lambda means: extractor.calculate_landmark_measurements(means, reference_height_m)[0],
+                keys
+            )
+        
         print("\n✅ 3D Mesh Measurements Extracted Successfully!")
         print("\nKey Measurements:")
         for key in ['height', 'shoulder_width', 'chest_circumference', 'waist_circumference', 
@@ -266,5 +375,7 @@ def extract_measurements_from_mesh(mesh: trimesh.Trimesh,
         
         return True, measurements
     
+    except OperationCancelled:
+        raise
     except Exception as e:
         return False, f"Measurement extraction error: {str(e)}"
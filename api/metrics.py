@@ -0,0 +1,375 @@
+"""Metrics Registry
+In-process counters, gauges and histograms rendered in Prometheus text format
+
+Each gunicorn worker holds its own registry. With MEASULOR_METRICS_DIR set,
+workers also write snapshots there and /metrics merges them, so a scrape
+reports the whole box rather than whichever worker answered it.
+"""
+
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Latency buckets (seconds) covering fast image requests up to long 3D jobs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Configuration
+METRICS_DIR = os.getenv('MEASULOR_METRICS_DIR', '')  # Empty: /metrics shows only the answering worker
+FLUSH_INTERVAL = float(os.getenv('MEASULOR_METRICS_FLUSH_SECONDS', '5'))
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Base class for labelled metrics"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, '')) for n in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.metric_type}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value) -> List[str]:
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}']
+
+    def snapshot(self) -> Dict:
+        """JSON-serialisable copy of this metric for the shared directory"""
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {'type': self.metric_type, 'description': self.description,
+                'labels': list(self.label_names), 'values': values}
+
+    def merge(self, key: Tuple[str, ...], value):
+        """Add another worker's series to this one"""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    metric_type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    metric_type = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._values[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self) -> Dict:
+        snapshot = super().snapshot()
+        snapshot['buckets'] = list(self.buckets[:-1])
+        return snapshot
+
+    def merge(self, key: Tuple[str, ...], value):
+        with self._lock:
+            series = self._values.setdefault(key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            series['counts'] = [a + b for a, b in zip(series['counts'], value['counts'])]
+            series['sum'] += value['sum']
+            series['count'] += value['count']
+
+    def _render_series(self, key, value) -> List[str]:
+        lines = []
+        for bound, count in zip(self.buckets, value['counts']):
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {count}')
+        labels = _format_labels(self.label_names, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(value["sum"])}')
+        lines.append(f'{self.name}_count{labels} {value["count"]}')
+        return lines
+
+class MetricsRegistry:
+    """Holds all metrics of this process"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, *args, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, description: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, description, labels)
+
+    def histogram(self, name: str, description: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, description, labels, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Render all metrics in Prometheus text exposition format
+
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict:
+        """Snapshots of all metrics by name"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def flush(self, directory: str = METRICS_DIR):
+        """
+        Write this process's snapshot to the shared metrics directory
+
+        Args:
+            directory: Shared directory (MEASULOR_METRICS_DIR)
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def aggregate(directory: str = METRICS_DIR) -> MetricsRegistry:
+    """
+    Merge the snapshots every worker wrote to the shared directory
+
+    Counters and histograms are summed, including those of exited workers so
+    totals never go backwards. Gauges describe one worker's state, so they
+    keep a pid label and only live workers are reported.
+
+    Args:
+        directory: Shared directory (MEASULOR_METRICS_DIR)
+
+    Returns:
+        Registry holding the merged series
+    """
+    merged = MetricsRegistry()
+    for path in sorted(glob.glob(os.path.join(directory, 'metrics_*.json'))):
+        pid = os.path.basename(path)[len('metrics_'):-len('.json')]
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        alive = pid.isdigit() and _pid_alive(int(pid))
+        for name, entry in snapshot.items():
+            labels = tuple(entry['labels'])
+            if entry['type'] == 'gauge':
+                if not alive:
+                    continue
+                metric = merged.gauge(name, entry['description'], labels + ('pid',))
+                for key, value in entry['values']:
+                    metric.set(value, pid=pid, **dict(zip(labels, key)))
+                continue
+            if entry['type'] == 'histogram':
+                metric = merged.histogram(name, entry['description'], labels, buckets=tuple(entry['buckets']))
+            else:
+                metric = merged.counter(name, entry['description'], labels)
+            for key, value in entry['values']:
+                metric.merge(tuple(key), value)
+    return merged
+
+def clear_metrics_dir(directory: str = METRICS_DIR):
+    """Remove snapshots of a previous run (call once in the gunicorn master)"""
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def flush_metrics():
+    """Write this process's snapshot when MEASULOR_METRICS_DIR is set"""
+    if not METRICS_DIR:
+        return
+    try:
+        registry.flush()
+    except OSError as e:
+        print(f"Metrics flush failed: {e}")
+
+_flusher_pid = None
+
+def _start_flusher():
+    """Flush this worker's snapshot every FLUSH_INTERVAL seconds (once per process)"""
+    global _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    _flusher_pid = os.getpid()
+
+    def flush_forever():
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            flush_metrics()
+
+    threading.Thread(target=flush_forever, name='metrics-flush', daemon=True).start()
+
+# Global registry (per process; merged across workers through METRICS_DIR)
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    'measulor_pipeline_stage_duration_seconds',
+    'Duration of individual pipeline stages',
+    ('pipeline', 'stage')
+)
+STAGE_TOTAL = registry.counter(
+    'measulor_pipeline_stages_total',
+    'Pipeline stages executed',
+    ('pipeline', 'stage', 'status')
+)
+PIPELINE_DURATION = registry.histogram(
+    'measulor_pipeline_duration_seconds',
+    'End-to-end pipeline duration',
+    ('pipeline',)
+)
+PIPELINE_RUNS = registry.counter(
+    'measulor_pipeline_runs_total',
+    'Pipeline runs by outcome',
+    ('pipeline', 'status')
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    'measulor_http_request_duration_seconds',
+    'HTTP request latency',
+    ('endpoint', 'method')
+)
+HTTP_REQUESTS = registry.counter(
+    'measulor_http_requests_total',
+    'HTTP requests by status code',
+    ('endpoint', 'method', 'status')
+)
+
+def record_stage(pipeline: str, stage: str, duration_s: float, status: str = 'ok'):
+    """Record one completed pipeline stage"""
+    STAGE_DURATION.observe(duration_s, pipeline=pipeline, stage=stage)
+    STAGE_TOTAL.inc(pipeline=pipeline, stage=stage, status=status)
+
+def record_pipeline_run(pipeline: str, duration_s: float, success: bool):
+    """Record one completed pipeline run"""
+    PIPELINE_DURATION.observe(duration_s, pipeline=pipeline)
+    PIPELINE_RUNS.inc(pipeline=pipeline, status='success' if success else 'failure')
+
+def instrument_app(app, skip_paths: Optional[Tuple[str, ...]] = ('/metrics',)):
+    """
+    Record request latency and status counters for a Flask app
+
+    Args:
+        app: Flask application
+        skip_paths: Paths that should not be recorded
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer():
+        if METRICS_DIR:
+            _start_flusher()
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None and request.path not in (skip_paths or ()):
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start,
+                                          endpoint=endpoint, method=request.method)
+            HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method,
+                              status=str(response.status_code))
+        return response
+
+def metrics_response():
+    """
+    Flask response with the current metrics
+
+    Box-wide totals when MEASULOR_METRICS_DIR is set, otherwise only the
+    series of the worker that answered.
+
+    Returns:
+        Response in Prometheus text format
+    """
+    from flask import Response
+    if METRICS_DIR:
+        registry.flush()
+        body = aggregate().render()
+    else:
+        body = registry.render()
+    return Response(body, mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
@@ -7,6 +7,9 @@ import cv2
 import numpy as np
 from typing import List, Dict, Optional, Tuple
 
+from .cancellation import CancellationToken, OperationCancelled, check_cancelled
+from .detector_pool import acquire_detector, release_detector
+
 # Initialize MediaPipe Pose
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
@@ -21,7 +24,8 @@ class PoseDetector:
     def __init__(self, 
                  static_image_mode=False,
                  min_detection_confidence=MIN_DETECTION_CONFIDENCE,
-                 min_tracking_confidence=MIN_TRACKING_CONFIDENCE):
+                 min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
+                 profile: Optional[str] = None):
         """
         Initialize pose detector
         
@@ -29,19 +33,28 @@ class PoseDetector:
             static_image_mode: If True, treats each frame independently
             min_detection_confidence: Minimum confidence for person detection
             min_tracking_confidence: Minimum confidence for landmark tracking
+            profile: Borrow a warmed instance from the detector pool instead
+                (the other arguments are then taken from the profile)
         """
-        self.pose = mp_pose.Pose(
-            static_image_mode=static_image_mode,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence
-        )
+        self.profile = profile
+        if profile:
+            self.pose = acquire_detector(profile)
+        else:
+            self.pose = mp_pose.Pose(
+                static_image_mode=static_image_mode,
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence
+            )
     
-    def detect_pose(self, frame: np.ndarray) -> Tuple[bool, Optional[Dict]]:
+    def detect_pose(self, frame: np.ndarray,
+                    output_size: Optional[Tuple[int, int]] = None) -> Tuple[bool, Optional[Dict]]:
         """
         Detect pose in a single frame
         
         Args:
             frame: Video frame as numpy array (BGR format)
+            output_size: (height, width) to report pixel coordinates in, when
+                the frame was downscaled from the source video
         
         Returns:
             (success, pose_data or None)
@@ -49,7 +62,7 @@ class PoseDetector:
         try:
             # Convert BGR to RGB
             frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            height, width, _ = frame_rgb.shape
+            height, width = output_size or frame_rgb.shape[:2]
             
             # Process frame
             results = self.pose.process(frame_rgb)
@@ -79,35 +92,50 @@ class PoseDetector:
             return False, None
     
     def close(self):
-        """Release resources"""
-        self.pose.close()
+        """Release resources (pooled instances go back to the pool)"""
+        if self.profile:
+            release_detector(self.profile, self.pose)
+        else:
+            self.pose.close()
 
-def detect_poses_in_frames(frames: List[np.ndarray]) -> Tuple[bool, any]:
+def detect_poses_in_frames(frames: List[np.ndarray], profile: str = 'video',
+                           output_size: Optional[Tuple[int, int]] = None,
+                           cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
     """
     Detect poses in multiple frames
     
     Args:
         frames: List of video frames
+        profile: Detector profile ('video', or 'video_lite' under load)
+        output_size: (height, width) of the source video if frames were downscaled
+        cancel_token: Checked before each frame
     
     Returns:
         (success, poses_list or error_message)
+    
+    Raises:
+        OperationCancelled: The token tripped (the detector is still released)
     """
     try:
-        detector = PoseDetector(static_image_mode=False)
+        detector = PoseDetector(profile=profile)
         poses = []
         
-        for frame in frames:
-            success, pose_data = detector.detect_pose(frame)
-            if success:
-                poses.append(pose_data)
-        
-        detector.close()
+        try:
+            for frame in frames:
+                check_cancelled(cancel_token)
+                success, pose_data = detector.detect_pose(frame, output_size)
+                if success:
+                    poses.append(pose_data)
+        finally:
+            detector.close()
         
         if not poses:
             return False, "No poses detected in any frame"
         
         return True, poses
     
+    except OperationCancelled:
+        raise
     except Exception as e:
         return False, f"Error detecting poses: {str(e)}"
 
@@ -0,0 +1,181 @@
+"""Per-Request Sampling Profiler
+Opt-in stdlib sampling profiler that writes flamegraph-ready collapsed stacks
+"""
+
+import hmac
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+# Configuration
+PROFILE_HEADER = 'X-Measulor-Profile'
+PROFILE_TOKEN = os.getenv('MEASULOR_PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.getenv('MEASULOR_PROFILE_SAMPLE_RATE', '0') or 0)
+PROFILE_INTERVAL_MS = float(os.getenv('MEASULOR_PROFILE_INTERVAL_MS', '5') or 5)
+PROFILE_DIR = os.getenv('MEASULOR_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'measulor_profiles'))
+PROFILED_PATHS = ('/api/process', '/api/measure', '/api/measure-video-3d')
+
+class SamplingProfiler:
+    """Samples the Python stack of one thread at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval_ms: float = PROFILE_INTERVAL_MS):
+        """
+        Initialize profiler
+
+        Args:
+            thread_id: Ident of the thread to sample (threading.get_ident())
+            interval_ms: Sampling interval in milliseconds
+        """
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.duration = 0.0
+
+    def start(self):
+        """Start sampling in a background thread"""
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='measulor-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.stacks[self._collapse(frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            names.append(f'{module}:{code.co_name}')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def collapsed(self) -> str:
+        """
+        Get samples in collapsed-stack format (flamegraph.pl / speedscope)
+
+        Returns:
+            One 'frame;frame;frame count' line per unique stack
+        """
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def write(self, directory: str = PROFILE_DIR, label: str = 'request') -> str:
+        """
+        Write collapsed stacks to a file
+
+        Args:
+            directory: Output directory
+            label: Label included in the file name
+
+        Returns:
+            Path of the written file
+        """
+        os.makedirs(directory, exist_ok=True)
+        safe_label = ''.join(c if c.isalnum() else '_' for c in label).strip('_') or 'request'
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(directory, profile_id + '.collapsed')
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+        return path
+
+@contextmanager
+def profile_block(label: str, directory: str = PROFILE_DIR):
+    """
+    Profile the calling thread for the duration of a block
+
+    Args:
+        label: Label included in the output file name
+        directory: Output directory
+
+    Yields:
+        The running SamplingProfiler
+    """
+    profiler = SamplingProfiler(threading.get_ident())
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.write(directory, label)
+
+def should_profile(header_value: Optional[str]) -> bool:
+    """
+    Decide whether to profile a request
+
+    Args:
+        header_value: Value of the admin profiling header, if any
+
+    Returns:
+        True if the admin token matches or the request is sampled
+    """
+    # Compare bytes: compare_digest rejects non-ASCII str, and WSGI headers
+    # arrive as latin-1 text
+    if header_value and PROFILE_TOKEN and hmac.compare_digest(header_value.encode('utf-8'),
+                                                              PROFILE_TOKEN.encode('utf-8')):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def init_request_profiler(app, paths: Tuple[str, ...] = PROFILED_PATHS):
+    """
+    Install the opt-in profiler on a Flask app
+
+    Nothing is registered unless MEASULOR_PROFILE_TOKEN or
+    MEASULOR_PROFILE_SAMPLE_RATE is set, so disabled profiling costs nothing.
+
+    Args:
+        app: Flask application
+        paths: Request paths eligible for profiling
+    """
+    if not PROFILE_TOKEN and PROFILE_SAMPLE_RATE <= 0:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _start_profiler():
+        if request.path in paths and should_profile(request.headers.get(PROFILE_HEADER)):
+            profiler = SamplingProfiler(threading.get_ident())
+            profiler.start()
+            g._profiler = profiler
+
+    @app.after_request
+    def _write_profile(response):
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            profiler.stop()
+            path = profiler.write(label=request.path)
+            response.headers['X-Measulor-Profile-Id'] = os.path.basename(path)
+            app.logger.info(f"Profiled {request.path}: {profiler.samples} samples "
+                            f"in {profiler.duration:.2f}s -> {path}")
+        return response
+
+    @app.teardown_request
+    def _stop_profiler(exc):
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            profiler.stop()
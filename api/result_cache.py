@@ -0,0 +1,314 @@
+"""Result Cache
+Content-addressed cache for measurement results: a memory LRU tier plus an
+optional on-disk tier with TTL and size limits. Concurrent identical
+requests are single-flighted so only one computes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, Tuple
+
+from .cancellation import REQUEST_DEADLINE
+from .metrics import registry
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX: single-flight within this process only
+    fcntl = None
+
+# Configuration
+CACHE_ENTRIES = int(os.getenv('MEASULOR_CACHE_ENTRIES', '256'))
+CACHE_TTL = int(os.getenv('MEASULOR_CACHE_TTL_SECONDS', '86400'))
+CACHE_DIR = os.getenv('MEASULOR_CACHE_DIR', '')  # Empty disables the disk tier
+CACHE_MAX_BYTES = int(os.getenv('MEASULOR_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+CACHE_VERSION = 3      # Bump when cached results change (format or values)
+# Seconds to wait for another request computing the same key; callers pass
+# what is left of their own deadline
+FLIGHT_TIMEOUT = REQUEST_DEADLINE
+HASH_CHUNK_SIZE = 1024 * 1024
+
+CACHE_REQUESTS = registry.counter(
+    'measulor_result_cache_total',
+    'Result cache lookups by outcome (memory, disk, coalesced, miss)',
+    ('outcome',)
+)
+
+def _json_default(value):
+    """Serialize numpy scalars/arrays found in results"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def hash_stream(stream, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    SHA-256 of a file-like object, read in chunks
+
+    The stream is rewound to where it started so it can still be saved.
+
+    Args:
+        stream: Seekable binary stream (e.g. an upload's .stream)
+        chunk_size: Bytes per read
+
+    Returns:
+        Hex digest
+    """
+    start = stream.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(start)
+    return digest.hexdigest()
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 hex digest of in-memory content"""
+    return hashlib.sha256(data).hexdigest()
+
+def cache_key(content_hash: str, **params) -> str:
+    """
+    Cache key for content plus everything that changes the result
+
+    Args:
+        content_hash: Digest of the uploaded bytes
+        **params: Endpoint, reference height, pipeline profile, ...
+
+    Returns:
+        Hex key
+    """
+    material = json.dumps({'v': CACHE_VERSION, 'content': content_hash, **params}, sort_keys=True)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+class ResultCache:
+    """Two-tier result cache with single-flight computation"""
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES, ttl_seconds: int = CACHE_TTL,
+                 directory: Optional[str] = CACHE_DIR, max_disk_bytes: int = CACHE_MAX_BYTES):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Memory tier capacity
+            ttl_seconds: Lifetime of entries in both tiers
+            directory: Disk tier directory, shared by the box's workers (None/'' disables)
+            max_disk_bytes: Disk tier size limit; oldest entries are pruned first
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory or None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._disk_bytes = 0
+        if self.directory:
+            os.makedirs(os.path.join(self.directory, 'locks'), exist_ok=True)
+            self._disk_bytes = self._disk_usage()
+
+    # Memory tier
+    def _get_memory(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _put_memory(self, key: str, value: Any):
+        with self._lock:
+            self._memory[key] = (time.time() + self.ttl_seconds, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # Disk tier
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _get_disk(self, key: str) -> Optional[Any]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _put_disk(self, key: str, value: Any):
+        if not self.directory:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(value, f, default=_json_default)
+        os.replace(tmp_path, path)
+        self._disk_bytes += os.path.getsize(path)
+        if self._disk_bytes > self.max_disk_bytes:
+            self.prune()
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.directory):
+            if os.path.basename(root) == 'locks':
+                continue
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._disk_entries())
+
+    def prune(self) -> int:
+        """
+        Drop expired disk entries, then the oldest until 90% of the size limit
+
+        Returns:
+            Entries removed
+        """
+        if not self.directory:
+            return 0
+        now = time.time()
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, mtime in entries:
+            if now - mtime <= self.ttl_seconds and total <= self.max_disk_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        self._disk_bytes = total
+        return removed
+
+    @contextmanager
+    def _disk_lock(self, key: str, timeout: float = FLIGHT_TIMEOUT):
+        """Box-wide per-key lock so only one worker computes a result"""
+        if not self.directory or fcntl is None:
+            yield
+            return
+        fd = os.open(os.path.join(self.directory, 'locks', key[:16] + '.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        break  # Give up waiting and compute without the lock
+                    time.sleep(0.05)
+            yield
+        finally:
+            os.close(fd)
+
+    # Public API
+    def get(self, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Look a key up in both tiers
+
+        Returns:
+            (value, 'memory' | 'disk') or (None, None)
+        """
+        value = self._get_memory(key)
+        if value is not None:
+            return value, 'memory'
+        value = self._get_disk(key)
+        if value is not None:
+            self._put_memory(key, value)
+            return value, 'disk'
+        return None, None
+
+    def put(self, key: str, value: Any):
+        """Store a value in both tiers"""
+        self._put_memory(key, value)
+        try:
+            self._put_disk(key, value)
+        except OSError as e:
+            print(f"Result cache disk write failed: {str(e)}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       cacheable: Optional[Callable[[Any], bool]] = None,
+                       wait_timeout: float = FLIGHT_TIMEOUT) -> Tuple[Any, str]:
+        """
+        Return a cached value, or compute it once for all concurrent callers
+
+        Args:
+            key: Cache key from cache_key()
+            compute: Produces the value on a miss
+            cacheable: Decides whether a computed value is stored (default: always)
+            wait_timeout: Longest wait for another caller computing the same key
+
+        Returns:
+            (value, outcome) with outcome 'memory', 'disk', 'coalesced' or 'miss'
+        """
+        value, source = self.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc(outcome=source)
+            return value, source
+
+        # Threads of this process: one leader per key, the rest wait
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = threading.Event()
+                self._flights[key] = flight
+        if not leader:
+            flight.wait(wait_timeout)
+            value, _ = self.get(key)
+            if value is not None:
+                CACHE_REQUESTS.inc(outcome='coalesced')
+                return value, 'coalesced'
+            CACHE_REQUESTS.inc(outcome='miss')
+            return compute(), 'miss'
+
+        try:
+            # Other workers on the box: the disk lock
+            with self._disk_lock(key, wait_timeout):
+                value = self._get_disk(key)
+                if value is not None:
+                    self._put_memory(key, value)
+                    CACHE_REQUESTS.inc(outcome='coalesced')
+                    return value, 'coalesced'
+
+                CACHE_REQUESTS.inc(outcome='miss')
+                value = compute()
+                if cacheable is None or cacheable(value):
+                    self.put(key, value)
+                return value, 'miss'
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.set()
+
+_cache = None
+
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache"""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
@@ -7,6 +7,8 @@ from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import json
 
+from .bootstrap_confidence import select_intervals
+
 class ResultsAggregator:
     """Aggregates and analyzes video measurement results"""
     
@@ -16,24 +18,27 @@ class ResultsAggregator:
             'processing_stats': {},
             'measurements': {},
             'quality_analysis': {},
+            'stages': [],
             'timestamp': None
         }
     
     def aggregate_results(self, 
                          video_info: Dict,
-                         frames: List,
+                         frame_count: int,
                          poses: List[Dict],
                          validation_results: Dict,
-                         measurements: Dict) -> Dict:
+                         measurements: Dict,
+                         degradation: Optional[Dict] = None) -> Dict:
         """
         Aggregate all results from the processing pipeline
         
         Args:
             video_info: Video metadata
-            frames: Extracted frames
+            frame_count: Number of extracted frames
             poses: Detected poses
             validation_results: Quality validation results
             measurements: Calculated measurements
+            degradation: Load-adaptive settings applied to this run
         
         Returns:
             Complete aggregated results
@@ -50,7 +55,7 @@ class ResultsAggregator:
         
         # Processing statistics
         self.results['processing_stats'] = {
-            'frames_extracted': len(frames),
+            'frames_extracted': frame_count,
             'frames_analyzed': len(poses),
             'valid_frames': validation_results.get('valid_frames', 0),
             'invalid_frames': validation_results.get('invalid_frames', 0),
@@ -64,18 +69,21 @@ class ResultsAggregator:
         # Quality analysis
         self.results['quality_analysis'] = self._analyze_quality(
             validation_results,
-            measurements
+            measurements,
+            degradation
         )
         
         return self.results
     
-    def _analyze_quality(self, validation_results: Dict, measurements: Dict) -> Dict:
+    def _analyze_quality(self, validation_results: Dict, measurements: Dict,
+                         degradation: Optional[Dict] = None) -> Dict:
         """
         Analyze overall quality of the measurements
         
         Args:
             validation_results: Validation results
             measurements: Measurement results
+            degradation: Load-adaptive settings applied to this run
         
         Returns:
             Quality analysis
@@ -108,6 +116,9 @@ class ResultsAggregator:
         else:
             quality['measurement_consistency'] = 'unknown'
         
+        if degradation is not None:
+            quality['degradation'] = degradation
+        
         # Recommendations
         quality['recommendations'] = self._generate_recommendations(valid_percentage, quality)
         
@@ -137,6 +148,9 @@ class ResultsAggregator:
         if quality.get('confidence') == 'low':
             recommendations.append("Low confidence in measurements - retake video recommended")
         
+        if quality.get('degradation', {}).get('degraded'):
+            recommendations.append("Processed at reduced quality due to high server load - resubmit later for full precision")
+        
         if not recommendations:
             recommendations.append("Measurements appear reliable - no issues detected")
         
@@ -172,6 +186,12 @@ class ResultsAggregator:
                 unit = measurements.get('unit', 'pixels')
                 summary['key_measurements'][field] = f"{value:.2f} {unit}"
         
+        # Bootstrap confidence intervals for the key measurements
+        summary['confidence_intervals'] = select_intervals(
+            measurements.get('confidence_intervals', {}),
+            key_fields
+        )
+        
         return summary
     
     def export_json(self) -> str:
@@ -222,6 +242,7 @@ class ResultsAggregator:
         report.append("-" * 50)
         measurements = self.results['measurements']
         unit = measurements.get('unit', 'pixels')
+        intervals = measurements.get('confidence_intervals', {}).get('intervals', {})
         
         key_measurements = [
             ('Height', 'height'),
@@ -237,7 +258,11 @@ class ResultsAggregator:
             if key in measurements:
                 value = measurements[key]
                 std = measurements.get(f'{key}_std', 0)
-                report.append(f"  {label}: {value:.2f} ± {std:.2f} {unit}")
+                line = f"  {label}: {value:.2f} ± {std:.2f} {unit}"
+                interval = intervals.get(key)
+                if interval:
+                    line += f" (CI {interval['lower']:.2f}–{interval['upper']:.2f})"
+                report.append(line)
         
         report.append("\nRecommendations:")
         report.append("-" * 50)
@@ -249,7 +274,7 @@ class ResultsAggregator:
         return "\n".join(report)
 
 def aggregate_pipeline_results(video_info: Dict,
-                               frames: List,
+                               frame_count: int,
                                poses: List[Dict],
                                validation_results: Dict,
                                measurements: Dict) -> Tuple[bool, any]:
@@ -258,7 +283,7 @@ def aggregate_pipeline_results(video_info: Dict,
     
     Args:
         video_info: Video metadata
-        frames: Extracted frames
+        frame_count: Number of extracted frames
         poses: Detected poses
         validation_results: Quality validation results
         measurements: Calculated measurements
@@ -270,7 +295,7 @@ def aggregate_pipeline_results(video_info: Dict,
         aggregator = ResultsAggregator()
         results = aggregator.aggregate_results(
             video_info,
-            frames,
+            frame_count,
             poses,
             validation_results,
             measurements
@@ -0,0 +1,314 @@
+"""Resumable Uploads
+Chunked video uploads that survive dropped connections: the client creates
+an upload, appends chunks at the offset the server reports, and finalizes
+into the video pipelines. Partial uploads are assembled in a local scratch
+directory and expire after MEASULOR_UPLOAD_TTL_SECONDS without progress.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from .video_upload import ALLOWED_EXTENSIONS, MAX_FILE_SIZE, allowed_file
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX: appends to one upload are not serialized
+    fcntl = None
+
+# Configuration
+UPLOAD_DIR = os.getenv('MEASULOR_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'measulor_uploads'))
+UPLOAD_TTL = int(os.getenv('MEASULOR_UPLOAD_TTL_SECONDS', '86400'))
+MAX_CHUNK_SIZE = int(os.getenv('MEASULOR_UPLOAD_MAX_CHUNK_BYTES', str(8 * 1024 * 1024)))
+COPY_CHUNK_SIZE = 256 * 1024
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+class UploadError(Exception):
+    """A request the upload cannot accept; carries the HTTP status"""
+
+    def __init__(self, message: str, status: int, offset: Optional[int] = None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.offset = offset
+
+class ResumableUploadStore:
+    """Partial uploads as '<id>.json' metadata plus '<id>.part' data
+
+    The data file's size is the upload offset, so every gunicorn worker
+    sees the same resume point; appends to one upload are serialized with
+    flock.
+    """
+
+    def __init__(self, directory: str = UPLOAD_DIR, ttl_seconds: int = UPLOAD_TTL,
+                 max_size: int = MAX_FILE_SIZE):
+        """
+        Initialize upload store
+
+        Args:
+            directory: Scratch directory for partial uploads
+            ttl_seconds: Lifetime of an upload after its last chunk
+            max_size: Largest upload that may be created
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, upload_id: str) -> Tuple[str, str]:
+        if not _UPLOAD_ID.match(upload_id or ''):
+            raise UploadError('Upload not found or expired', 404)
+        base = os.path.join(self.directory, upload_id)
+        return base + '.json', base + '.part'
+
+    def _write_meta(self, meta: Dict):
+        # Write-then-rename so readers never see a partial record
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._paths(meta['upload_id'])[0])
+
+    def create(self, filename: str, size: int) -> Dict:
+        """
+        Start an upload
+
+        Args:
+            filename: Client file name (for the video format)
+            size: Total bytes the client will send
+
+        Returns:
+            Upload status (see get())
+
+        Raises:
+            UploadError: Bad format or size
+        """
+        if not allowed_file(filename or ''):
+            raise UploadError(f"Invalid file format. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}", 400)
+        if size <= 0:
+            raise UploadError('Upload size must be positive', 400)
+        if size > self.max_size:
+            raise UploadError(f"File too large. Maximum size: {self.max_size // (1024*1024)}MB", 413)
+
+        now = time.time()
+        meta = {
+            'upload_id': uuid.uuid4().hex,
+            'extension': filename.rsplit('.', 1)[1].lower(),
+            'size': size,
+            'created_at': now,
+            'updated_at': now
+        }
+        open(self._paths(meta['upload_id'])[1], 'wb').close()
+        self._write_meta(meta)
+        return self._status(meta, 0)
+
+    def _read_meta(self, upload_id: str) -> Optional[Dict]:
+        meta_path, _ = self._paths(upload_id)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta['updated_at'] + self.ttl_seconds < time.time():
+            return None
+        return meta
+
+    def _status(self, meta: Dict, offset: int) -> Dict:
+        return {
+            'upload_id': meta['upload_id'],
+            'offset': offset,
+            'size': meta['size'],
+            'complete': offset == meta['size'],
+            'max_chunk_size': MAX_CHUNK_SIZE,
+            'expires_at': meta['updated_at'] + self.ttl_seconds
+        }
+
+    def get(self, upload_id: str) -> Optional[Dict]:
+        """
+        Current state of an upload
+
+        Returns:
+            {'upload_id', 'offset', 'size', 'complete', 'max_chunk_size', 'expires_at'}
+            or None if unknown or expired
+        """
+        meta = self._read_meta(upload_id)
+        if meta is None:
+            return None
+        try:
+            offset = os.path.getsize(self._paths(upload_id)[1])
+        except OSError:
+            return None
+        return self._status(meta, offset)
+
+    def append(self, upload_id: str, offset: int, stream, length: Optional[int]) -> Dict:
+        """
+        Append one chunk at the given offset
+
+        Bytes received before a dropped connection are kept, so the client
+        resumes from the offset get() reports.
+
+        Args:
+            upload_id: Upload to extend
+            offset: Offset the client believes the upload is at
+            stream: Request body stream
+            length: Chunk length (Content-Length)
+
+        Returns:
+            Upload status after the chunk
+
+        Raises:
+            UploadError: Unknown upload, offset conflict or oversized chunk
+        """
+        meta = self._read_meta(upload_id)
+        if meta is None:
+            raise UploadError('Upload not found or expired', 404)
+        if length is None:
+            raise UploadError('Content-Length is required', 411)
+        if length > MAX_CHUNK_SIZE:
+            raise UploadError(f"Chunk too large. Maximum chunk: {MAX_CHUNK_SIZE} bytes", 413)
+
+        _, data_path = self._paths(upload_id)
+        with open(data_path, 'ab') as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise UploadError('Another chunk is being written', 409, os.fstat(f.fileno()).st_size)
+            # The size under the lock; tell() still holds the size from open(),
+            # before any append that finished in between
+            current = os.fstat(f.fileno()).st_size
+            if offset != current:
+                raise UploadError('Offset does not match the upload', 409, current)
+            if current + length > meta['size']:
+                raise UploadError('Chunk exceeds the declared upload size', 413, current)
+
+            remaining = length
+            try:
+                while remaining > 0:
+                    chunk = stream.read(min(COPY_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            finally:
+                f.flush()
+                meta['updated_at'] = time.time()
+                self._write_meta(meta)
+            return self._status(meta, os.fstat(f.fileno()).st_size)
+
+    def finalize(self, upload_id: str, sha256: Optional[str] = None) -> Tuple[str, str, str]:
+        """
+        Complete an upload and hand its file to the caller
+
+        Args:
+            upload_id: Upload to finish
+            sha256: Expected digest, if the client sent one
+
+        Returns:
+            (video_path, extension, sha256); the caller owns video_path
+
+        Raises:
+            UploadError: Unknown, incomplete or corrupted upload
+        """
+        status = self.get(upload_id)
+        if status is None:
+            raise UploadError('Upload not found or expired', 404)
+        if not status['complete']:
+            raise UploadError('Upload is incomplete', 409, status['offset'])
+
+        meta_path, data_path = self._paths(upload_id)
+        extension = self._read_meta(upload_id)['extension']
+        # Claim the file first so a concurrent finalize cannot use it too
+        video_path = os.path.join(self.directory, f"{upload_id}.{extension}")
+        try:
+            os.rename(data_path, video_path)
+        except OSError:
+            raise UploadError('Upload not found or expired', 404)
+        os.remove(meta_path)
+
+        digest = hashlib.sha256()
+        with open(video_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        if sha256 and sha256.lower() != digest.hexdigest():
+            os.remove(video_path)
+            raise UploadError('Checksum mismatch; upload discarded', 422)
+        return video_path, extension, digest.hexdigest()
+
+    def restore(self, upload_id: str, video_path: str):
+        """
+        Undo finalize() so the client can finalize again later
+
+        For requests that could not use the upload yet (admission rejected,
+        deadline passed); the client retries with the same upload ID.
+
+        Args:
+            upload_id: Upload that was finalized
+            video_path: Path finalize() returned
+        """
+        _, data_path = self._paths(upload_id)
+        os.rename(video_path, data_path)
+        now = time.time()
+        self._write_meta({
+            'upload_id': upload_id,
+            'extension': video_path.rsplit('.', 1)[1],
+            'size': os.path.getsize(data_path),
+            'created_at': now,
+            'updated_at': now
+        })
+
+    def delete(self, upload_id: str) -> bool:
+        """Abort an upload"""
+        removed = False
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+                removed = True
+            except OSError:
+                pass
+        return removed
+
+    def purge_expired(self) -> int:
+        """
+        Delete uploads with no progress within the TTL
+
+        Returns:
+            Number of uploads removed
+        """
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for name in os.listdir(self.directory):
+            upload_id, _, suffix = name.partition('.')
+            if not _UPLOAD_ID.match(upload_id):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                expired = os.path.getmtime(path) < cutoff
+            except OSError:
+                continue
+            if suffix == 'json' and (expired or self._read_meta(upload_id) is None):
+                removed += self.delete(upload_id)
+            elif suffix == 'part' and expired and not os.path.exists(self._paths(upload_id)[0]):
+                removed += self.delete(upload_id)  # Orphaned data file
+            elif suffix in ALLOWED_EXTENSIONS and expired:
+                # Finalized file its request never consumed (worker crash)
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+_store = None
+
+def get_upload_store() -> ResumableUploadStore:
+    """Process-wide upload store"""
+    global _store
+    if _store is None:
+        _store = ResumableUploadStore()
+    return _store
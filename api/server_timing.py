@@ -0,0 +1,121 @@
+"""Server-Timing Middleware
+Adds per-request phase timings, CPU time and RSS delta as a Server-Timing header
+
+'cpu' is the request thread's own CPU time. 'process-cpu' and 'process-rss'
+cover the whole worker process: they include MediaPipe's graph threads, but
+also any other request the worker serves at the same time (threaded batch
+requests, gthread workers).
+"""
+
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from flask import g, has_request_context, request
+
+from .stage_monitor import get_rss_bytes
+
+# Endpoints that get a Server-Timing breakdown
+TIMED_PATHS = ('/api/process', '/api/measure', '/api/measure-video-3d')
+
+class RequestTiming:
+    """Accumulates phase durations and resource usage for one request"""
+
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.wall_start = time.perf_counter()
+        self.thread_cpu_start = time.thread_time()
+        self.process_cpu_start = time.process_time()
+        self.rss_start = get_rss_bytes()
+
+    def add(self, name: str, duration_ms: float):
+        """Add time to a phase; repeated phases accumulate"""
+        self.phases[name] = self.phases.get(name, 0.0) + duration_ms
+
+    def header_value(self) -> str:
+        """
+        Build the Server-Timing header value
+
+        Returns:
+            Comma-separated Server-Timing metrics
+        """
+        entries = [f'{name};dur={duration:.1f}' for name, duration in self.phases.items()]
+
+        cpu_seconds = time.thread_time() - self.thread_cpu_start
+        entries.append(f'cpu;dur={cpu_seconds * 1000:.1f};desc="Request thread CPU {cpu_seconds:.3f}s"')
+        process_seconds = time.process_time() - self.process_cpu_start
+        entries.append(f'process-cpu;dur={process_seconds * 1000:.1f};'
+                       f'desc="Process CPU, all threads {process_seconds:.3f}s"')
+
+        rss_end = get_rss_bytes()
+        if self.rss_start is not None and rss_end is not None:
+            delta_mb = (rss_end - self.rss_start) / (1024 * 1024)
+            entries.append(f'process-rss;desc="Process RSS {delta_mb:+.1f}MB"')
+
+        total_ms = (time.perf_counter() - self.wall_start) * 1000
+        entries.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(entries)
+
+def current_timing() -> Optional[RequestTiming]:
+    """
+    Get the timing collector of the current request
+
+    Returns:
+        RequestTiming, or None outside a timed request
+    """
+    if not has_request_context():
+        return None
+    return g.get('_server_timing')
+
+def add_phase(name: str, duration_ms: float):
+    """
+    Record a phase duration on the current request (no-op outside a timed request)
+
+    Args:
+        name: Phase name (e.g. 'decode', 'inference')
+        duration_ms: Duration in milliseconds
+    """
+    timing = current_timing()
+    if timing is not None:
+        timing.add(name, duration_ms)
+
+@contextmanager
+def timed_phase(name: str):
+    """
+    Time a block of code as a Server-Timing phase
+
+    Args:
+        name: Phase name
+    """
+    timing = current_timing()
+    if timing is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, (time.perf_counter() - start) * 1000)
+
+def init_server_timing(app, paths: Tuple[str, ...] = TIMED_PATHS):
+    """
+    Install the Server-Timing middleware on a Flask app
+
+    Args:
+        app: Flask application
+        paths: Request paths that get a Server-Timing header
+    """
+    @app.before_request
+    def _start_server_timing():
+        if request.path in paths:
+            g._server_timing = RequestTiming()
+
+    @app.after_request
+    def _add_server_timing_header(response):
+        timing = g.pop('_server_timing', None)
+        if timing is not None:
+            response.headers['Server-Timing'] = timing.header_value()
+            response.headers['Timing-Allow-Origin'] = '*'
+        return response
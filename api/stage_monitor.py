@@ -0,0 +1,172 @@
+"""Pipeline Stage Monitor
+Records per-stage timing and resource usage for the video measurement pipelines
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from .metrics import record_stage, record_pipeline_run
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# Stages running in this process; the peak RSS counter is process-wide, so
+# it is only reset when no other stage (batch thread, gthread request) is
+# relying on it
+_stage_lock = threading.Lock()
+_running_stages = 0
+_stages_started = 0
+
+def get_rss_bytes() -> Optional[int]:
+    """
+    Get current resident set size of this process
+
+    Returns:
+        RSS in bytes, or None if it cannot be read on this platform
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def get_peak_rss_bytes() -> Optional[int]:
+    """
+    Get peak resident set size of this process
+
+    Reads VmHWM on Linux (resettable via reset_peak_rss), otherwise falls
+    back to ru_maxrss, which is the lifetime peak.
+
+    Returns:
+        Peak RSS in bytes, or None if unavailable
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if resource is None:
+        return None
+
+    try:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, kilobytes on Linux/BSD
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (OSError, ValueError):
+        return None
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the kernel's peak RSS counter so the next stage gets its own peak
+
+    The counter belongs to the whole process: StageMonitor only calls this
+    while no other stage is running.
+
+    Returns:
+        True if the counter was reset (Linux only)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _to_mb(value: Optional[int]) -> Optional[float]:
+    return round(value / (1024 * 1024), 1) if value is not None else None
+
+class StageMonitor:
+    """Collects timing and resource usage for each named pipeline stage"""
+
+    def __init__(self, pipeline: str):
+        """
+        Initialize monitor
+
+        Args:
+            pipeline: Pipeline name used as the metrics label (e.g. 'video_3d')
+        """
+        self.pipeline = pipeline
+        self.stages = []
+        self.started_at = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Context manager that records duration and memory usage for one stage
+
+        Peak RSS is per-stage where the kernel supports resetting it and no
+        other stage in the process overlaps this one; otherwise it is the
+        process peak since an earlier reset and peak_is_per_stage is False.
+
+        Args:
+            name: Stage name (e.g. 'extract', 'detect')
+        """
+        global _running_stages, _stages_started
+        with _stage_lock:
+            peak_is_per_stage = _running_stages == 0 and reset_peak_rss()
+            _running_stages += 1
+            _stages_started += 1
+            started_before = _stages_started
+        rss_start = get_rss_bytes()
+        record = {'name': name}
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            yield record
+            status = 'ok'
+        finally:
+            duration = time.perf_counter() - start
+            rss_end = get_rss_bytes()
+            peak_rss = get_peak_rss_bytes()
+            with _stage_lock:
+                _running_stages -= 1
+                # Another stage started meanwhile: the peak includes its memory
+                peak_is_per_stage = peak_is_per_stage and _stages_started == started_before
+            record.update({
+                'duration_ms': round(duration * 1000, 2),
+                'status': status,
+                'rss_start_mb': _to_mb(rss_start),
+                'rss_end_mb': _to_mb(rss_end),
+                'peak_rss_mb': _to_mb(peak_rss),
+                'peak_is_per_stage': peak_is_per_stage
+            })
+            self.stages.append(record)
+            record_stage(self.pipeline, name, duration, status)
+
+            # Imported here: server_timing depends on this module
+            from .server_timing import add_phase
+            add_phase(name, duration * 1000)
+
+    def finish(self, success: bool) -> float:
+        """
+        Record the end of the pipeline run
+
+        Args:
+            success: Whether the pipeline produced results
+
+        Returns:
+            Total run duration in milliseconds
+        """
+        duration = time.perf_counter() - self.started_at
+        record_pipeline_run(self.pipeline, duration, success)
+        return round(duration * 1000, 2)
+
+    def report(self) -> List[Dict]:
+        """
+        Get recorded stages in execution order
+
+        Returns:
+            List of per-stage records
+        """
+        return list(self.stages)
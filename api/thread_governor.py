@@ -0,0 +1,172 @@
+"""CPU Thread Governor
+Sizes OpenCV, BLAS and MediaPipe thread usage from worker and core counts so
+several gunicorn workers on one box do not oversubscribe the CPU
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional
+
+from .metrics import registry
+
+try:
+    import threadpoolctl
+except ImportError:  # Optional: runtime BLAS limits when numpy is already loaded
+    threadpoolctl = None
+
+# Thread-count environment variables read by BLAS/OpenMP runtimes at load time
+BLAS_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+)
+
+# Overrides
+THREADS_PER_WORKER = os.getenv('MEASULOR_THREADS_PER_WORKER')
+PIN_WORKERS = os.getenv('MEASULOR_PIN_WORKERS', '0') == '1'
+
+THREAD_POOL_SIZE = registry.gauge(
+    'measulor_thread_pool_size',
+    'Threads each native pool may use in this worker',
+    ('pool',)
+)
+
+_applied = {}
+
+def available_cores() -> int:
+    """
+    Cores this process may run on (respects container CPU affinity)
+
+    Returns:
+        Number of usable cores
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def worker_count() -> int:
+    """
+    Gunicorn worker count (WEB_CONCURRENCY, which gunicorn also reads)
+
+    Returns:
+        Number of worker processes sharing the box
+    """
+    return max(1, int(os.getenv('WEB_CONCURRENCY', '1') or 1))
+
+def threads_per_worker(workers: Optional[int] = None, cores: Optional[int] = None) -> int:
+    """
+    Threads each worker's native pools should use
+
+    Args:
+        workers: Worker count (defaults to worker_count())
+        cores: Core count (defaults to available_cores())
+
+    Returns:
+        max(1, cores // workers), or MEASULOR_THREADS_PER_WORKER if set
+    """
+    if THREADS_PER_WORKER:
+        return max(1, int(THREADS_PER_WORKER))
+    workers = workers or worker_count()
+    cores = cores or available_cores()
+    return max(1, cores // workers)
+
+def configure_blas_env(threads: Optional[int] = None) -> Dict[str, str]:
+    """
+    Set BLAS/OpenMP thread env vars before numpy or scipy are imported
+
+    Values already present in the environment are left alone so operators
+    can override them.
+
+    Args:
+        threads: Threads per worker (defaults to threads_per_worker())
+
+    Returns:
+        Effective values of BLAS_ENV_VARS
+    """
+    threads = threads or threads_per_worker()
+    for var in BLAS_ENV_VARS:
+        os.environ.setdefault(var, str(threads))
+    _applied['threads_per_worker'] = threads
+    return {var: os.environ[var] for var in BLAS_ENV_VARS}
+
+def worker_cpu_slice(worker_index: int, threads: int, cores: List[int]) -> List[int]:
+    """
+    Cores assigned to one worker when pinning is enabled
+
+    Args:
+        worker_index: Zero-based worker index
+        threads: Threads per worker
+        cores: Sorted usable core ids
+
+    Returns:
+        Core ids for this worker
+    """
+    slices = max(1, len(cores) // threads)
+    start = (worker_index % slices) * threads
+    return cores[start:start + threads]
+
+def apply_worker_limits(worker_index: int = 0, threads: Optional[int] = None) -> Dict:
+    """
+    Apply thread limits inside a worker process (call from post_fork)
+
+    - OpenCV: cv2.setNumThreads()
+    - BLAS: threadpoolctl limits, if installed, for libraries already loaded
+    - MediaPipe: the solutions API has no thread option and XNNPACK sizes its
+      pool from the hardware; with MEASULOR_PIN_WORKERS=1 the worker is pinned
+      to its own cores so those threads at least stay off other workers
+
+    Args:
+        worker_index: Zero-based worker index (for pinning)
+        threads: Threads per worker (defaults to threads_per_worker())
+
+    Returns:
+        Effective configuration (see effective_config())
+    """
+    threads = threads or threads_per_worker()
+    _applied['threads_per_worker'] = threads
+
+    import cv2
+    cv2.setNumThreads(threads)
+
+    if threadpoolctl is not None:
+        _applied['blas_limiter'] = threadpoolctl.threadpool_limits(limits=threads)
+
+    if PIN_WORKERS and hasattr(os, 'sched_setaffinity'):
+        cores = worker_cpu_slice(worker_index, threads, sorted(os.sched_getaffinity(0)))
+        os.sched_setaffinity(0, cores)
+        _applied['pinned_cores'] = cores
+
+    config = effective_config()
+    THREAD_POOL_SIZE.set(threads, pool='worker')
+    if config['opencv_threads'] is not None:
+        THREAD_POOL_SIZE.set(config['opencv_threads'], pool='opencv')
+    THREAD_POOL_SIZE.set(int(os.environ.get('OPENBLAS_NUM_THREADS') or threads), pool='blas')
+    return config
+
+def effective_config() -> Dict:
+    """
+    Report the thread configuration this process is actually running with
+
+    Returns:
+        Cores, workers, per-pool thread counts and pinning
+    """
+    config = {
+        'cores': available_cores(),
+        'workers': worker_count(),
+        'threads_per_worker': _applied.get('threads_per_worker', threads_per_worker()),
+        'blas_env': {var: os.environ.get(var) for var in BLAS_ENV_VARS},
+        'opencv_threads': None,
+        'blas_threads': None,
+        'mediapipe': 'pinned' if 'pinned_cores' in _applied else 'unmanaged',
+        'pinned_cores': _applied.get('pinned_cores')
+    }
+
+    # Only report libraries that are already loaded; never import them here
+    if 'cv2' in sys.modules:
+        config['opencv_threads'] = sys.modules['cv2'].getNumThreads()
+    if threadpoolctl is not None and 'numpy' in sys.modules:
+        config['blas_threads'] = {info['internal_api']: info['num_threads']
+                                  for info in threadpoolctl.threadpool_info()}
+    return config
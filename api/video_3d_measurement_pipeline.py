@@ -4,13 +4,17 @@ Integrates all modules: Video → 3D Reconstruction → Measurements
 
 import os
 import tempfile
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Import all required modules
 from .video_upload import validate_video
-from .frame_extractor import extract_frames
-from .video_to_3d_reconstruction import reconstruct_3d_from_video, VideoTo3DReconstructor
+from .frame_extractor import DEFAULT_FRAME_INTERVAL, decode_frame_images, extract_frames
+from .video_to_3d_reconstruction import build_mesh_from_landmarks, VideoTo3DReconstructor
 from .mesh_3d_measurements import extract_measurements_from_mesh, Mesh3DMeasurementExtractor
+from .bootstrap_confidence import select_intervals
+from .stage_monitor import StageMonitor
+from .degradation import DegradationPlan, plan_degradation
+from .cancellation import CancellationToken, OperationCancelled
 
 class Video3DMeasurementPipeline:
     """Complete pipeline: Video → 3D Model → Body Measurements"""
@@ -24,14 +28,70 @@ class Video3DMeasurementPipeline:
         """
         self.reference_height_cm = reference_height_cm
         self.results = {}
+        self.stages = []
     
-    def process_video(self, video_path: str, max_frames: int = 30) -> Tuple[bool, any]:
+    def process_video(self, video_path: str, max_frames: int = 30,
+                      cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
         """
         Process video through complete 3D pipeline
         
         Args:
             video_path: Path to video file
             max_frames: Maximum frames to extract
+            cancel_token: Stops the run between units of work once tripped
+        
+        Returns:
+            (success, results or error_message)
+        """
+        monitor = StageMonitor('video_3d')
+        plan = plan_degradation('video_3d', max_frames, 'video_3d')
+        success, result = self._run_stages(video_path, plan, monitor, cancel_token)
+        total_ms = monitor.finish(success)
+        self.stages = monitor.report()
+        
+        if success:
+            self.results['processing_stats']['processing_time_ms'] = total_ms
+        
+        return success, result
+    
+    def process_frames(self, images: List[bytes], frame_info: Dict, max_frames: int = 30,
+                       cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
+        """
+        Process frames sampled by the client instead of a video
+        
+        Args:
+            images: Encoded frames (JPEG/PNG) in capture order
+            frame_info: Video-info-like dict (duration, fps, frame_count, width, height)
+            max_frames: Maximum frames to use
+            cancel_token: Stops the run between units of work once tripped
+        
+        Returns:
+            (success, results or error_message)
+        """
+        monitor = StageMonitor('video_3d')
+        plan = plan_degradation('video_3d', max_frames, 'video_3d')
+        success, result = self._run_stages(None, plan, monitor, cancel_token, (images, frame_info))
+        total_ms = monitor.finish(success)
+        self.stages = monitor.report()
+        
+        if success:
+            self.results['processing_stats']['processing_time_ms'] = total_ms
+        
+        return success, result
+    
+    def _run_stages(self, video_path: Optional[str], plan: DegradationPlan,
+                    monitor: StageMonitor,
+                    cancel_token: Optional[CancellationToken] = None,
+                    client_frames: Optional[Tuple[List[bytes], Dict]] = None) -> Tuple[bool, any]:
+        """
+        Run the pipeline stages, recording each one on the monitor
+        
+        Args:
+            video_path: Path to video file
+            plan: Frame count, resolution and detector profile for this run
+            monitor: Stage monitor for timing and memory
+            cancel_token: Checked inside the frame loops and between stages
+            client_frames: (images, frame_info) to decode instead of the video
         
         Returns:
             (success, results or error_message)
@@ -41,18 +101,33 @@ class Video3DMeasurementPipeline:
             print("VIDEO TO 3D MODEL TO MEASUREMENTS PIPELINE")
             print("="*60)
             
-            # Step 1: Validate video
-            print("\n[1/5] Validating video...")
-            success, result = validate_video(video_path)
-            if not success:
-                return False, f"Video validation failed: {result}"
-            
-            video_info = result
-            print(f"  ✓ Video: {video_info['duration']:.1f}s, {video_info['fps']:.1f} fps")
-            
-            # Step 2: Extract frames
-            print(f"\n[2/5] Extracting frames (max {max_frames})...")
-            success, frames = extract_frames(video_path, max_frames)
+            if client_frames is None:
+                # Step 1: Validate video
+                print("\n[1/5] Validating video...")
+                with monitor.stage('validate'):
+                    success, result = validate_video(video_path)
+                if not success:
+                    return False, f"Video validation failed: {result}"
+                
+                video_info = result
+                print(f"  ✓ Video: {video_info['duration']:.1f}s, {video_info['fps']:.1f} fps")
+                
+                # Step 2: Extract frames
+                print(f"\n[2/5] Extracting frames (max {plan.max_frames})...")
+                with monitor.stage('extract'):
+                    success, frames = extract_frames(video_path, max_frames=plan.max_frames,
+                                                     frame_interval=plan.frame_interval(DEFAULT_FRAME_INTERVAL),
+                                                     max_dimension=plan.max_dimension,
+                                                     cancel_token=cancel_token)
+            else:
+                # Steps 1-2: Frames sampled by the client; decode only those used
+                images, video_info = client_frames
+                print(f"\n[1/5] Received {len(images)} client frames")
+                print(f"\n[2/5] Decoding frames (max {plan.max_frames})...")
+                with monitor.stage('extract'):
+                    success, frames = decode_frame_images(images, max_frames=plan.max_frames,
+                                                          max_dimension=plan.max_dimension,
+                                                          cancel_token=cancel_token)
             if not success:
                 return False, f"Frame extraction failed: {frames}"
             
@@ -60,12 +135,27 @@ class Video3DMeasurementPipeline:
             
             # Step 3: Reconstruct 3D model from video
             print("\n[3/5] Reconstructing 3D body model from video...")
-            success, reconstruction_result = reconstruct_3d_from_video(frames)
+            reconstructor = VideoTo3DReconstructor(plan.detector_profile)
+            with monitor.stage('detect'):
+                try:
+                    success, landmarks_3d = reconstructor.extract_3d_landmarks(frames, cancel_token)
+                finally:
+                    # Hands the pooled detector back for the next request
+                    reconstructor.cleanup()
+            
+            # Only landmarks are needed for meshing; drop the pixel buffers
+            frame_count = len(frames)
+            del frames
+            
+            if not success:
+                return False, f"3D reconstruction failed: {landmarks_3d}"
+            
+            with monitor.stage('reconstruct'):
+                success, reconstruction_result = build_mesh_from_landmarks(reconstructor, landmarks_3d, cancel_token)
             if not success:
                 return False, f"3D reconstruction failed: {reconstruction_result}"
             
             mesh = reconstruction_result['mesh']
-            landmarks_3d = reconstruction_result['landmarks_3d']
             mesh_info = reconstruction_result['mesh_info']
             
             print(f"  ✓ 3D model created: {mesh_info['num_vertices']} vertices")
@@ -74,11 +164,14 @@ class Video3DMeasurementPipeline:
             
             # Step 4: Extract measurements from 3D mesh
             print("\n[4/5] Extracting body measurements from 3D model...")
-            success, measurements = extract_measurements_from_mesh(
-                mesh, 
-                landmarks_3d,
-                self.reference_height_cm
-            )
+            with monitor.stage('mesh_measure'):
+                success, measurements = extract_measurements_from_mesh(
+                    mesh, 
+                    landmarks_3d,
+                    self.reference_height_cm,
+                    reconstruction_result.get('frame_landmarks_3d'),
+                    cancel_token
+                )
             if not success:
                 return False, f"Measurement extraction failed: {measurements}"
             
@@ -89,8 +182,8 @@ class Video3DMeasurementPipeline:
                 'pipeline_type': 'video_to_3d_to_measurements',
                 'video_info': video_info,
                 'processing_stats': {
-                    'frames_extracted': len(frames),
-                    'frames_used': len(frames)
+                    'frames_extracted': frame_count,
+                    'frames_used': frame_count
                 },
                 '3d_model': {
                     'vertices': mesh_info['num_vertices'],
@@ -100,7 +193,8 @@ class Video3DMeasurementPipeline:
                     'is_watertight': mesh_info['is_watertight']
                 },
                 'measurements': measurements,
-                'quality': self._assess_quality(mesh_info, measurements)
+                'quality': self._assess_quality(mesh_info, measurements, plan.to_dict()),
+                'stages': monitor.report()
             }
             
             print("\n" + "="*60)
@@ -109,16 +203,22 @@ class Video3DMeasurementPipeline:
             
             return True, self.results
         
+        except OperationCancelled as e:
+            print(f"\n⏹ Pipeline cancelled: {e.reason}")
+            return False, f"Pipeline cancelled: {e.reason}"
+        
         except Exception as e:
             return False, f"Pipeline error: {str(e)}"
     
-    def _assess_quality(self, mesh_info: Dict, measurements: Dict) -> Dict:
+    def _assess_quality(self, mesh_info: Dict, measurements: Dict,
+                        degradation: Optional[Dict] = None) -> Dict:
         """
         Assess overall quality of 3D reconstruction and measurements
         
         Args:
             mesh_info: Mesh statistics
             measurements: Measurement results
+            degradation: Load-adaptive settings applied to this run
         
         Returns:
             Quality assessment
@@ -148,6 +248,9 @@ class Video3DMeasurementPipeline:
         else:
             quality['measurement_confidence'] = 'low'
         
+        if degradation is not None:
+            quality['degradation'] = degradation
+        
         # Generate recommendations
         quality['recommendations'] = self._generate_recommendations(quality, mesh_info)
         
@@ -176,6 +279,9 @@ class Video3DMeasurementPipeline:
         if not mesh_info.get('is_watertight', False):
             recommendations.append("3D model has holes. This may affect volume-based measurements.")
         
+        if quality.get('degradation', {}).get('degraded'):
+            recommendations.append("Processed at reduced quality due to high server load. Resubmit later for full precision.")
+        
         if not recommendations:
             recommendations.append("Measurements appear accurate. 3D model quality is good.")
         
@@ -212,6 +318,12 @@ class Video3DMeasurementPipeline:
             if field in measurements:
                 summary['key_measurements'][field] = f"{measurements[field]:.2f} cm"
         
+        # Bootstrap confidence intervals (landmark-derived lengths only)
+        summary['confidence_intervals'] = select_intervals(
+            measurements.get('confidence_intervals', {}),
+            key_fields
+        )
+        
         return summary
     
     def get_full_report(self) -> str:
@@ -0,0 +1,258 @@
+"""Video Fingerprints
+Perceptual fingerprints of uploaded videos (pHash of tiny grayscale frames)
+and a local LSH index, so re-exports of a clip that was already measured can
+reuse its result instead of running a new 3D reconstruction
+"""
+
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .frame_extractor import extract_thumbnails
+from .metrics import registry
+
+# Configuration
+FINGERPRINT_DB = os.getenv('MEASULOR_FINGERPRINT_DB', os.path.join(tempfile.gettempdir(), 'measulor_fingerprints.db'))
+FINGERPRINT_FRAMES = int(os.getenv('MEASULOR_FINGERPRINT_FRAMES', '8'))
+THUMBNAIL_SIZE = 32      # pHash input side in pixels
+HASH_SIZE = 8            # Low-frequency DCT block side -> 64-bit frame hash
+BANDS_PER_FRAME = 4      # LSH bands of 16 bits per frame hash
+
+FINGERPRINT_LOOKUPS = registry.counter(
+    'measulor_fingerprint_lookups_total',
+    'Near-duplicate video lookups by outcome',
+    ('outcome',)
+)
+
+class VideoFingerprint:
+    """One 64-bit perceptual hash per sampled frame, plus the clip duration"""
+
+    def __init__(self, hashes: Tuple[int, ...], duration: float):
+        self.hashes = tuple(hashes)
+        self.duration = duration
+
+    def distances(self, other: 'VideoFingerprint') -> List[int]:
+        """Differing bits per frame"""
+        return [bin(a ^ b).count('1') for a, b in zip(self.hashes, other.hashes)]
+
+    def bands(self) -> List[Tuple[int, int, int]]:
+        """(frame, band, value) keys for the LSH tables"""
+        return [(frame, band, (value >> (16 * band)) & 0xFFFF)
+                for frame, value in enumerate(self.hashes)
+                for band in range(BANDS_PER_FRAME)]
+
+    def to_bytes(self) -> bytes:
+        return struct.pack(f'>{len(self.hashes)}Q', *self.hashes)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, duration: float) -> 'VideoFingerprint':
+        return cls(struct.unpack(f'>{len(data) // 8}Q', data), duration)
+
+def frame_hash(thumbnail: np.ndarray) -> int:
+    """
+    64-bit DCT perceptual hash of a grayscale thumbnail
+
+    Bits mark low-frequency coefficients above their median, which survive
+    re-encoding, rescaling and small brightness changes.
+    """
+    coefficients = cv2.dct(np.float32(thumbnail))[:HASH_SIZE, :HASH_SIZE].flatten()
+    median = np.median(coefficients[1:])  # DC term excluded
+    return int(np.packbits(coefficients > median).view('>u8')[0])
+
+def compute_fingerprint(video_path: str, frames: int = FINGERPRINT_FRAMES) -> Tuple[bool, any]:
+    """
+    Fingerprint a video file
+
+    Args:
+        video_path: Path to video file
+        frames: Frames sampled across the clip
+
+    Returns:
+        (success, VideoFingerprint or error_message)
+    """
+    success, result = extract_thumbnails(video_path, count=frames, size=THUMBNAIL_SIZE)
+    if not success:
+        return False, result
+    thumbnails, duration = result
+    return True, VideoFingerprint([frame_hash(t) for t in thumbnails], duration)
+
+class ReusePolicy:
+    """When a near-duplicate's result may be returned instead of recomputing"""
+
+    def __init__(self, enabled: bool = True, max_distance: float = 4.0,
+                 duration_tolerance: float = 0.05, max_age_seconds: float = 86400):
+        """
+        Args:
+            enabled: Reuse results at all
+            max_distance: Mean differing bits per 64-bit frame hash
+            duration_tolerance: Allowed relative difference in clip duration
+            max_age_seconds: Oldest entry that may be reused
+        """
+        self.enabled = enabled
+        self.max_distance = max_distance
+        self.duration_tolerance = duration_tolerance
+        self.max_age_seconds = max_age_seconds
+
+    def allows(self, distances: List[int], duration: float, other_duration: float, age: float) -> bool:
+        if not self.enabled or age > self.max_age_seconds:
+            return False
+        if abs(duration - other_duration) > self.duration_tolerance * max(duration, other_duration):
+            return False
+        # Mean bounds overall similarity; the worst frame catches a different
+        # person walking into an otherwise identical shot
+        return (sum(distances) / len(distances) <= self.max_distance
+                and max(distances) <= 2 * self.max_distance)
+
+def default_reuse_policy() -> ReusePolicy:
+    """Policy from MEASULOR_REUSE_* environment variables (reuse is opt-in)"""
+    return ReusePolicy(
+        enabled=os.getenv('MEASULOR_REUSE_SIMILAR', '0') == '1',
+        max_distance=float(os.getenv('MEASULOR_REUSE_MAX_DISTANCE', '4')),
+        duration_tolerance=float(os.getenv('MEASULOR_REUSE_DURATION_TOLERANCE', '0.05')),
+        max_age_seconds=float(os.getenv('MEASULOR_REUSE_MAX_AGE_SECONDS', '86400'))
+    )
+
+class FingerprintIndex:
+    """LSH index over fingerprints, persisted in SQLite
+
+    Every frame hash is split into 16-bit bands; entries sharing any band
+    with the query are candidates, and only those are compared bit by bit.
+    The SQLite file is shared by the box's workers: each keeps the tables
+    in memory and reads rows added by the others before a lookup.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fingerprints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scope TEXT NOT NULL,
+            hashes BLOB NOT NULL,
+            duration REAL NOT NULL,
+            result_key TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = FINGERPRINT_DB, policy: Optional[ReusePolicy] = None):
+        """
+        Args:
+            path: Database file
+            policy: Reuse policy (defaults to default_reuse_policy())
+        """
+        self.path = path
+        self.policy = policy or default_reuse_policy()
+        self._entries = {}   # id -> (scope, fingerprint, result_key, created_at)
+        self._bands = {}     # (scope, frame, band, value) -> set of ids
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread and process
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _index(self, entry_id: int, scope: str, fingerprint: VideoFingerprint,
+               result_key: str, created_at: float):
+        self._entries[entry_id] = (scope, fingerprint, result_key, created_at)
+        for band in fingerprint.bands():
+            self._bands.setdefault((scope,) + band, set()).add(entry_id)
+        self._last_id = max(self._last_id, entry_id)
+
+    def _unindex(self, entry_id: int):
+        scope, fingerprint, _, _ = self._entries.pop(entry_id)
+        for band in fingerprint.bands():
+            ids = self._bands.get((scope,) + band)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._bands[(scope,) + band]
+
+    def _refresh(self):
+        """Load rows added since the last refresh (by any worker)"""
+        cutoff = time.time() - self.policy.max_age_seconds
+        rows = self._conn().execute(
+            'SELECT id, scope, hashes, duration, result_key, created_at FROM fingerprints '
+            'WHERE id > ? AND created_at >= ? ORDER BY id',
+            (self._last_id, cutoff)
+        ).fetchall()
+        for entry_id, scope, hashes, duration, result_key, created_at in rows:
+            self._index(entry_id, scope, VideoFingerprint.from_bytes(hashes, duration), result_key, created_at)
+
+    def add(self, fingerprint: VideoFingerprint, scope: str, result_key: str):
+        """
+        Record the result computed for a fingerprint
+
+        Args:
+            fingerprint: Fingerprint of the processed video
+            scope: Parameters the result depends on (height, profile, ...)
+            result_key: Result cache key holding the result
+        """
+        now = time.time()
+        cutoff = now - self.policy.max_age_seconds
+        conn = self._conn()
+        conn.execute('DELETE FROM fingerprints WHERE created_at < ?', (cutoff,))
+        conn.execute(
+            'INSERT INTO fingerprints (scope, hashes, duration, result_key, created_at) VALUES (?, ?, ?, ?, ?)',
+            (scope, fingerprint.to_bytes(), fingerprint.duration, result_key, now)
+        )
+        with self._lock:
+            for entry_id in [i for i, entry in self._entries.items() if entry[3] < cutoff]:
+                self._unindex(entry_id)
+            self._refresh()
+
+    def lookup(self, fingerprint: VideoFingerprint, scope: str) -> Optional[Dict]:
+        """
+        Find the closest earlier video the reuse policy accepts
+
+        Args:
+            fingerprint: Fingerprint of the new upload
+            scope: Parameters the result must have been computed with
+
+        Returns:
+            {'result_key', 'distance', 'age_seconds'} or None
+        """
+        if not self.policy.enabled:
+            return None
+        now = time.time()
+        best = None
+        with self._lock:
+            self._refresh()
+            candidates = set()
+            for band in fingerprint.bands():
+                candidates.update(self._bands.get((scope,) + band, ()))
+            for entry_id in candidates:
+                _, other, result_key, created_at = self._entries[entry_id]
+                if len(other.hashes) != len(fingerprint.hashes):
+                    continue
+                distances = fingerprint.distances(other)
+                if not self.policy.allows(distances, fingerprint.duration, other.duration, now - created_at):
+                    continue
+                distance = sum(distances) / len(distances)
+                if best is None or distance < best['distance']:
+                    best = {'result_key': result_key, 'distance': distance,
+                            'age_seconds': round(now - created_at, 1)}
+        FINGERPRINT_LOOKUPS.inc(outcome='match' if best else 'no_match')
+        return best
+
+_index_instance = None
+
+def get_fingerprint_index() -> Optional[FingerprintIndex]:
+    """Process-wide index, or None when MEASULOR_FINGERPRINT_DB is empty"""
+    global _index_instance
+    if _index_instance is None and FINGERPRINT_DB:
+        _index_instance = FingerprintIndex(FINGERPRINT_DB)
+    return _index_instance
@@ -0,0 +1,479 @@
+"""Asynchronous Video Jobs
+Job stores and runners that execute the video pipelines outside the request,
+so web workers stay free for image requests. Jobs run in a local process
+pool, or on separate worker nodes when MEASULOR_QUEUE_URL names a queue
+(see job_queue.py and worker.py).
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from .cancellation import JOB_DEADLINE, LEASE_LOST, CancellationToken
+from .job_queue import ACTIVE_RECORD_TTL, QUEUE_URL, JobQueue, open_job_queue
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX: only each web worker's pool size limits jobs
+    fcntl = None
+
+# Configuration
+JOB_DIR = os.getenv('MEASULOR_JOB_DIR', os.path.join(tempfile.gettempdir(), 'measulor_jobs'))
+JOB_RESULT_TTL = int(os.getenv('MEASULOR_JOB_TTL_SECONDS', '3600'))
+JOB_WORKERS = int(os.getenv('MEASULOR_JOB_WORKERS', '1'))  # Concurrent local jobs on the box
+SLOT_POLL_INTERVAL = 0.5  # Seconds between job slot checks
+SLOT_TOUCH_INTERVAL = 60.0  # Refresh a waiting job's record so it is not taken for abandoned
+JOB_MAX_FRAMES = 30
+# Queued/running records untouched for longer than this were abandoned by a
+# killed job process or web worker (the margin covers waiting in the pool)
+JOB_STALE_AFTER = JOB_DEADLINE + float(os.getenv('MEASULOR_JOB_STALE_MARGIN_SECONDS', str(JOB_DEADLINE)))
+
+VIDEO_PIPELINES = ('3d', '2d')
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+def _json_default(value):
+    """Serialize numpy scalars/arrays found in pipeline results"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class JobStore:
+    """Job records as JSON files in a shared directory
+
+    Every gunicorn worker and job process sees the same directory, so any
+    web worker can answer a status poll.
+    """
+
+    def __init__(self, directory: str = JOB_DIR, ttl_seconds: int = JOB_RESULT_TTL):
+        """
+        Initialize job store
+
+        Args:
+            directory: Directory for job records and uploaded videos
+            ttl_seconds: How long finished jobs are kept
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def _record_path(self, job_id: str) -> str:
+        if not _JOB_ID.match(job_id or ''):
+            raise ValueError(f"Invalid job id: {job_id}")
+        return os.path.join(self.directory, job_id + '.json')
+
+    def upload_path(self, job_id: str, extension: str) -> str:
+        """Path where the job's input video is stored"""
+        self._record_path(job_id)
+        return os.path.join(self.directory, f"{job_id}.input.{extension}")
+
+    def _write(self, job: Dict):
+        # Write-then-rename so readers never see a partial record
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(job, f, default=_json_default)
+        os.replace(tmp_path, self._record_path(job['job_id']))
+
+    def create(self, pipeline: str, params: Optional[Dict] = None) -> Dict:
+        """
+        Create a queued job
+
+        Args:
+            pipeline: One of VIDEO_PIPELINES
+            params: Pipeline parameters (reference height, max frames)
+
+        Returns:
+            Job record
+        """
+        now = time.time()
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'pipeline': pipeline,
+            'params': params or {},
+            'status': 'queued',
+            'created_at': now,
+            'updated_at': now,
+            'result': None,
+            'error': None
+        }
+        self._write(job)
+        return job
+
+    def update(self, job_id: str, **fields) -> Optional[Dict]:
+        """
+        Update fields of a job record
+
+        Returns:
+            Updated record, or None if the job does not exist
+        """
+        job = self._read(job_id)
+        if job is None:
+            return None
+        job.update(fields, updated_at=time.time())
+        self._write(job)
+        return job
+
+    def _read(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(self._record_path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Get a job record, treating expired finished jobs as gone
+
+        Returns:
+            Job record or None
+        """
+        job = self._read(job_id)
+        now = time.time()
+        if job is not None and self._stale(job, now):
+            job = self._fail_abandoned(job)
+        if job is not None and self._expired(job, now):
+            self.delete(job_id)
+            return None
+        return job
+
+    def delete(self, job_id: str):
+        """Remove a job record and its input video"""
+        for name in os.listdir(self.directory):
+            if name.startswith(job_id + '.'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _expired(self, job: Dict, now: float) -> bool:
+        return job['status'] in ('succeeded', 'failed') and now - job['updated_at'] > self.ttl_seconds
+
+    def _stale(self, job: Dict, now: float) -> bool:
+        return job['status'] in ('queued', 'running') and now - job['updated_at'] > JOB_STALE_AFTER
+
+    def _fail_abandoned(self, job: Dict) -> Optional[Dict]:
+        """Mark an abandoned job failed and drop its input video"""
+        for name in os.listdir(self.directory):
+            if name.startswith(job['job_id'] + '.input.'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        return self.update(job['job_id'], status='failed',
+                           error='Job abandoned: its worker stopped before finishing')
+
+    def purge_expired(self) -> int:
+        """
+        Delete finished jobs older than the TTL; fail abandoned ones
+
+        Returns:
+            Number of jobs removed
+        """
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            job = self._read(name[:-len('.json')])
+            if job is not None and self._stale(job, now):
+                job = self._fail_abandoned(job)
+            if job is not None and self._expired(job, now):
+                self.delete(job['job_id'])
+                removed += 1
+        return removed
+
+class QueueJobStore(JobStore):
+    """Job records kept in the queue backend, for workers on other nodes
+
+    Uploads are still staged in a local directory until the runner hands
+    them to the queue.
+    """
+
+    def __init__(self, queue: JobQueue, directory: str = JOB_DIR, ttl_seconds: int = JOB_RESULT_TTL):
+        """
+        Initialize job store
+
+        Args:
+            queue: Queue backend holding records and input videos
+            directory: Local staging directory for uploads
+            ttl_seconds: How long finished jobs are kept
+        """
+        super().__init__(directory, ttl_seconds)
+        self.queue = queue
+
+    def _write(self, job: Dict):
+        self._record_path(job['job_id'])
+        finished = job['status'] in ('succeeded', 'failed')
+        record = json.loads(json.dumps(job, default=_json_default))
+        self.queue.save_record(job['job_id'], record, self.ttl_seconds if finished else ACTIVE_RECORD_TTL)
+
+    def _read(self, job_id: str) -> Optional[Dict]:
+        self._record_path(job_id)
+        return self.queue.load_record(job_id)
+
+    def delete(self, job_id: str):
+        """Remove a job record and its input video"""
+        self.queue.delete_record(job_id)
+        self.queue.delete_blob(job_id)
+        super().delete(job_id)
+
+    def _stale(self, job: Dict, now: float) -> bool:
+        # Lease timeouts and dead-lettering settle abandoned queue jobs
+        return False
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired records and input blobs from the queue backend
+
+        Returns:
+            Number of records and blobs removed
+        """
+        return self.queue.purge_expired()
+
+def execute_video_job(store: JobStore, job_id: str, video_path: str,
+                      cancel_token: Optional[CancellationToken] = None) -> bool:
+    """
+    Run one video job against a job store
+
+    Pipeline errors are recorded on the job; only store failures raise.
+
+    Args:
+        store: Store holding the job record
+        job_id: Job to run
+        video_path: Local input video (removed afterwards)
+        cancel_token: Stops the pipeline early (defaults to a JOB_DEADLINE deadline)
+
+    Returns:
+        True if the pipeline succeeded
+    """
+    job = store.update(job_id, status='running', started_at=time.time())
+    if job is None:
+        return False
+
+    params = job['params']
+    cancel_token = cancel_token or CancellationToken(JOB_DEADLINE)
+    try:
+        if job['pipeline'] == '3d':
+            from .video_3d_measurement_pipeline import Video3DMeasurementPipeline
+            pipeline = Video3DMeasurementPipeline(params.get('reference_height_cm'))
+            label = '3D reconstruction'
+        else:
+            from .video_measurement_pipeline import VideoMeasurementPipeline
+            pipeline = VideoMeasurementPipeline(params.get('reference_height_cm'))
+            label = '2D pose'
+
+        success, result = pipeline.process_video(video_path, max_frames=params.get('max_frames', JOB_MAX_FRAMES),
+                                                 cancel_token=cancel_token)
+        if success:
+            store.update(job_id, status='succeeded', result={
+                'success': True,
+                'data': pipeline.get_summary(),
+                'pipeline': label,
+                'full_results': result
+            })
+        elif cancel_token.reason == LEASE_LOST:
+            pass  # Another worker owns the job now; leave its record alone
+        elif cancel_token.cancelled:
+            store.update(job_id, status='failed', error=f"Job cancelled: {cancel_token.reason}")
+        else:
+            store.update(job_id, status='failed', error=result)
+        return success
+
+    except Exception as e:
+        store.update(job_id, status='failed', error=f"Job error: {str(e)}")
+        return False
+
+    finally:
+        try:
+            os.remove(video_path)
+        except OSError:
+            pass
+
+@contextmanager
+def job_slot(store: JobStore, job_id: str, slots: int = JOB_WORKERS):
+    """
+    Hold one of the box's job slots while a local job runs
+
+    Slots are files locked with flock in the job directory, like admission
+    slots, so every web worker's pool together runs at most `slots` jobs and
+    a crashed job process frees its slot. The job stays 'queued' while it
+    waits.
+
+    Args:
+        store: Job store (its directory holds the slot files)
+        job_id: Job waiting to run
+        slots: Concurrent jobs on the box
+
+    Yields:
+        True once a slot is held; False if the job stopped being queued
+        while waiting (failed as abandoned or deleted)
+    """
+    if fcntl is None:
+        yield True
+        return
+    paths = [os.path.join(store.directory, f'job.slot{i}') for i in range(max(1, slots))]
+    next_touch = time.monotonic() + SLOT_TOUCH_INTERVAL
+    while True:
+        for path in paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            try:
+                yield True
+            finally:
+                os.close(fd)  # Closing drops the flock
+            return
+        if time.monotonic() >= next_touch:
+            job = store.get(job_id)
+            if job is None or job['status'] != 'queued':
+                yield False
+                return
+            store.update(job_id)
+            next_touch = time.monotonic() + SLOT_TOUCH_INTERVAL
+        time.sleep(SLOT_POLL_INTERVAL)
+
+def run_video_job(job_dir: str, job_id: str, video_path: str) -> bool:
+    """
+    Run one video job (executes in a job process)
+
+    Args:
+        job_dir: JobStore directory
+        job_id: Job to run
+        video_path: Uploaded input video
+
+    Returns:
+        True if the pipeline succeeded
+    """
+    store = JobStore(job_dir)
+    with job_slot(store, job_id) as acquired:
+        if not acquired:
+            return False
+        return execute_video_job(store, job_id, video_path)
+
+class LocalJobRunner:
+    """Runs video jobs in a local process pool owned by this web worker
+
+    Each web worker has its own pool; job_slot() caps the jobs running on
+    the box across all of them.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = JOB_WORKERS):
+        """
+        Initialize runner
+
+        Args:
+            store: Job store shared with the job processes
+            max_workers: Job processes in this web worker's pool
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use in the serving process; 'spawn' keeps job
+        # processes free of the web worker's MediaPipe and thread state
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, job_id: str, video_path: str):
+        """
+        Queue a job for execution
+
+        Args:
+            job_id: Job created in the store
+            video_path: Uploaded input video
+        """
+        future = self._get_executor().submit(run_video_job, self.store.directory, job_id, video_path)
+
+        def _on_done(done):
+            # A crashed job process never writes its own failure
+            if done.exception() is not None:
+                self.store.update(job_id, status='failed', error=f"Job process error: {done.exception()}")
+                try:
+                    os.remove(video_path)
+                except OSError:
+                    pass
+                with self._lock:
+                    self._executor = None
+
+        future.add_done_callback(_on_done)
+
+    def shutdown(self):
+        """Stop the process pool"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+class QueueJobRunner:
+    """Hands video jobs to the distributed queue for measulor workers"""
+
+    def __init__(self, store: QueueJobStore):
+        """
+        Initialize runner
+
+        Args:
+            store: Queue-backed job store
+        """
+        self.store = store
+        self.queue = store.queue
+
+    def submit(self, job_id: str, video_path: str):
+        """
+        Move the staged upload into the queue backend and enqueue the job
+
+        Args:
+            job_id: Job created in the store
+            video_path: Staged input video
+        """
+        try:
+            self.queue.save_blob_file(job_id, video_path)
+        finally:
+            try:
+                os.remove(video_path)
+            except OSError:
+                pass
+        self.queue.enqueue(job_id, {'extension': video_path.rsplit('.', 1)[-1]})
+
+    def shutdown(self):
+        """Nothing to stop; workers run elsewhere"""
+
+_store = None
+_runner = None
+
+def get_job_store() -> JobStore:
+    """Process-wide job store (queue-backed when MEASULOR_QUEUE_URL is set)"""
+    global _store
+    if _store is None:
+        queue = open_job_queue(QUEUE_URL)
+        _store = QueueJobStore(queue) if queue is not None else JobStore()
+    return _store
+
+def get_job_runner():
+    """Process-wide job runner: the distributed queue if configured, else a local pool"""
+    global _runner
+    if _runner is None:
+        store = get_job_store()
+        _runner = QueueJobRunner(store) if isinstance(store, QueueJobStore) else LocalJobRunner(store)
+    return _runner
@@ -3,21 +3,24 @@ Complete end-to-end pipeline for video-based body measurements
 """
 
 import os
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import tempfile
 
 # Import all tools
 from .video_upload import save_uploaded_video, validate_video
-from .frame_extractor import extract_frames
+from .frame_extractor import DEFAULT_FRAME_INTERVAL, decode_frame_images, extract_frames
 from .pose_detector import detect_poses_in_frames
 from .pose_quality_validator import validate_poses_batch, filter_valid_poses
 from .body_measurement_calculator import calculate_measurements_from_poses
 from .results_aggregator import aggregate_pipeline_results, ResultsAggregator
+from .stage_monitor import StageMonitor
+from .degradation import DegradationPlan, plan_degradation
+from .cancellation import CancellationToken, OperationCancelled, check_cancelled
 from .error_handler import (
     ErrorCategory,
     ErrorSeverity,
     handle_pipeline_error,
-    safe_execute
+    safe_execute_tool
 )
 
 class VideoMeasurementPipeline:
@@ -33,42 +36,118 @@ class VideoMeasurementPipeline:
         self.reference_height_cm = reference_height_cm
         self.temp_dir = tempfile.mkdtemp(prefix='measulor_')
         self.results = None
+        self.stages = []
         self.aggregator = ResultsAggregator()
     
-    def process_video(self, video_path: str, max_frames: int = 30) -> Tuple[bool, any]:
+    def process_video(self, video_path: str, max_frames: int = 30,
+                      cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
         """
         Process video through complete pipeline
         
         Args:
             video_path: Path to video file
             max_frames: Maximum frames to extract
+            cancel_token: Stops the run between units of work once tripped
+        
+        Returns:
+            (success, results_or_error)
+        """
+        monitor = StageMonitor('video_2d')
+        plan = plan_degradation('video_2d', max_frames, 'video')
+        success, result = self._run_stages(video_path, plan, monitor, cancel_token)
+        total_ms = monitor.finish(success)
+        self.stages = monitor.report()
+        
+        if success:
+            self.results['processing_stats']['processing_time_ms'] = total_ms
+        
+        return success, result
+    
+    def process_frames(self, images: List[bytes], frame_info: Dict, max_frames: int = 30,
+                       cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
+        """
+        Process frames sampled by the client instead of a video
+        
+        Args:
+            images: Encoded frames (JPEG/PNG) in capture order
+            frame_info: Video-info-like dict (duration, fps, frame_count, width, height)
+            max_frames: Maximum frames to use
+            cancel_token: Stops the run between units of work once tripped
+        
+        Returns:
+            (success, results_or_error)
+        """
+        monitor = StageMonitor('video_2d')
+        plan = plan_degradation('video_2d', max_frames, 'video')
+        success, result = self._run_stages(None, plan, monitor, cancel_token, (images, frame_info))
+        total_ms = monitor.finish(success)
+        self.stages = monitor.report()
+        
+        if success:
+            self.results['processing_stats']['processing_time_ms'] = total_ms
+        
+        return success, result
+    
+    def _run_stages(self, video_path: Optional[str], plan: DegradationPlan,
+                    monitor: StageMonitor,
+                    cancel_token: Optional[CancellationToken] = None,
+                    client_frames: Optional[Tuple[List[bytes], Dict]] = None) -> Tuple[bool, any]:
+        """
+        Run the pipeline stages, recording each one on the monitor
+        
+        Args:
+            video_path: Path to video file
+            plan: Frame count, resolution and detector profile for this run
+            monitor: Stage monitor for timing and memory
+            cancel_token: Checked inside the frame loops and between stages
+            client_frames: (images, frame_info) to decode instead of the video
         
         Returns:
             (success, results_or_error)
         """
         try:
-            # Step 1: Validate video
-            print("Step 1/7: Validating video...")
-            success, result = safe_execute(
-                validate_video,
-                ErrorCategory.VIDEO_UPLOAD,
-                video_path
-            )
-            
-            if not success:
-                return False, result
-            
-            video_info = result
-            print(f"✓ Video validated: {video_info['duration']:.1f}s, {video_info['fps']:.1f} fps")
-            
-            # Step 2: Extract frames
-            print(f"\nStep 2/7: Extracting frames (max {max_frames})...")
-            success, result = safe_execute(
-                extract_frames,
-                ErrorCategory.FRAME_EXTRACTION,
-                video_path,
-                max_frames
-            )
+            if client_frames is None:
+                # Step 1: Validate video
+                print("Step 1/7: Validating video...")
+                with monitor.stage('validate'):
+                    success, result = safe_execute_tool(
+                        validate_video,
+                        ErrorCategory.VIDEO_UPLOAD,
+                        video_path
+                    )
+                
+                if not success:
+                    return False, result
+                
+                video_info = result
+                print(f"✓ Video validated: {video_info['duration']:.1f}s, {video_info['fps']:.1f} fps")
+                
+                # Step 2: Extract frames
+                print(f"\nStep 2/7: Extracting frames (max {plan.max_frames})...")
+                with monitor.stage('extract'):
+                    success, result = safe_execute_tool(
+                        extract_frames,
+                        ErrorCategory.FRAME_EXTRACTION,
+                        video_path,
+                        frame_interval=plan.frame_interval(DEFAULT_FRAME_INTERVAL),
+                        max_frames=plan.max_frames,
+                        max_dimension=plan.max_dimension,
+                        cancel_token=cancel_token
+                    )
+            else:
+                # Steps 1-2: Frames sampled by the client; decode only those used
+                images, video_info = client_frames
+                print(f"Step 1/7: Received {len(images)} client frames")
+                print(f"\nStep 2/7: Decoding frames (max {plan.max_frames})...")
+                with monitor.stage('extract'):
+                    success, result = safe_execute_tool(
+                        decode_frame_images,
+                        ErrorCategory.FRAME_EXTRACTION,
+                        images,
+                        max_frames=plan.max_frames,
+                        max_dimension=plan.max_dimension,
+                        cancel_token=cancel_token
+                    )
             
             if not success:
                 return False, result
@@ -78,11 +157,20 @@ class VideoMeasurementPipeline:
             
             # Step 3: Detect poses
             print("\nStep 3/7: Detecting poses in frames...")
-            success, result = safe_execute(
-                detect_poses_in_frames,
-                ErrorCategory.POSE_DETECTION,
-                frames
-            )
+            with monitor.stage('detect'):
+                # Report landmarks in source pixels even if frames were downscaled
+                success, result = safe_execute_tool(
+                    detect_poses_in_frames,
+                    ErrorCategory.POSE_DETECTION,
+                    frames,
+                    profile=plan.detector_profile,
+                    output_size=(video_info['height'], video_info['width']),
+                    cancel_token=cancel_token
+                )
+            
+            # Landmarks are all we need from here on; drop the pixel buffers
+            frame_count = len(frames)
+            del frames
             
             if not success:
                 return False, result
@@ -91,12 +179,14 @@ class VideoMeasurementPipeline:
             print(f"✓ Detected poses in {len(poses)} frames")
             
             # Step 4: Validate pose quality
+            check_cancelled(cancel_token)
             print("\nStep 4/7: Validating pose quality...")
-            success, result = safe_execute(
-                validate_poses_batch,
-                ErrorCategory.QUALITY_VALIDATION,
-                poses
-            )
+            with monitor.stage('validate_poses'):
+                success, result = safe_execute_tool(
+                    validate_poses_batch,
+                    ErrorCategory.QUALITY_VALIDATION,
+                    poses
+                )
             
             if not success:
                 return False, result
@@ -107,7 +197,8 @@ class VideoMeasurementPipeline:
             
             # Step 5: Filter valid poses
             print("\nStep 5/7: Filtering valid poses...")
-            valid_poses, valid_indices = filter_valid_poses(poses)
+            with monitor.stage('filter_poses'):
+                valid_poses, valid_indices = filter_valid_poses(poses)
             
             if not valid_poses:
                 return False, {
@@ -118,13 +209,15 @@ class VideoMeasurementPipeline:
             print(f"✓ Using {len(valid_poses)} valid poses for measurement")
             
             # Step 6: Calculate measurements
+            check_cancelled(cancel_token)
             print("\nStep 6/7: Calculating body measurements...")
-            success, result = safe_execute(
-                calculate_measurements_from_poses,
-                ErrorCategory.MEASUREMENT_CALCULATION,
-                valid_poses,
-                self.reference_height_cm
-            )
+            with monitor.stage('measure'):
+                success, result = safe_execute_tool(
+                    calculate_measurements_from_poses,
+                    ErrorCategory.MEASUREMENT_CALCULATION,
+                    valid_poses,
+                    self.reference_height_cm
+                )
             
             if not success:
                 return False, result
@@ -134,17 +227,28 @@ class VideoMeasurementPipeline:
             
             # Step 7: Aggregate results
             print("\nStep 7/7: Aggregating results...")
-            self.results = self.aggregator.aggregate_results(
-                video_info,
-                frames,
-                poses,
-                validation_results,
-                measurements
-            )
+            with monitor.stage('aggregate'):
+                self.results = self.aggregator.aggregate_results(
+                    video_info,
+                    frame_count,
+                    poses,
+                    validation_results,
+                    measurements,
+                    plan.to_dict()
+                )
+            self.results['stages'] = monitor.report()
             
             print("\n✅ Pipeline completed successfully!\n")
             return True, self.results
         
+        except OperationCancelled as e:
+            print(f"\n⏹ Pipeline cancelled: {e.reason}")
+            return False, {
+                'error': 'Processing cancelled',
+                'message': e.reason,
+                'cancelled': True
+            }
+        
         except Exception as e:
             error = handle_pipeline_error(
                 e,
@@ -244,9 +348,10 @@ def create_video_measurement_endpoint(video_file,
         API response dictionary
     """
     try:
-        # Save uploaded video
-        temp_path = os.path.join(tempfile.gettempdir(), 'upload_' + video_file.filename)
-        video_file.save(temp_path)
+        # Save uploaded video to a unique scratch file (size-checked while streaming)
+        success, temp_path = save_uploaded_video(video_file)
+        if not success:
+            return {'success': False, 'message': temp_path}
         
         # Process video
         pipeline = VideoMeasurementPipeline(reference_height_cm)
@@ -6,47 +6,63 @@ import cv2
 import numpy as np
 from typing import List, Tuple, Dict, Optional
 import trimesh
-import open3d as o3d
 from scipy.spatial import Delaunay
 
+from .cancellation import CancellationToken, OperationCancelled, check_cancelled
+from .detector_pool import acquire_detector, release_detector
+
 # Import MediaPipe for pose landmarks (used as 3D scaffold)
 
 class VideoTo3DReconstructor:
     """Reconstructs 3D human body mesh from video frames"""
     
-    def __init__(self):
-                # Lazy load mediapipe to avoid import issues
-        import mediapipe as mp
-        self.mp_pose = mp.solutions.pose
-        self.pose_detector = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=2,  # Use highest quality model
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, profile: str = 'video_3d'):
+        """
+        Args:
+            profile: Detector profile ('video_3d', or 'video_3d_lite' under load)
+        """
+        # The pose model is created on first use, so mesh-only callers
+        # (replay benchmarks, recorded landmarks) never load MediaPipe
+        self.profile = profile
+        self.pose_detector = None
         self.mesh = None
         self.landmark_3d_points = []
+        self.frame_landmarks_3d = None
+    
+    def _get_pose_detector(self):
+        """Borrow the MediaPipe pose model on first use"""
+        if self.pose_detector is None:
+            # 'video_3d' profile: highest quality model, tracking enabled
+            self.pose_detector = acquire_detector(self.profile)
+        return self.pose_detector
     
-    def extract_3d_landmarks(self, frames: List[np.ndarray]) -> Tuple[bool, any]:
+    def extract_3d_landmarks(self, frames: List[np.ndarray],
+                             cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
         """
         Extract 3D landmarks from multiple video frames
         
         Args:
             frames: List of video frames
+            cancel_token: Checked before each frame
         
         Returns:
             (success, 3d_landmarks or error_message)
+        
+        Raises:
+            OperationCancelled: The token tripped (call cleanup() to release the detector)
         """
         try:
             all_landmarks_3d = []
+            pose_detector = self._get_pose_detector()
             
             for frame in frames:
+                check_cancelled(cancel_token)
                 # Convert BGR to RGB
                 frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 height, width = frame_rgb.shape[:2]
                 
                 # Process frame
-                results = self.pose_detector.process(frame_rgb)
+                results = pose_detector.process(frame_rgb)
                 
                 if results.pose_world_landmarks:
                     # Extract 3D world coordinates (in meters)
@@ -64,11 +80,14 @@ class VideoTo3DReconstructor:
                 return False, "No 3D landmarks detected in any frame"
             
             # Average landmarks across all frames for stability
-            avg_landmarks = np.mean(all_landmarks_3d, axis=0)
+            self.frame_landmarks_3d = np.asarray(all_landmarks_3d)
+            avg_landmarks = np.mean(self.frame_landmarks_3d, axis=0)
             self.landmark_3d_points = avg_landmarks
             
             return True, avg_landmarks
         
+        except OperationCancelled:
+            raise
         except Exception as e:
             return False, f"3D landmark extraction error: {str(e)}"
     
@@ -139,8 +158,8 @@ class VideoTo3DReconstructor:
             (success, refined_mesh or error_message)
         """
         try:
-            # Remove degenerate faces
-            mesh.remove_degenerate_faces()
+            # Remove degenerate faces (remove_degenerate_faces() is gone in trimesh 4)
+            mesh.update_faces(mesh.nondegenerate_faces())
             
             # Remove duplicate vertices
             mesh.merge_vertices()
@@ -204,7 +223,8 @@ class VideoTo3DReconstructor:
     def cleanup(self):
         """Release resources"""
         if self.pose_detector:
-            self.pose_detector.close()
+            release_detector(self.profile, self.pose_detector)
+            self.pose_detector = None
 
 def reconstruct_3d_from_video(frames: List[np.ndarray]) -> Tuple[bool, any]:
     """
@@ -222,11 +242,38 @@ def reconstruct_3d_from_video(frames: List[np.ndarray]) -> Tuple[bool, any]:
         # Step 1: Extract 3D landmarks
         print("Step 1: Extracting 3D landmarks from video...")
         success, landmarks = reconstructor.extract_3d_landmarks(frames)
+        reconstructor.cleanup()
         if not success:
             return False, landmarks
         print(f"✓ Extracted 3D landmarks: {len(landmarks)} points")
         
+        return build_mesh_from_landmarks(reconstructor, landmarks)
+    
+    except Exception as e:
+        return False, f"3D reconstruction pipeline error: {str(e)}"
+
+def build_mesh_from_landmarks(reconstructor: VideoTo3DReconstructor,
+                              landmarks: np.ndarray,
+                              cancel_token: Optional[CancellationToken] = None) -> Tuple[bool, any]:
+    """
+    Build and refine the body mesh from already-extracted 3D landmarks
+    
+    Needs no video frames, so callers can release them before meshing.
+    
+    Args:
+        reconstructor: Reconstructor that produced the landmarks
+        landmarks: Averaged 3D landmarks from extract_3d_landmarks()
+        cancel_token: Checked between mesh creation and refinement
+    
+    Returns:
+        (success, result_dict or error_message)
+    
+    Raises:
+        OperationCancelled: The token tripped
+    """
+    try:
         # Step 2: Create body mesh
+        check_cancelled(cancel_token)
         print("\nStep 2: Creating 3D body mesh...")
         success, mesh = reconstructor.create_body_mesh(landmarks)
         if not success:
@@ -234,6 +281,7 @@ def reconstruct_3d_from_video(frames: List[np.ndarray]) -> Tuple[bool, any]:
         print(f"✓ Created mesh: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
         
         # Step 3: Refine mesh
+        check_cancelled(cancel_token)
         print("\nStep 3: Refining mesh...")
         success, refined_mesh = reconstructor.refine_mesh(mesh)
         if not success:
@@ -246,6 +294,7 @@ def reconstruct_3d_from_video(frames: List[np.ndarray]) -> Tuple[bool, any]:
         result = {
             'mesh': refined_mesh,
             'landmarks_3d': landmarks,
+            'frame_landmarks_3d': reconstructor.frame_landmarks_3d,
             'mesh_info': mesh_info,
             'reconstructor': reconstructor
         }
@@ -253,5 +302,7 @@ def reconstruct_3d_from_video(frames: List[np.ndarray]) -> Tuple[bool, any]:
         print("\n✅ 3D reconstruction completed successfully!\n")
         return True, result
     
+    except OperationCancelled:
+        raise
     except Exception as e:
         return False, f"3D reconstruction pipeline error: {str(e)}"
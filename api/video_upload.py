@@ -2,9 +2,14 @@
 Handles video file uploads with validation and temporary storage
 """
 
-from flask import request, jsonify
+from flask import Request, request, jsonify
+import hashlib
 import os
+import shutil
 import tempfile
+from functools import wraps
+from typing import Tuple
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
 # Allowed video formats
@@ -13,6 +18,213 @@ ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'webm', 'mkv'}
 # Maximum file size (50MB)
 MAX_FILE_SIZE = 50 * 1024 * 1024
 
+# Client-sampled frame uploads (/api/measure-frames)
+MAX_UPLOADED_FRAMES = int(os.getenv('MEASULOR_MAX_UPLOADED_FRAMES', '120'))
+MAX_FRAMES_UPLOAD_BYTES = int(os.getenv('MEASULOR_MAX_FRAMES_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+
+# Single-photo uploads (/api/process, any transport)
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv('MEASULOR_MAX_IMAGE_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+
+# Scratch directory for streamed uploads
+SCRATCH_DIR = os.getenv('MEASULOR_SCRATCH_DIR', tempfile.gettempdir())
+COPY_CHUNK_SIZE = 1024 * 1024
+MULTIPART_OVERHEAD = 64 * 1024  # Boundaries and small form fields next to the file
+
+# WSGI environ keys: per-file byte limit set by @streamed_uploads, whole-body
+# limit set by @limited_body, and the scratch files opened for the request
+UPLOAD_LIMIT_KEY = 'measulor.upload_limit'
+BODY_LIMIT_KEY = 'measulor.body_limit'
+SCRATCH_FILES_KEY = 'measulor.scratch_files'
+
+class ScratchFile:
+    """
+    Upload container written straight to a unique file on disk
+
+    The size cap is enforced and the SHA-256 computed as chunks arrive, so
+    an oversized upload is rejected as soon as it crosses the limit and the
+    content hash costs no second pass. The file is removed when closed
+    unless keep() or move_to() took ownership of it.
+    """
+
+    def __init__(self, suffix: str = '', max_bytes: int = MAX_FILE_SIZE, directory: str = SCRATCH_DIR):
+        fd, self.path = tempfile.mkstemp(prefix='measulor_upload_', suffix=suffix, dir=directory)
+        self._file = os.fdopen(fd, 'w+b')
+        self._digest = hashlib.sha256()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._kept = False
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.close()
+            raise RequestEntityTooLarge(f"File too large. Maximum size: {self.max_bytes // (1024*1024)}MB")
+        self._digest.update(data)
+        return self._file.write(data)
+
+    @property
+    def sha256(self) -> str:
+        """Hex digest of everything written so far"""
+        return self._digest.hexdigest()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def keep(self) -> str:
+        """Take ownership of the file on disk; returns its path"""
+        self._file.close()
+        self._kept = True
+        return self.path
+
+    def move_to(self, destination: str) -> str:
+        """Move the file to its final location (a rename on the same filesystem)"""
+        self._file.close()
+        shutil.move(self.path, destination)
+        self.path = destination
+        self._kept = True
+        return destination
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self._kept:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self._kept = True  # Closed for good
+
+class UploadRequest(Request):
+    """Request class that streams file parts of opted-in views to ScratchFiles"""
+
+    @property
+    def max_content_length(self):
+        # Per-view limit from @limited_body; werkzeug also enforces it on
+        # chunked bodies while reading (gunicorn terminates the input stream)
+        limit = self.environ.get(BODY_LIMIT_KEY)
+        return limit if limit is not None else super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        max_bytes = self.environ.get(UPLOAD_LIMIT_KEY)
+        if max_bytes is None:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        suffix = ''
+        if filename and allowed_file(filename):
+            suffix = '.' + filename.rsplit('.', 1)[1].lower()
+        scratch = ScratchFile(suffix, max_bytes)
+        # Files of an aborted parse never reach request.files; close them too
+        self.environ.setdefault(SCRATCH_FILES_KEY, []).append(scratch)
+        return scratch
+
+    def close(self):
+        super().close()
+        for scratch in self.environ.get(SCRATCH_FILES_KEY, ()):
+            scratch.close()
+
+def streamed_uploads(max_bytes: int = MAX_FILE_SIZE):
+    """
+    Decorator for views whose file uploads should stream to scratch files
+
+    Requires app.request_class = UploadRequest. Requests whose declared
+    Content-Length is already over the limit are rejected before any body
+    is read.
+
+    Args:
+        max_bytes: Per-file size limit
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.content_length and request.content_length > max_bytes + MULTIPART_OVERHEAD:
+                return upload_too_large_response(max_bytes)
+            request.environ[UPLOAD_LIMIT_KEY] = max_bytes
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def limited_body(max_bytes: int):
+    """
+    Decorator for views whose whole request body has a size limit
+
+    Requires app.request_class = UploadRequest. A declared Content-Length
+    over the limit is rejected before any body is read; a body without one
+    (chunked) raises RequestEntityTooLarge once the limit has been read.
+
+    Args:
+        max_bytes: Request body limit
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.content_length and request.content_length > max_bytes:
+                return upload_too_large_response(max_bytes)
+            request.environ[BODY_LIMIT_KEY] = max_bytes
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def read_body(max_bytes: int) -> bytes:
+    """
+    Whole raw request body, for views under @limited_body(max_bytes)
+
+    A plain read stops quietly at the limit, so a chunked body that reaches
+    it is treated as over it.
+
+    Raises:
+        RequestEntityTooLarge: Body over the limit
+    """
+    data = request.get_data(cache=False)
+    if request.content_length is None and len(data) >= max_bytes:
+        raise RequestEntityTooLarge(f"File too large. Maximum size: {max_bytes // (1024*1024)}MB")
+    return data
+
+def upload_too_large_response(max_bytes: int = MAX_FILE_SIZE):
+    """413 response for an upload over the limit"""
+    return jsonify({
+        'success': False,
+        'message': f"File too large. Maximum size: {max_bytes // (1024*1024)}MB"
+    }), 413
+
+def ingest_file(file_storage, suffix: str = '', max_bytes: int = MAX_FILE_SIZE) -> Tuple[bool, any]:
+    """
+    Get an upload as a ScratchFile (hashed, size-checked, on disk)
+
+    Streamed uploads already are one; anything else is copied in chunks.
+
+    Args:
+        file_storage: werkzeug FileStorage
+        suffix: File suffix for a copied upload (e.g. '.mp4')
+        max_bytes: Size limit for a copied upload
+
+    Returns:
+        (success, ScratchFile or error_message)
+    """
+    if isinstance(file_storage.stream, ScratchFile):
+        return True, file_storage.stream
+    scratch = ScratchFile(suffix, max_bytes)
+    try:
+        for chunk in iter(lambda: file_storage.stream.read(COPY_CHUNK_SIZE), b''):
+            scratch.write(chunk)
+        scratch.flush()
+    except RequestEntityTooLarge as e:
+        return False, e.description
+    except Exception:
+        scratch.close()
+        raise
+    return True, scratch
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -26,7 +238,8 @@ def validate_video_size(file):
 
 def save_uploaded_video(video_file):
     """
-    Save uploaded video to temporary directory
+    Save uploaded video to a unique temporary file, checking size and
+    hashing in the same pass
     Returns: (success, temp_path or error_message)
     """
     try:
@@ -37,21 +250,16 @@ def save_uploaded_video(video_file):
         if not allowed_file(filename):
             return False, f"Invalid file format. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
         
-        # Check file size
-        if not validate_video_size(video_file):
-            return False, f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
-        
-        # Create temporary file
+        # Stream to disk; the size limit is enforced while copying
         suffix = '.' + filename.rsplit('.', 1)[1].lower()
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        temp_path = temp_file.name
-        
-        # Save video to temporary file
-        video_file.save(temp_path)
-        temp_file.close()
+        success, result = ingest_file(video_file, suffix)
+        if not success:
+            return False, result
         
-        return True, temp_path
+        return True, result.keep()
     
+    except RequestEntityTooLarge as e:
+        return False, e.description
     except Exception as e:
         return False, f"Error saving video: {str(e)}"
 
@@ -113,7 +321,6 @@ def validate_video(video_path):
     Returns: (success, video_info_or_error)
     """
     try:
-        import json
         from pathlib import Path
         
         # Check if file exists
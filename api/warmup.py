@@ -0,0 +1,142 @@
+"""Model Warmup
+Runs a dummy inference per detector profile after worker start and tracks
+readiness for /api/health
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .detector_pool import DETECTOR_PROFILES, acquire_detector, release_detector
+from .metrics import registry
+
+# Profiles to warm in each worker (comma-separated keys of DETECTOR_PROFILES)
+WARMUP_PROFILES = os.getenv('MEASULOR_WARMUP_PROFILES', 'image')
+WARMUP_FRAME_SIZE = (480, 640)  # (height, width) of the dummy frame
+
+WORKER_READY = registry.gauge(
+    'measulor_worker_ready',
+    'Whether this worker finished model warmup (1) or not (0)'
+)
+WARMUP_DURATION = registry.gauge(
+    'measulor_warmup_duration_seconds',
+    'Time spent warming each detector profile',
+    ('profile',)
+)
+
+_lock = threading.Lock()
+_state = {
+    'required': False,   # Readiness is gated only once warmup was requested
+    'status': 'not_started',
+    'profiles': {},
+    'error': None,
+    'pid': None
+}
+
+def configured_profiles(value: Optional[str] = None) -> List[str]:
+    """
+    Parse the warmup profile list
+
+    Args:
+        value: Comma-separated profiles (defaults to MEASULOR_WARMUP_PROFILES)
+
+    Returns:
+        Known profile names, in order
+    """
+    names = [p.strip() for p in (value if value is not None else WARMUP_PROFILES).split(',')]
+    return [p for p in names if p in DETECTOR_PROFILES]
+
+def warm_profile(profile: str) -> float:
+    """
+    Create a pooled detector and push one dummy frame through it
+
+    Returns:
+        Warmup time in seconds
+    """
+    import numpy as np
+    
+    start = time.perf_counter()
+    detector = acquire_detector(profile)
+    try:
+        detector.process(np.zeros(WARMUP_FRAME_SIZE + (3,), dtype=np.uint8))
+    finally:
+        release_detector(profile, detector)
+    return time.perf_counter() - start
+
+def run_warmup(profiles: Optional[List[str]] = None) -> bool:
+    """
+    Warm all configured profiles in the calling thread
+
+    Args:
+        profiles: Profiles to warm (defaults to configured_profiles())
+
+    Returns:
+        True if every profile warmed successfully
+    """
+    profiles = configured_profiles() if profiles is None else profiles
+    with _lock:
+        _state.update(required=True, status='warming', error=None, pid=os.getpid())
+    WORKER_READY.set(0)
+
+    try:
+        for profile in profiles:
+            duration = warm_profile(profile)
+            WARMUP_DURATION.set(duration, profile=profile)
+            with _lock:
+                _state['profiles'][profile] = round(duration * 1000, 1)
+            print(f"Warmed detector profile '{profile}' in {duration * 1000:.0f} ms")
+    except Exception as e:
+        with _lock:
+            _state.update(status='failed', error=str(e))
+        print(f"Warmup failed: {str(e)}")
+        return False
+
+    with _lock:
+        _state['status'] = 'ready'
+    WORKER_READY.set(1)
+    return True
+
+def start_warmup(profiles: Optional[List[str]] = None, background: bool = True):
+    """
+    Start warmup for this worker
+
+    Call after fork (gunicorn post_fork); /api/health reports not-ready
+    until it completes.
+
+    Args:
+        profiles: Profiles to warm (defaults to configured_profiles())
+        background: Run in a daemon thread instead of blocking the caller
+    """
+    with _lock:
+        _state.update(required=True, status='warming', profiles={}, pid=os.getpid())
+    WORKER_READY.set(0)
+
+    if not background:
+        run_warmup(profiles)
+        return
+    threading.Thread(target=run_warmup, args=(profiles,), name='measulor-warmup', daemon=True).start()
+
+def readiness() -> Dict:
+    """
+    Get this worker's readiness
+
+    Workers that never requested warmup (flask run, serverless) are always
+    ready; they pay model startup on the first request instead. A failed
+    warmup also reports ready so a broken profile cannot take every worker
+    out of rotation; the error is included for diagnosis.
+
+    Returns:
+        {'ready', 'status', 'profiles', 'error'}
+    """
+    with _lock:
+        state = dict(_state, profiles=dict(_state['profiles']))
+    inherited = state['pid'] is not None and state['pid'] != os.getpid()
+    if not state['required'] or inherited:
+        return {'ready': True, 'status': 'not_required', 'profiles': {}, 'error': None}
+    return {
+        'ready': state['status'] in ('ready', 'failed'),
+        'status': state['status'],
+        'profiles': state['profiles'],
+        'error': state['error']
+    }
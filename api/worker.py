@@ -0,0 +1,169 @@
+"""Measulor Worker
+Leases video jobs from the distributed queue (MEASULOR_QUEUE_URL) and runs
+the existing pipelines. Run one process per core budget:
+
+    python -m api.worker            # Procfile: worker
+    python -m api.worker --once     # drain the queue and exit
+"""
+
+import argparse
+import os
+import signal
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from .cancellation import LEASE_LOST
+from .metrics import flush_metrics
+from .thread_governor import apply_worker_limits, configure_blas_env
+
+# Configuration
+POLL_INTERVAL = float(os.getenv('MEASULOR_WORKER_POLL_SECONDS', '2'))
+# Queued jobs default to the 3D pipeline (see video_jobs.VIDEO_PIPELINES)
+WORKER_WARMUP_PROFILES = os.getenv('MEASULOR_WORKER_WARMUP_PROFILES', 'video_3d')
+PURGE_INTERVAL = float(os.getenv('MEASULOR_WORKER_PURGE_SECONDS', '300'))
+
+_stop = threading.Event()
+
+def _heartbeat(queue, lease, done: threading.Event, cancel_token):
+    """Extend the lease while the pipeline runs so it is not handed out again"""
+    interval = max(1.0, queue.visibility_timeout / 3)
+    while not done.wait(interval):
+        if not queue.extend(lease):
+            # Another worker may own the job now; stop duplicate work
+            print(f"Lost lease on job {lease.job_id}")
+            cancel_token.cancel(LEASE_LOST)
+            return
+
+def process_lease(queue, store, lease) -> str:
+    """
+    Run the job behind one lease and settle it
+
+    Pipeline failures (bad video, no person) are final and acked; exceptions
+    from the queue or store propagate so the caller can nack for a retry.
+
+    Args:
+        queue: JobQueue the lease came from
+        store: QueueJobStore for the job records
+        lease: Leased message
+
+    Returns:
+        Final job status ('succeeded' or 'failed')
+    """
+    from .cancellation import JOB_DEADLINE, CancellationToken
+    from .video_jobs import execute_video_job
+
+    job_id = lease.job_id
+    fd, video_path = tempfile.mkstemp(suffix='.' + lease.payload.get('extension', 'mp4'))
+    os.close(fd)
+    if not queue.load_blob_file(job_id, video_path):
+        os.remove(video_path)
+        store.update(job_id, status='failed', error='Input video expired before processing')
+        queue.ack(lease)
+        return 'failed'
+
+    store.update(job_id, attempts=lease.attempts, worker=f"{os.uname().nodename}:{os.getpid()}")
+    done = threading.Event()
+    cancel_token = CancellationToken(JOB_DEADLINE)
+    heartbeat = threading.Thread(target=_heartbeat, args=(queue, lease, done, cancel_token), daemon=True)
+    heartbeat.start()
+    try:
+        success = execute_video_job(store, job_id, video_path, cancel_token)
+    finally:
+        done.set()
+        heartbeat.join()
+
+    if queue.ack(lease):
+        queue.delete_blob(job_id)
+    else:
+        # Redelivered to another worker, which still needs the input
+        print(f"Job {job_id} finished after its lease expired")
+    return 'succeeded' if success else 'failed'
+
+def run_worker(queue=None, once: bool = False, poll_interval: float = POLL_INTERVAL,
+               max_jobs: Optional[int] = None) -> int:
+    """
+    Lease and run jobs until stopped
+
+    Args:
+        queue: JobQueue (defaults to MEASULOR_QUEUE_URL)
+        once: Exit when the queue is empty
+        poll_interval: Seconds to sleep when the queue is empty
+        max_jobs: Exit after this many jobs
+
+    Returns:
+        Number of jobs processed
+    """
+    from .job_queue import open_job_queue
+    from .video_jobs import QueueJobStore
+
+    queue = queue or open_job_queue()
+    if queue is None:
+        raise RuntimeError('MEASULOR_QUEUE_URL is not set')
+    store = QueueJobStore(queue)
+
+    processed = 0
+    next_purge = 0.0
+    while not _stop.is_set():
+        if time.monotonic() >= next_purge:
+            # Expired records, and input blobs of jobs nobody will run
+            removed = store.purge_expired()
+            if removed:
+                print(f"Purged {removed} expired record(s)/blob(s)")
+            next_purge = time.monotonic() + PURGE_INTERVAL
+
+        lease = queue.lease()
+        if lease is None:
+            if once:
+                break
+            _stop.wait(poll_interval)
+            continue
+
+        print(f"Job {lease.job_id}: attempt {lease.attempts}/{queue.max_attempts}")
+        start = time.perf_counter()
+        try:
+            status = process_lease(queue, store, lease)
+        except Exception as e:
+            outcome = queue.nack(lease, str(e))
+            print(f"Job {lease.job_id}: error ({str(e)}), {outcome}")
+            if outcome == 'dead':
+                store.update(lease.job_id, status='failed', error=f"Job error: {str(e)}")
+                queue.delete_blob(lease.job_id)
+            status = 'error'
+        print(f"Job {lease.job_id}: {status} in {time.perf_counter() - start:.1f}s")
+        flush_metrics()
+
+        processed += 1
+        if max_jobs is not None and processed >= max_jobs:
+            break
+    return processed
+
+def _request_stop(signum, frame):
+    # Finish the current job, then exit
+    print(f"Received signal {signum}, stopping after the current job")
+    _stop.set()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measulor video job worker')
+    parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+    parser.add_argument('--max-jobs', type=int, default=None, help='Exit after this many jobs')
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL)
+    parser.add_argument('--no-warmup', action='store_true', help='Skip detector warmup')
+    args = parser.parse_args(argv)
+
+    # Before numpy/scipy load; sized by WEB_CONCURRENCY (workers per box)
+    configure_blas_env()
+    apply_worker_limits(0)
+
+    if not args.no_warmup:
+        from .warmup import configured_profiles, run_warmup
+        run_warmup(configured_profiles(WORKER_WARMUP_PROFILES))
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+    processed = run_worker(once=args.once, poll_interval=args.poll_interval, max_jobs=args.max_jobs)
+    print(f"Worker exiting after {processed} job(s)")
+
+if __name__ == '__main__':
+    main()
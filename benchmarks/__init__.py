@@ -0,0 +1 @@
+"""Benchmark harnesses for the Measulor pipelines"""
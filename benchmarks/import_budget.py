@@ -0,0 +1,127 @@
+"""Import-Time Budget Check
+Measures cold import time of the web entry points with `python -X importtime`
+and fails when a budget is exceeded or a heavy dependency is imported eagerly.
+
+Usage:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --module api.index --budget-ms 800 --top 20
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# Per-entry-point budgets. api.index serves /api/process and the license
+# endpoints on Vercel; the model and 3D stacks must load only on first use.
+BUDGETS = {
+    'api.index': {
+        'max_ms': 600,
+        'forbidden': ['mediapipe', 'cv2', 'trimesh', 'scipy', 'open3d']
+    }
+}
+DEFAULT_REPEATS = 3
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def measure_imports(module: str) -> Dict:
+    """
+    Import a module in a fresh interpreter and parse -X importtime output
+
+    Args:
+        module: Dotted module name
+
+    Returns:
+        {'total_ms': cumulative import time of the module,
+         'modules': {name: {'self_ms', 'cumulative_ms', 'depth'}}}
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {
+                'self_ms': int(self_us) / 1000.0,
+                'cumulative_ms': int(cumulative_us) / 1000.0,
+                'depth': len(indent) // 2
+            }
+
+    total = modules.get(module, {}).get('cumulative_ms', 0.0)
+    return {'total_ms': total, 'modules': modules}
+
+def check_budget(module: str, budget: Dict, repeats: int = DEFAULT_REPEATS, top: int = 10) -> Dict:
+    """
+    Check one entry point against its budget
+
+    The median of several cold imports is used; the first run also pays for
+    filesystem caches and .pyc compilation.
+
+    Returns:
+        Result with total time, offending modules and the slowest imports
+    """
+    runs = [measure_imports(module) for _ in range(repeats)]
+    total_ms = statistics.median(run['total_ms'] for run in runs)
+    modules = runs[-1]['modules']
+
+    forbidden = sorted(name for name in modules
+                       if name.split('.')[0] in budget.get('forbidden', []))
+    slowest = sorted(modules.items(), key=lambda item: item[1]['self_ms'], reverse=True)[:top]
+
+    violations = []
+    if budget.get('max_ms') is not None and total_ms > budget['max_ms']:
+        violations.append(f"import took {total_ms:.0f} ms (budget {budget['max_ms']} ms)")
+    if forbidden:
+        roots = sorted({name.split('.')[0] for name in forbidden})
+        violations.append(f"eagerly imports {', '.join(roots)}")
+
+    return {
+        'module': module,
+        'total_ms': round(total_ms, 1),
+        'budget_ms': budget.get('max_ms'),
+        'forbidden_imported': forbidden,
+        'slowest': [{'module': name, 'self_ms': round(info['self_ms'], 1),
+                     'cumulative_ms': round(info['cumulative_ms'], 1)} for name, info in slowest],
+        'violations': violations
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check import-time budgets of the web entry points')
+    parser.add_argument('--module', action='append', help='Module to check (default: all budgeted)')
+    parser.add_argument('--budget-ms', type=float, help='Override the time budget')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to list')
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in args.module or list(BUDGETS):
+        budget = dict(BUDGETS.get(module, {'max_ms': None, 'forbidden': []}))
+        if args.budget_ms is not None:
+            budget['max_ms'] = args.budget_ms
+        result = check_budget(module, budget, args.repeats, args.top)
+        results.append(result)
+
+        status = 'FAIL' if result['violations'] else 'ok'
+        print(f"{module}: {result['total_ms']:.0f} ms (budget {budget['max_ms']}) {status}")
+        for violation in result['violations']:
+            print(f"  - {violation}")
+        for entry in result['slowest']:
+            print(f"    {entry['self_ms']:>8.1f} ms self {entry['cumulative_ms']:>9.1f} ms cum  {entry['module']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if any(r['violations'] for r in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Keygen Stand-in Server
+Local stub of the Keygen validate-key endpoint with configurable latency and
+error rates, so /api/process can be load-tested offline.
+
+Usage:
+    python -m benchmarks.keygen_stub --port 8765 --latency-ms 120 --error-rate 0.01
+    KEYGEN_API_BASE=http://127.0.0.1:8765 KEYGEN_ACCOUNT_ID=stub KEYGEN_PRODUCT_ID=stub \\
+        KEYGEN_PRODUCT_TOKEN=stub gunicorn -w 4 api.index:app
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+DEFAULT_PORT = 8765
+VALIDATE_PATH = re.compile(r'^/v1/accounts/[^/]+/licenses/actions/validate-key$')
+JSONAPI_CONTENT_TYPE = 'application/vnd.api+json; charset=utf-8'
+
+class KeygenStubConfig:
+    """Behaviour of the stub; shared by all handler threads"""
+
+    def __init__(self, latency_ms: float = 100.0, jitter_ms: float = 20.0,
+                 error_rate: float = 0.0, error_status: int = 503,
+                 invalid_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            latency_ms: Mean added response latency
+            jitter_ms: Standard deviation of the added latency
+            error_rate: Fraction of requests answered with error_status
+            error_status: HTTP status for injected errors
+            invalid_rate: Fraction of keys reported as not valid
+            seed: Random seed for reproducible runs
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.invalid_rate = invalid_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'valid': 0, 'invalid': 0, 'errors': 0}
+
+    def decide(self) -> Tuple[float, str]:
+        """Draw the delay (seconds) and outcome ('error', 'invalid' or 'valid') for one request"""
+        with self.lock:
+            delay = max(0.0, self.random.gauss(self.latency_ms, self.jitter_ms)) / 1000.0
+            roll = self.random.random()
+            if roll < self.error_rate:
+                outcome = 'error'
+            elif roll < self.error_rate + self.invalid_rate:
+                outcome = 'invalid'
+            else:
+                outcome = 'valid'
+            self.stats['requests'] += 1
+            self.stats['errors' if outcome == 'error' else outcome] += 1
+        return delay, outcome
+
+def validation_payload(key: str, valid: bool) -> Dict:
+    """Build a validate-key response body in Keygen's JSON:API shape"""
+    return {
+        'meta': {
+            'valid': valid,
+            'code': 'VALID' if valid else 'NOT_FOUND',
+            'detail': 'is valid' if valid else 'does not exist'
+        },
+        'data': {
+            'id': str(uuid.uuid5(uuid.NAMESPACE_OID, key)),
+            'type': 'licenses',
+            'attributes': {'key': key, 'status': 'ACTIVE' if valid else 'EXPIRED'}
+        } if valid else None
+    }
+
+class KeygenStubHandler(BaseHTTPRequestHandler):
+    """Handles validate-key and a /stats endpoint"""
+
+    config = KeygenStubConfig()
+
+    def do_POST(self):
+        if not VALIDATE_PATH.match(self.path):
+            self._send(404, {'errors': [{'title': 'Not found'}]})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            key = json.loads(self.rfile.read(length) or b'{}').get('meta', {}).get('key', '')
+        except ValueError:
+            self._send(400, {'errors': [{'title': 'Bad request'}]})
+            return
+
+        delay, outcome = self.config.decide()
+        time.sleep(delay)
+
+        if outcome == 'error':
+            self._send(self.config.error_status, {'errors': [{'title': 'Injected error'}]})
+        else:
+            self._send(200, validation_payload(key, outcome == 'valid'))
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.config.lock:
+                self._send(200, dict(self.config.stats))
+        else:
+            self._send(404, {'errors': [{'title': 'Not found'}]})
+
+    def _send(self, status: int, body: Dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', JSONAPI_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(config: KeygenStubConfig, host: str = '127.0.0.1',
+                      port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    Start the stub in a background thread
+
+    Args:
+        config: Stub behaviour
+        host: Bind address
+        port: Port (0 picks a free one)
+
+    Returns:
+        Running server; call shutdown() to stop it
+    """
+    handler = type('ConfiguredKeygenStubHandler', (KeygenStubHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='keygen-stub', daemon=True).start()
+    return server
+
+def stub_base_url(server: ThreadingHTTPServer) -> str:
+    """Value for KEYGEN_API_BASE that points at a running stub"""
+    host, port = server.server_address[:2]
+    return f'http://{host}:{port}'
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Local Keygen validate-key stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-ms', type=float, default=100.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--invalid-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    config = KeygenStubConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                              args.error_status, args.invalid_rate, args.seed)
+    server = start_stub_server(config, args.host, args.port)
+    print(f"Keygen stub listening; set KEYGEN_API_BASE={stub_base_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Landmark Sequence Recorder
+Saves PoseDetector / extract_3d_landmarks outputs as compact .npz sequences so
+downstream stages can be replayed without loading a model.
+
+Usage:
+    python -m benchmarks.landmark_recorder record clip.mp4 clip.npz --with-3d
+    python -m benchmarks.landmark_recorder synthesize synthetic.npz --frames 60
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+NUM_LANDMARKS = 33
+SEQUENCE_FORMAT_VERSION = 1
+DEFAULT_MAX_FRAMES = 30
+DEFAULT_PERSON_HEIGHT_M = 1.75
+
+# Normalized (x, y) image positions of the 33 MediaPipe landmarks for a person
+# standing facing the camera in a portrait frame (person's left = image right)
+STANDING_TEMPLATE = np.array([
+    [0.500, 0.120],                                  # 0 nose
+    [0.510, 0.105], [0.520, 0.105], [0.530, 0.105],  # 1-3 left eye inner/eye/outer
+    [0.490, 0.105], [0.480, 0.105], [0.470, 0.105],  # 4-6 right eye inner/eye/outer
+    [0.545, 0.115], [0.455, 0.115],                  # 7-8 ears
+    [0.515, 0.140], [0.485, 0.140],                  # 9-10 mouth
+    [0.600, 0.220], [0.400, 0.220],                  # 11-12 shoulders
+    [0.640, 0.360], [0.360, 0.360],                  # 13-14 elbows
+    [0.660, 0.480], [0.340, 0.480],                  # 15-16 wrists
+    [0.665, 0.510], [0.335, 0.510],                  # 17-18 pinkies
+    [0.660, 0.520], [0.340, 0.520],                  # 19-20 index fingers
+    [0.650, 0.500], [0.350, 0.500],                  # 21-22 thumbs
+    [0.560, 0.500], [0.440, 0.500],                  # 23-24 hips
+    [0.565, 0.700], [0.435, 0.700],                  # 25-26 knees
+    [0.570, 0.900], [0.430, 0.900],                  # 27-28 ankles
+    [0.565, 0.920], [0.435, 0.920],                  # 29-30 heels
+    [0.580, 0.940], [0.420, 0.940],                  # 31-32 foot index
+], dtype=np.float32)
+
+def poses_to_arrays(poses: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Pack PoseDetector results into dense arrays
+
+    Args:
+        poses: Pose dictionaries from PoseDetector.detect_pose()
+
+    Returns:
+        {'landmarks_2d': (F, 33, 4) float32 [x_px, y_px, z, visibility],
+         'frame_shapes': (F, 2) int32 [height, width]}
+    """
+    landmarks = np.zeros((len(poses), NUM_LANDMARKS, 4), dtype=np.float32)
+    shapes = np.zeros((len(poses), 2), dtype=np.int32)
+
+    for i, pose in enumerate(poses):
+        for idx, lm in pose['landmarks'].items():
+            landmarks[i, int(idx)] = (lm['x'], lm['y'], lm['z'], lm['visibility'])
+        shapes[i] = pose['frame_shape']
+
+    return {'landmarks_2d': landmarks, 'frame_shapes': shapes}
+
+def arrays_to_poses(landmarks_2d: np.ndarray, frame_shapes: np.ndarray) -> List[Dict]:
+    """
+    Rebuild PoseDetector-style pose dictionaries from packed arrays
+
+    Args:
+        landmarks_2d: (F, 33, 4) array from poses_to_arrays()
+        frame_shapes: (F, 2) array of (height, width)
+
+    Returns:
+        List of pose dictionaries
+    """
+    poses = []
+    for frame, shape in zip(landmarks_2d.tolist(), frame_shapes.tolist()):
+        poses.append({
+            'landmarks': {
+                idx: {'x': x, 'y': y, 'z': z, 'visibility': v}
+                for idx, (x, y, z, v) in enumerate(frame)
+            },
+            'frame_shape': tuple(shape),
+            'detected': True
+        })
+    return poses
+
+def save_sequence(path: str,
+                  landmarks_2d: Optional[np.ndarray] = None,
+                  frame_shapes: Optional[np.ndarray] = None,
+                  frame_landmarks_3d: Optional[np.ndarray] = None,
+                  metadata: Optional[Dict] = None):
+    """
+    Save a landmark sequence as a compressed .npz
+
+    Args:
+        path: Output path
+        landmarks_2d: (F, 33, 4) pixel landmarks
+        frame_shapes: (F, 2) frame shapes
+        frame_landmarks_3d: (F3, 33, 4) world landmarks in meters
+        metadata: JSON-serializable description of the source
+    """
+    arrays = {}
+    if landmarks_2d is not None:
+        arrays['landmarks_2d'] = np.asarray(landmarks_2d, dtype=np.float32)
+        arrays['frame_shapes'] = np.asarray(frame_shapes, dtype=np.int32)
+    if frame_landmarks_3d is not None:
+        arrays['frame_landmarks_3d'] = np.asarray(frame_landmarks_3d, dtype=np.float32)
+
+    meta = dict(metadata or {}, format_version=SEQUENCE_FORMAT_VERSION)
+    np.savez_compressed(path, metadata=np.array(json.dumps(meta)), **arrays)
+
+def load_sequence(path: str) -> Dict:
+    """
+    Load a landmark sequence saved by save_sequence()
+
+    Returns:
+        Dictionary with 'metadata' and whichever arrays were recorded
+    """
+    with np.load(path, allow_pickle=False) as data:
+        sequence = {key: data[key] for key in data.files if key != 'metadata'}
+        sequence['metadata'] = json.loads(str(data['metadata'])) if 'metadata' in data.files else {}
+    return sequence
+
+def synthesize_sequence(num_frames: int = 60,
+                        width: int = 720,
+                        height: int = 1280,
+                        seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Generate a plausible standing-pose landmark sequence without a model
+
+    The standing template gets a slow sway plus per-frame detector jitter, so
+    per-frame measurements vary the way real recordings do.
+
+    Args:
+        num_frames: Number of frames
+        width: Frame width in pixels
+        height: Frame height in pixels
+        seed: Random seed
+
+    Returns:
+        Arrays for save_sequence(): landmarks_2d, frame_shapes, frame_landmarks_3d
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(num_frames, dtype=np.float32)[:, None]
+
+    xy = np.broadcast_to(STANDING_TEMPLATE, (num_frames, NUM_LANDMARKS, 2)).copy()
+    xy[:, :, 0] += 0.01 * np.sin(t * 0.2)
+    xy += rng.normal(0, 0.003, xy.shape).astype(np.float32)
+    visibility = rng.uniform(0.85, 0.99, (num_frames, NUM_LANDMARKS)).astype(np.float32)
+    depth = rng.normal(0, 0.02, (num_frames, NUM_LANDMARKS)).astype(np.float32)
+
+    landmarks_2d = np.empty((num_frames, NUM_LANDMARKS, 4), dtype=np.float32)
+    landmarks_2d[..., 0] = xy[..., 0] * width
+    landmarks_2d[..., 1] = xy[..., 1] * height
+    landmarks_2d[..., 2] = depth
+    landmarks_2d[..., 3] = visibility
+
+    # World landmarks: meters, origin between the hips, y pointing down
+    pixels_per_meter = (STANDING_TEMPLATE[29:31, 1].mean() - STANDING_TEMPLATE[0, 1] + 0.1) \
+        * height / DEFAULT_PERSON_HEIGHT_M
+    hip_center = landmarks_2d[:, 23:25, :2].mean(axis=1, keepdims=True)
+    frame_landmarks_3d = np.empty_like(landmarks_2d)
+    frame_landmarks_3d[..., :2] = (landmarks_2d[..., :2] - hip_center) / pixels_per_meter
+    frame_landmarks_3d[..., 2] = depth * 5
+    frame_landmarks_3d[..., 3] = visibility
+
+    return {
+        'landmarks_2d': landmarks_2d,
+        'frame_shapes': np.tile(np.array([height, width], dtype=np.int32), (num_frames, 1)),
+        'frame_landmarks_3d': frame_landmarks_3d
+    }
+
+def record_video(video_path: str, max_frames: int = DEFAULT_MAX_FRAMES,
+                 with_3d: bool = False) -> Dict:
+    """
+    Run the detectors on a video and return packed landmark arrays
+
+    Args:
+        video_path: Input video
+        max_frames: Maximum number of frames to extract
+        with_3d: Also record world landmarks from VideoTo3DReconstructor
+
+    Returns:
+        Arrays and metadata for save_sequence()
+    """
+    from api.frame_extractor import extract_frames, get_video_info
+    from api.pose_detector import detect_poses_in_frames
+
+    success, frames = extract_frames(video_path, max_frames=max_frames)
+    if not success:
+        raise RuntimeError(frames)
+
+    success, poses = detect_poses_in_frames(frames)
+    if not success:
+        raise RuntimeError(poses)
+    recorded = poses_to_arrays(poses)
+
+    if with_3d:
+        from api.video_to_3d_reconstruction import VideoTo3DReconstructor
+        reconstructor = VideoTo3DReconstructor()
+        try:
+            success, landmarks = reconstructor.extract_3d_landmarks(frames)
+        finally:
+            reconstructor.cleanup()
+        if not success:
+            raise RuntimeError(landmarks)
+        recorded['frame_landmarks_3d'] = reconstructor.frame_landmarks_3d
+
+    recorded['metadata'] = {
+        'source': 'video',
+        'video': get_video_info(video_path),
+        'frames_extracted': len(frames),
+        'frames_detected': len(poses)
+    }
+    return recorded
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Record landmark sequences for replay benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='Run the detectors on a video')
+    record_parser.add_argument('video')
+    record_parser.add_argument('output')
+    record_parser.add_argument('--max-frames', type=int, default=DEFAULT_MAX_FRAMES)
+    record_parser.add_argument('--with-3d', action='store_true', help='Also record 3D world landmarks')
+
+    synth_parser = subparsers.add_parser('synthesize', help='Generate a sequence without a model')
+    synth_parser.add_argument('output')
+    synth_parser.add_argument('--frames', type=int, default=60)
+    synth_parser.add_argument('--width', type=int, default=720)
+    synth_parser.add_argument('--height', type=int, default=1280)
+    synth_parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        recorded = record_video(args.video, args.max_frames, args.with_3d)
+        metadata = recorded.pop('metadata')
+    else:
+        recorded = synthesize_sequence(args.frames, args.width, args.height, args.seed)
+        metadata = {'source': 'synthetic', 'seed': args.seed}
+
+    save_sequence(args.output, metadata=metadata, **recorded)
+    print(f"Wrote {args.output}: " + ', '.join(f"{k} {v.shape}" for k, v in recorded.items()))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
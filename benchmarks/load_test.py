@@ -0,0 +1,339 @@
+"""HTTP Load Test
+Concurrent load generator for /api/process, /api/measure and
+/api/measure-video-3d. Reports p50/p95/p99 latency and throughput per
+endpoint and concurrency level, optionally sweeping gunicorn worker counts.
+
+Usage:
+    # Against a running server (start it with KEYGEN_API_BASE pointing at the stub)
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --endpoints process \\
+        --concurrency 1,4,8 --requests 200 --output load.json
+
+    # Spawn gunicorn per worker count with a bundled Keygen stub
+    python -m benchmarks.load_test --app api.index:app --workers 1,2,4 --keygen-stub \\
+        --endpoints process --concurrency 4,8,16 --duration 30 --output sweep.json
+"""
+
+import argparse
+import base64
+import json
+import os
+import secrets
+import socket
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import requests
+
+from .keygen_stub import KeygenStubConfig, start_stub_server, stub_base_url
+from .synthetic_video import render_figure_frame, write_synthetic_video
+
+ENDPOINTS = {
+    'process': '/api/process',
+    'measure': '/api/measure',
+    'measure-video-3d': '/api/measure-video-3d'
+}
+DEFAULT_TIMEOUT = 600
+READY_PATH = '/metrics'   # served by both api.index and api.measure
+READY_TIMEOUT = 120
+
+def random_license_key() -> str:
+    """License key in the portal's XXXX-XXXX-... format; unique keys bypass the license cache"""
+    alphabet = string.ascii_uppercase + string.digits
+    return '-'.join(''.join(secrets.choice(alphabet) for _ in range(4)) for _ in range(8))
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class RequestFactory:
+    """Builds request kwargs for each endpoint from one image and one video"""
+
+    def __init__(self, image_path: Optional[str], video_path: Optional[str],
+                 license_key: Optional[str], height_cm: float):
+        """
+        Args:
+            image_path: JPEG/PNG to send (default: rendered synthetic figure)
+            video_path: Video to send (default: rendered synthetic clip)
+            license_key: Fixed license key; None generates a unique key per request
+            height_cm: Reference height for the video endpoint
+        """
+        if image_path:
+            with open(image_path, 'rb') as f:
+                self.image_bytes = f.read()
+        else:
+            ok, encoded = cv2.imencode('.jpg', render_figure_frame(720, 1280, 0.0))
+            self.image_bytes = encoded.tobytes()
+        self.image_b64 = 'data:image/jpeg;base64,' + base64.b64encode(self.image_bytes).decode()
+
+        if not video_path:
+            video_path = os.path.join(tempfile.gettempdir(), 'measulor_load_clip.mp4')
+            if not os.path.exists(video_path):
+                write_synthetic_video(video_path, 360, 640, 30, 2.0)
+        with open(video_path, 'rb') as f:
+            self.video_bytes = f.read()
+
+        self.license_key = license_key
+        self.height_cm = height_cm
+
+    def build(self, endpoint: str) -> Dict:
+        """Keyword arguments for requests.Session.post()"""
+        if endpoint == 'process':
+            key = self.license_key or random_license_key()
+            return {'json': {'image': self.image_b64, 'license_key': key}}
+        if endpoint == 'measure':
+            return {'files': {'image': ('frame.jpg', self.image_bytes, 'image/jpeg')}}
+        if endpoint == 'measure-video-3d':
+            return {'files': {'video': ('clip.mp4', self.video_bytes, 'video/mp4')},
+                    'data': {'height_cm': str(self.height_cm)}}
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+def run_load(base_url: str, endpoint: str, factory: RequestFactory, concurrency: int,
+             total_requests: Optional[int] = None, duration: Optional[float] = None,
+             timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """
+    Drive one endpoint with a fixed number of concurrent clients
+
+    Runs until total_requests have been sent or duration seconds have passed.
+
+    Returns:
+        Summary with latency percentiles, throughput and error counts
+    """
+    url = base_url.rstrip('/') + ENDPOINTS[endpoint]
+    lock = threading.Lock()
+    issued = [0]
+    samples = []
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_slot() -> bool:
+        with lock:
+            if total_requests is not None and issued[0] >= total_requests:
+                return False
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            issued[0] += 1
+            return True
+
+    def client():
+        session = requests.Session()
+        while next_slot():
+            kwargs = factory.build(endpoint)
+            start = time.perf_counter()
+            try:
+                response = session.post(url, timeout=timeout, **kwargs)
+                latency = time.perf_counter() - start
+                try:
+                    ok = response.ok and response.json().get('success', False)
+                except ValueError:
+                    ok = False
+                record = {'latency': latency, 'status': response.status_code, 'ok': ok}
+            except requests.RequestException as e:
+                record = {'latency': time.perf_counter() - start, 'status': None,
+                          'ok': False, 'error': type(e).__name__}
+            with lock:
+                samples.append(record)
+        session.close()
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    wall = time.perf_counter() - wall_start
+
+    return summarize_samples(samples, wall, concurrency)
+
+def summarize_samples(samples: List[Dict], wall: float, concurrency: int) -> Dict:
+    """Reduce raw request samples to percentiles and rates"""
+    latencies = sorted(s['latency'] * 1000 for s in samples)
+    ok_count = sum(1 for s in samples if s['ok'])
+    statuses = {}
+    for s in samples:
+        label = str(s['status']) if s['status'] is not None else s.get('error', 'error')
+        statuses[label] = statuses.get(label, 0) + 1
+
+    def ms(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'succeeded': ok_count,
+        'error_rate': round(1 - ok_count / len(samples), 4) if samples else None,
+        'statuses': statuses,
+        'wall_s': round(wall, 2),
+        'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1] if latencies else None),
+            'mean': ms(sum(latencies) / len(latencies) if latencies else None)
+        }
+    }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = READY_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            if requests.get(base_url + READY_PATH, timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} not ready after {timeout}s")
+
+def spawn_gunicorn(app: str, workers: int, env: Dict[str, str]) -> Tuple[subprocess.Popen, str]:
+    """
+    Start gunicorn on a free local port and wait until it answers
+
+    Returns:
+        (process, base_url)
+    """
+    port = _free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+         '--timeout', str(DEFAULT_TIMEOUT), app],
+        env=dict(os.environ, **env),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(base_url, process)
+    except Exception:
+        process.terminate()
+        process.wait()
+        raise
+    return process, base_url
+
+def run_matrix(targets: List[Dict], endpoints: List[str], concurrency_levels: List[int],
+               factory: RequestFactory, total_requests: Optional[int],
+               duration: Optional[float], run_target: Callable) -> List[Dict]:
+    """
+    Run every (target, endpoint, concurrency) combination
+
+    Args:
+        targets: Target descriptions passed to run_target
+        run_target: Context manager factory yielding a base URL for a target
+
+    Returns:
+        Result rows
+    """
+    rows = []
+    for target in targets:
+        with run_target(target) as base_url:
+            for endpoint in endpoints:
+                for concurrency in concurrency_levels:
+                    summary = run_load(base_url, endpoint, factory, concurrency,
+                                       total_requests, duration)
+                    row = dict(target, endpoint=endpoint, **summary)
+                    rows.append(row)
+                    latency = summary['latency_ms']
+                    print(f"{str(target.get('workers', '-')):>7} {endpoint:<17} c={concurrency:<3} "
+                          f"{summary['throughput_rps']:>8} rps  p50 {latency['p50']}  "
+                          f"p95 {latency['p95']}  p99 {latency['p99']} ms  "
+                          f"errors {summary['error_rate']:.1%}", file=sys.stderr)
+    return rows
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Measulor HTTP load test')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--base-url', help='Running server to test')
+    target.add_argument('--app', help='WSGI app to spawn under gunicorn (e.g. api.index:app)')
+    parser.add_argument('--workers', type=_int_list, default=[1],
+                        help='Comma-separated gunicorn worker counts to sweep (with --app)')
+    parser.add_argument('--endpoints', default='process',
+                        help=f"Comma-separated: {','.join(ENDPOINTS)}")
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 4])
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument('--requests', type=int, help='Requests per run (default 50)')
+    limit.add_argument('--duration', type=float, help='Seconds per run')
+    parser.add_argument('--image', help='Image file to send (default: synthetic)')
+    parser.add_argument('--video', help='Video file to send (default: synthetic)')
+    parser.add_argument('--license-key', help='Fixed license key (default: unique per request, uncached)')
+    parser.add_argument('--height-cm', type=float, default=175.0)
+    parser.add_argument('--keygen-stub', action='store_true', help='Start the bundled Keygen stub')
+    parser.add_argument('--keygen-latency-ms', type=float, default=100.0)
+    parser.add_argument('--keygen-error-rate', type=float, default=0.0)
+    parser.add_argument('--output', required=True, help='Report path')
+    args = parser.parse_args(argv)
+
+    endpoints = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+    total_requests = args.requests if args.requests or args.duration else 50
+
+    env = {}
+    stub = None
+    if args.keygen_stub:
+        stub = start_stub_server(KeygenStubConfig(args.keygen_latency_ms,
+                                                  error_rate=args.keygen_error_rate), port=0)
+        env = {'KEYGEN_API_BASE': stub_base_url(stub), 'KEYGEN_ACCOUNT_ID': 'stub',
+               'KEYGEN_PRODUCT_ID': 'stub', 'KEYGEN_PRODUCT_TOKEN': 'stub'}
+        if args.base_url:
+            print(f"Keygen stub at {env['KEYGEN_API_BASE']}; the server under test must be "
+                  f"started with KEYGEN_API_BASE set to it", file=sys.stderr)
+
+    @contextmanager
+    def run_target(target):
+        if args.base_url:
+            yield args.base_url
+            return
+        process, base_url = spawn_gunicorn(args.app, target['workers'], env)
+        try:
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait()
+
+    targets = [{'workers': w} for w in args.workers] if args.app else [{'workers': None}]
+    factory = RequestFactory(args.image, args.video, args.license_key, args.height_cm)
+
+    try:
+        rows = run_matrix(targets, endpoints, args.concurrency, factory,
+                          total_requests, args.duration, run_target)
+    finally:
+        if stub is not None:
+            stub.shutdown()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'target': args.base_url or args.app,
+            'cpu_count': os.cpu_count(),
+            'requests_per_run': total_requests,
+            'duration_per_run': args.duration,
+            'keygen_stub': args.keygen_stub,
+            'keygen_latency_ms': args.keygen_latency_ms if args.keygen_stub else None,
+            'unique_license_keys': args.license_key is None
+        },
+        'results': rows
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
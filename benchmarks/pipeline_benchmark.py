@@ -0,0 +1,274 @@
+"""End-to-End Pipeline Benchmark
+Runs both video pipelines on synthetic videos and records latency, throughput
+and peak memory to a JSON baseline; compare mode flags regressions.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark run --output baseline.json
+    python -m benchmarks.pipeline_benchmark run --output current.json --compare baseline.json
+    python -m benchmarks.pipeline_benchmark compare baseline.json current.json --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .synthetic_video import generate_video_matrix
+
+DEFAULT_THRESHOLD = 0.15     # 15% regression tolerance
+MIN_COMPARABLE_MS = 5.0      # Stage timings below this are noise
+DEFAULT_MAX_FRAMES = 30
+QUICK_MATRIX = {'resolutions': [(360, 640)], 'frame_rates': [30], 'durations': [2.0]}
+
+def _load_pipeline(name: str):
+    """Import a pipeline class lazily so one missing stack doesn't block the other"""
+    # Always measure full quality: the benchmark's own CPU load must not
+    # trigger load-adaptive degradation
+    from api import degradation
+    degradation.MAX_LEVEL = 0
+
+    if name == '2d':
+        from api.video_measurement_pipeline import VideoMeasurementPipeline
+        return VideoMeasurementPipeline
+    if name == '3d':
+        from api.video_3d_measurement_pipeline import Video3DMeasurementPipeline
+        return Video3DMeasurementPipeline
+    raise ValueError(f"Unknown pipeline: {name}")
+
+def run_pipeline_once(pipeline_class, video_path: str, max_frames: int,
+                      reference_height_cm: Optional[float], verbose: bool = False) -> Dict:
+    """
+    Run one pipeline on one video
+
+    Returns:
+        Run record with wall time, success flag, stage records and stats
+    """
+    pipeline = pipeline_class(reference_height_cm)
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+    start = time.perf_counter()
+    with output:
+        success, result = pipeline.process_video(video_path, max_frames=max_frames)
+    wall = time.perf_counter() - start
+
+    stats = result.get('processing_stats', {}) if success and isinstance(result, dict) else {}
+    return {
+        'success': success,
+        'error': None if success else str(result)[:300],
+        'wall_s': wall,
+        'stages': getattr(pipeline, 'stages', []),
+        'frames_extracted': stats.get('frames_extracted', 0)
+    }
+
+def summarize_runs(runs: List[Dict], video: Dict) -> Dict:
+    """
+    Reduce repeated runs of one case to medians
+
+    Args:
+        runs: Run records from run_pipeline_once()
+        video: Video description
+
+    Returns:
+        Case summary
+    """
+    walls = [r['wall_s'] for r in runs]
+    median_wall = statistics.median(walls)
+
+    stage_durations = {}
+    peak_rss = None
+    for run in runs:
+        for stage in run['stages']:
+            stage_durations.setdefault(stage['name'], []).append(stage.get('duration_ms', 0.0))
+            if stage.get('peak_rss_mb') is not None:
+                peak_rss = max(peak_rss or 0.0, stage['peak_rss_mb'])
+
+    return {
+        'success': all(r['success'] for r in runs),
+        'error': next((r['error'] for r in runs if r['error']), None),
+        'runs': len(runs),
+        'latency_ms': {
+            'median': round(median_wall * 1000, 2),
+            'min': round(min(walls) * 1000, 2),
+            'max': round(max(walls) * 1000, 2)
+        },
+        'throughput': {
+            'video_frames_per_s': round(video['frame_count'] / median_wall, 2) if median_wall else None,
+            'videos_per_min': round(60.0 / median_wall, 2) if median_wall else None
+        },
+        'frames_extracted': runs[-1]['frames_extracted'],
+        'stages_ms': {name: round(statistics.median(values), 2) for name, values in stage_durations.items()},
+        'peak_rss_mb': peak_rss
+    }
+
+def run_benchmarks(pipelines: List[str], video_dir: str, repeats: int, warmup: int,
+                   max_frames: int, reference_height_cm: Optional[float],
+                   quick: bool = False, verbose: bool = False) -> Dict:
+    """
+    Run the benchmark matrix
+
+    Returns:
+        Benchmark report (meta + cases)
+    """
+    matrix = QUICK_MATRIX if quick else {}
+    videos = generate_video_matrix(video_dir, **matrix)
+    cases = {}
+
+    for name in pipelines:
+        try:
+            pipeline_class = _load_pipeline(name)
+        except ImportError as e:
+            cases[f"{name}/unavailable"] = {'success': False, 'error': f"Import failed: {e}"}
+            print(f"[{name}] skipped: {e}", file=sys.stderr)
+            continue
+
+        for _ in range(warmup):
+            run_pipeline_once(pipeline_class, videos[0]['path'], max_frames, reference_height_cm)
+
+        for video in videos:
+            runs = [run_pipeline_once(pipeline_class, video['path'], max_frames,
+                                      reference_height_cm, verbose)
+                    for _ in range(repeats)]
+            case_id = f"{name}/{video['case_id']}"
+            cases[case_id] = summarize_runs(runs, video)
+            cases[case_id]['video'] = {k: v for k, v in video.items() if k != 'path'}
+            latency = cases[case_id]['latency_ms']['median']
+            print(f"{case_id:<40} {latency:>10.1f} ms  "
+                  f"{'ok' if cases[case_id]['success'] else 'FAILED'}", file=sys.stderr)
+
+    return {
+        'meta': benchmark_metadata(repeats, warmup, max_frames, reference_height_cm),
+        'cases': cases
+    }
+
+def benchmark_metadata(repeats: int, warmup: int, max_frames: int,
+                       reference_height_cm: Optional[float]) -> Dict:
+    """Environment details stored alongside the numbers"""
+    meta = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeats': repeats,
+        'warmup': warmup,
+        'max_frames': max_frames,
+        'reference_height_cm': reference_height_cm
+    }
+    for module in ('numpy', 'cv2', 'mediapipe', 'trimesh', 'scipy'):
+        try:
+            meta[f'{module}_version'] = __import__(module).__version__
+        except Exception:
+            meta[f'{module}_version'] = None
+    return meta
+
+def compare_reports(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare two benchmark reports
+
+    Latency, stage time and peak memory regress when they grow by more than
+    the threshold; throughput regresses when it drops by more than it.
+
+    Args:
+        baseline: Baseline report
+        current: Current report
+        threshold: Relative tolerance (0.15 = 15%)
+
+    Returns:
+        List of regressions
+    """
+    regressions = []
+
+    def check(case_id, metric, old, new, higher_is_worse=True, floor=0.0):
+        if old is None or new is None or old <= floor:
+            return
+        change = (new - old) / old
+        if (change if higher_is_worse else -change) > threshold:
+            regressions.append({
+                'case': case_id, 'metric': metric,
+                'baseline': old, 'current': new, 'change': round(change, 3)
+            })
+
+    for case_id, old in baseline.get('cases', {}).items():
+        new = current.get('cases', {}).get(case_id)
+        if new is None or 'latency_ms' not in old or 'latency_ms' not in new:
+            continue
+        if old.get('success') and not new.get('success'):
+            regressions.append({'case': case_id, 'metric': 'success',
+                                'baseline': True, 'current': False, 'change': None})
+        check(case_id, 'latency_ms.median', old['latency_ms']['median'], new['latency_ms']['median'])
+        check(case_id, 'peak_rss_mb', old.get('peak_rss_mb'), new.get('peak_rss_mb'))
+        check(case_id, 'throughput.video_frames_per_s',
+              old['throughput']['video_frames_per_s'], new['throughput']['video_frames_per_s'],
+              higher_is_worse=False)
+        for stage, old_ms in old.get('stages_ms', {}).items():
+            check(case_id, f'stages_ms.{stage}', old_ms, new.get('stages_ms', {}).get(stage),
+                  floor=MIN_COMPARABLE_MS)
+
+    return regressions
+
+def print_regressions(regressions: List[Dict], threshold: float):
+    if not regressions:
+        print(f"No regressions beyond {threshold:.0%}")
+        return
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}:")
+    for r in regressions:
+        change = f"{r['change']:+.1%}" if r['change'] is not None else 'n/a'
+        print(f"  {r['case']:<40} {r['metric']:<32} {r['baseline']} -> {r['current']} ({change})")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Measulor end-to-end pipeline benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run benchmarks and write a JSON report')
+    run_parser.add_argument('--output', required=True, help='Report path')
+    run_parser.add_argument('--pipelines', default='2d,3d', help='Comma-separated: 2d,3d')
+    run_parser.add_argument('--repeats', type=int, default=3)
+    run_parser.add_argument('--warmup', type=int, default=1)
+    run_parser.add_argument('--max-frames', type=int, default=DEFAULT_MAX_FRAMES)
+    run_parser.add_argument('--height-cm', type=float, default=175.0)
+    run_parser.add_argument('--video-dir', default=os.path.join(tempfile.gettempdir(), 'measulor_bench_videos'))
+    run_parser.add_argument('--quick', action='store_true', help='Single small video only')
+    run_parser.add_argument('--verbose', action='store_true', help='Show pipeline output')
+    run_parser.add_argument('--compare', help='Baseline report to compare against')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run_benchmarks(
+            [p.strip() for p in args.pipelines.split(',') if p.strip()],
+            args.video_dir, args.repeats, args.warmup, args.max_frames,
+            args.height_cm, args.quick, args.verbose
+        )
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+        if not args.compare:
+            return 0
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        current = report
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+
+    regressions = compare_reports(baseline, current, args.threshold)
+    print_regressions(regressions, args.threshold)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Downstream Stage Replay Benchmark
+Replays recorded landmark sequences through the stages after pose detection
+(validation, measurement, aggregation, meshing, mesh measurement) with no
+model loaded, for fast and stable numbers on the numpy/Python parts.
+
+Usage:
+    python -m benchmarks.replay_benchmark run --output replay.json
+    python -m benchmarks.replay_benchmark run clip.npz --output replay.json --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from .landmark_recorder import arrays_to_poses, load_sequence, synthesize_sequence
+from .pipeline_benchmark import DEFAULT_THRESHOLD, benchmark_metadata, compare_reports, print_regressions
+
+DEFAULT_REPEATS = 20
+SYNTHETIC_FRAME_COUNTS = [30, 120]
+
+def time_call(func: Callable, repeats: int, warmup: int = 1) -> Dict:
+    """
+    Time a zero-argument callable
+
+    Pipeline stages print progress, so stdout is discarded while timing.
+
+    Returns:
+        {'median', 'min', 'p95'} in milliseconds
+    """
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            func()
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        'median': round(statistics.median(samples), 3),
+        'min': round(samples[0], 3),
+        'p95': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3)
+    }
+
+def _expect_success(result):
+    success, value = result
+    if not success:
+        raise RuntimeError(value)
+    return value
+
+def benchmark_2d_stages(sequence: Dict, reference_height_cm: Optional[float],
+                        repeats: int) -> Dict[str, Dict]:
+    """Time validation, measurement and aggregation on recorded 2D landmarks"""
+    from api.body_measurement_calculator import calculate_measurements_from_poses
+    from api.pose_quality_validator import filter_valid_poses, validate_poses_batch
+    from api.results_aggregator import aggregate_pipeline_results
+
+    poses = arrays_to_poses(sequence['landmarks_2d'], sequence['frame_shapes'])
+    video_info = {'filename': 'replay', 'duration': None, 'fps': None, 'frame_count': len(poses)}
+
+    validation = _expect_success(validate_poses_batch(poses))
+    valid_poses, _ = filter_valid_poses(poses)
+    measurements = _expect_success(calculate_measurements_from_poses(valid_poses, reference_height_cm))
+
+    return {
+        'validate_poses': time_call(lambda: validate_poses_batch(poses), repeats),
+        'filter_poses': time_call(lambda: filter_valid_poses(poses), repeats),
+        'measure': time_call(
+            lambda: calculate_measurements_from_poses(valid_poses, reference_height_cm), repeats),
+        'aggregate': time_call(
+            lambda: aggregate_pipeline_results(video_info, len(poses), poses, validation, measurements),
+            repeats)
+    }
+
+def benchmark_3d_stages(sequence: Dict, reference_height_cm: Optional[float],
+                        repeats: int) -> Dict[str, Dict]:
+    """Time meshing and mesh measurement on recorded 3D world landmarks"""
+    from api.mesh_3d_measurements import extract_measurements_from_mesh
+    from api.video_to_3d_reconstruction import VideoTo3DReconstructor
+
+    frame_landmarks_3d = sequence['frame_landmarks_3d'].astype(float)
+    landmarks = frame_landmarks_3d.mean(axis=0)
+    # No model is created: the reconstructor loads MediaPipe only on extract_3d_landmarks()
+    reconstructor = VideoTo3DReconstructor()
+
+    mesh = _expect_success(reconstructor.create_body_mesh(landmarks))
+    refined = _expect_success(reconstructor.refine_mesh(mesh.copy()))
+
+    return {
+        'create_mesh': time_call(lambda: reconstructor.create_body_mesh(landmarks), repeats),
+        'refine_mesh': time_call(lambda: reconstructor.refine_mesh(mesh.copy()), repeats),
+        'mesh_measure': time_call(
+            lambda: _expect_success(extract_measurements_from_mesh(
+                refined, landmarks, reference_height_cm, frame_landmarks_3d)),
+            repeats)
+    }
+
+def replay_case(sequence: Dict, reference_height_cm: Optional[float], repeats: int) -> Dict:
+    """
+    Benchmark every downstream stage the sequence has data for
+
+    Returns:
+        Case summary in the pipeline_benchmark report format
+    """
+    stages, errors = {}, []
+    suites = [('landmarks_2d', '2d', benchmark_2d_stages),
+              ('frame_landmarks_3d', '3d', benchmark_3d_stages)]
+
+    for key, label, suite in suites:
+        if key not in sequence:
+            continue
+        try:
+            stages.update(suite(sequence, reference_height_cm, repeats))
+        except ImportError as e:
+            errors.append(f"{label} stages skipped: {e}")
+        except Exception as e:
+            errors.append(f"{label} stages failed: {e}")
+
+    total_ms = sum(s['median'] for s in stages.values())
+    frames = len(sequence.get('landmarks_2d', sequence.get('frame_landmarks_3d', [])))
+    return {
+        'success': bool(stages) and not any('failed' in e for e in errors),
+        'error': '; '.join(errors) or None,
+        'runs': repeats,
+        'latency_ms': {'median': round(total_ms, 3)},
+        'throughput': {'video_frames_per_s': round(frames / total_ms * 1000, 2) if total_ms else None},
+        'frames': frames,
+        'stages_ms': {name: s['median'] for name, s in stages.items()},
+        'stage_timings_ms': stages,
+        'peak_rss_mb': None
+    }
+
+def load_cases(paths: List[str]) -> Dict[str, Dict]:
+    """Load recorded sequences, or synthesize the default set when none are given"""
+    if paths:
+        return {os.path.splitext(os.path.basename(p))[0]: load_sequence(p) for p in paths}
+    return {f'synthetic_{n}f': synthesize_sequence(n) for n in SYNTHETIC_FRAME_COUNTS}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Replay recorded landmarks through downstream stages')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run replay benchmarks and write a JSON report')
+    run_parser.add_argument('sequences', nargs='*', help='.npz files from landmark_recorder (default: synthetic)')
+    run_parser.add_argument('--output', required=True, help='Report path')
+    run_parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    run_parser.add_argument('--height-cm', type=float, default=175.0)
+    run_parser.add_argument('--compare', help='Baseline report to compare against')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    cases = {}
+    for name, sequence in load_cases(args.sequences).items():
+        cases[name] = replay_case(sequence, args.height_cm, args.repeats)
+        stages = ', '.join(f"{k} {v:.2f}" for k, v in cases[name]['stages_ms'].items())
+        print(f"{name:<24} {stages} (ms)", file=sys.stderr)
+        if cases[name]['error']:
+            print(f"{'':<24} {cases[name]['error']}", file=sys.stderr)
+
+    report = {'meta': benchmark_metadata(args.repeats, 1, 0, args.height_cm), 'cases': cases}
+    report['meta']['kind'] = 'replay'
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    regressions = compare_reports(baseline, report, args.threshold)
+    print_regressions(regressions, args.threshold)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
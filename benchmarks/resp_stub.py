@@ -0,0 +1,276 @@
+"""Redis Protocol Stand-in Server
+In-memory server speaking enough of the Redis protocol for
+api.job_queue.RedisJobQueue, so distributed worker mode can be exercised
+without a Redis install.
+
+Usage:
+    python -m benchmarks.resp_stub --port 6390
+    MEASULOR_QUEUE_URL=redis://127.0.0.1:6390/0 python -m api.worker
+"""
+
+import argparse
+import socketserver
+import sys
+import threading
+import time
+from typing import List, Optional
+
+DEFAULT_PORT = 6390
+
+class RespStubState:
+    """Keyspace shared by all connections (one lock, like Redis' single thread)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}      # key -> bytes | list | dict (hash) | dict (zset: member -> score)
+        self.types = {}     # key -> 'string' | 'list' | 'hash' | 'zset'
+        self.expires = {}   # key -> unix time
+
+    def _alive(self, key: bytes) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.delete(key)
+        return key in self.data
+
+    def delete(self, key: bytes) -> int:
+        self.expires.pop(key, None)
+        self.types.pop(key, None)
+        return 1 if self.data.pop(key, None) is not None else 0
+
+    def get(self, key: bytes, kind: str, create: bool = False):
+        if not self._alive(key):
+            if not create:
+                return None
+            self.data[key] = [] if kind == 'list' else ({} if kind in ('hash', 'zset') else b'')
+            self.types[key] = kind
+        if self.types[key] != kind:
+            raise ValueError('WRONGTYPE Operation against a key holding the wrong kind of value')
+        return self.data[key]
+
+    def drop_if_empty(self, key: bytes):
+        if key in self.data and self.types[key] != 'string' and not self.data[key]:
+            self.delete(key)
+
+def _score(value: bytes) -> float:
+    text = value.decode().lower()
+    if text in ('-inf', '+inf', 'inf'):
+        return float(text)
+    return float(text.lstrip('('))
+
+def execute(state: RespStubState, args: List[bytes]):
+    """
+    Run one command against the keyspace
+
+    Returns:
+        Reply value: str (status), int, bytes, None, list, or ValueError for errors
+    """
+    command = args[0].upper().decode()
+    a = args[1:]
+
+    if command in ('PING', 'AUTH', 'SELECT', 'FLUSHALL', 'FLUSHDB'):
+        if command.startswith('FLUSH'):
+            state.data.clear()
+            state.types.clear()
+            state.expires.clear()
+        return 'PONG' if command == 'PING' else 'OK'
+
+    # Strings
+    if command == 'GET':
+        return state.get(a[0], 'string')
+    if command == 'SET':
+        state.delete(a[0])
+        state.data[a[0]] = a[1]
+        state.types[a[0]] = 'string'
+        options = [o.upper() for o in a[2:]]
+        if b'EX' in options:
+            state.expires[a[0]] = time.time() + int(a[2 + options.index(b'EX') + 1])
+        return 'OK'
+    if command == 'APPEND':
+        state.data[a[0]] = state.get(a[0], 'string', create=True) + a[1]
+        return len(state.data[a[0]])
+    if command == 'STRLEN':
+        return len(state.get(a[0], 'string') or b'')
+    if command == 'GETRANGE':
+        value = state.get(a[0], 'string') or b''
+        start, end = int(a[1]), int(a[2])
+        end = len(value) + end if end < 0 else end
+        return value[start:end + 1]
+    if command == 'INCR':
+        value = int(state.get(a[0], 'string') or 0) + 1
+        if a[0] not in state.data:
+            state.types[a[0]] = 'string'
+        state.data[a[0]] = str(value).encode()
+        return value
+    if command == 'EXISTS':
+        return sum(1 for key in a if state._alive(key))
+    if command == 'DEL':
+        return sum(state.delete(key) if state._alive(key) else 0 for key in a)
+    if command == 'EXPIRE':
+        if not state._alive(a[0]):
+            return 0
+        state.expires[a[0]] = time.time() + int(a[1])
+        return 1
+
+    # Lists
+    if command in ('LPUSH', 'RPUSH'):
+        items = state.get(a[0], 'list', create=True)
+        for value in a[1:]:
+            if command == 'LPUSH':
+                items.insert(0, value)
+            else:
+                items.append(value)
+        return len(items)
+    if command == 'LLEN':
+        return len(state.get(a[0], 'list') or [])
+    if command == 'LRANGE':
+        items = state.get(a[0], 'list') or []
+        start, stop = int(a[1]), int(a[2])
+        stop = len(items) if stop == -1 else stop + 1
+        return list(items[start:stop])
+    if command == 'LREM':
+        items = state.get(a[0], 'list') or []
+        count, value = int(a[1]), a[2]
+        removed = 0
+        while value in items and (count == 0 or removed < abs(count)):
+            items.remove(value)
+            removed += 1
+        state.drop_if_empty(a[0])
+        return removed
+    if command == 'RPOPLPUSH':
+        source = state.get(a[0], 'list')
+        if not source:
+            return None
+        value = source.pop()
+        state.drop_if_empty(a[0])
+        state.get(a[1], 'list', create=True).insert(0, value)
+        return value
+
+    # Hashes
+    if command == 'HSET':
+        fields = state.get(a[0], 'hash', create=True)
+        added = 0
+        for i in range(1, len(a), 2):
+            added += a[i] not in fields
+            fields[a[i]] = a[i + 1]
+        return added
+    if command == 'HGET':
+        return (state.get(a[0], 'hash') or {}).get(a[1])
+    if command == 'HGETALL':
+        return [item for pair in (state.get(a[0], 'hash') or {}).items() for item in pair]
+    if command == 'HINCRBY':
+        fields = state.get(a[0], 'hash', create=True)
+        value = int(fields.get(a[1], b'0')) + int(a[2])
+        fields[a[1]] = str(value).encode()
+        return value
+
+    # Sorted sets
+    if command == 'ZADD':
+        members = state.get(a[0], 'zset', create=True)
+        added = 0
+        for i in range(1, len(a), 2):
+            added += a[i + 1] not in members
+            members[a[i + 1]] = _score(a[i])
+        return added
+    if command == 'ZREM':
+        members = state.get(a[0], 'zset') or {}
+        removed = sum(1 for member in a[1:] if members.pop(member, None) is not None)
+        state.drop_if_empty(a[0])
+        return removed
+    if command == 'ZSCORE':
+        score = (state.get(a[0], 'zset') or {}).get(a[1])
+        return None if score is None else repr(score).encode()
+    if command == 'ZCARD':
+        return len(state.get(a[0], 'zset') or {})
+    if command == 'ZRANGEBYSCORE':
+        low, high = _score(a[1]), _score(a[2])
+        members = state.get(a[0], 'zset') or {}
+        return [m for m, s in sorted(members.items(), key=lambda item: (item[1], item[0])) if low <= s <= high]
+
+    raise ValueError(f"ERR unknown command '{command}'")
+
+class RespStubHandler(socketserver.StreamRequestHandler):
+    """Parses RESP arrays of bulk strings and writes RESP replies"""
+
+    state = None
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()  # Inline command (redis-cli / telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _encode(self, reply) -> bytes:
+        if isinstance(reply, ValueError):
+            return b'-%s\r\n' % str(reply).encode()
+        if isinstance(reply, str):
+            return b'+%s\r\n' % reply.encode()
+        if isinstance(reply, int):
+            return b':%d\r\n' % reply
+        if reply is None:
+            return b'$-1\r\n'
+        if isinstance(reply, bytes):
+            return b'$%d\r\n%s\r\n' % (len(reply), reply)
+        return b'*%d\r\n' % len(reply) + b''.join(self._encode(item) for item in reply)
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if not args:
+                return
+            with self.state.lock:
+                try:
+                    reply = execute(self.state, args)
+                except (ValueError, IndexError) as e:
+                    reply = ValueError(str(e) if str(e).startswith(('ERR', 'WRONGTYPE')) else f'ERR {e}')
+            self.wfile.write(self._encode(reply))
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def start_stub_server(host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                      state: Optional[RespStubState] = None) -> socketserver.ThreadingTCPServer:
+    """
+    Start the stand-in in a background thread
+
+    Args:
+        host: Bind address
+        port: Port (0 picks a free one)
+        state: Keyspace to serve (a fresh one by default)
+
+    Returns:
+        Running server; call shutdown() to stop it
+    """
+    handler = type('ConfiguredRespStubHandler', (RespStubHandler,), {'state': state or RespStubState()})
+    server = _Server((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='resp-stub', daemon=True).start()
+    return server
+
+def stub_queue_url(server: socketserver.ThreadingTCPServer) -> str:
+    """Value for MEASULOR_QUEUE_URL that points at a running stand-in"""
+    host, port = server.server_address[:2]
+    return f'redis://{host}:{port}/0'
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='In-memory Redis protocol stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    server = start_stub_server(args.host, args.port)
+    print(f"RESP stand-in listening; set MEASULOR_QUEUE_URL={stub_queue_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Synthetic Benchmark Videos
+Renders deterministic videos of a simple human figure with cv2.VideoWriter
+"""
+
+import math
+import os
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+# Default benchmark matrix: (width, height) portrait phone resolutions, fps, seconds
+RESOLUTIONS = [(360, 640), (720, 1280), (1080, 1920)]
+FRAME_RATES = [15, 30]
+DURATIONS = [4.0, 10.0]  # extract_frames samples every 5th frame and needs >= 10
+
+SKIN = (120, 160, 210)
+SHIRT = (160, 80, 40)
+PANTS = (60, 50, 40)
+HAIR = (30, 30, 50)
+
+def render_figure_frame(width: int, height: int, t: float) -> np.ndarray:
+    """
+    Render one BGR frame of a standing figure swaying its arms
+
+    The figure is drawn in a 1000-unit tall coordinate system and scaled to
+    the frame height, so every resolution shows the same pose. MediaPipe
+    detects it reliably, which makes it usable for end-to-end benchmarks.
+
+    Args:
+        width: Frame width in pixels
+        height: Frame height in pixels
+        t: Time in seconds (drives the motion)
+
+    Returns:
+        Frame as (height, width, 3) uint8 array
+    """
+    gradient = np.linspace(180, 230, height, dtype=np.uint8)[:, None, None]
+    frame = np.ascontiguousarray(np.broadcast_to(gradient, (height, width, 3)))
+
+    scale = height / 1000.0
+    phase = math.sin(t * 2 * math.pi * 0.5)
+    center_x = width / 2 + phase * 20 * scale
+    sway = phase * 15
+
+    def point(x, y):
+        return (int(center_x + x * scale), int((y + 50) * scale))
+
+    def limb(start, end, thickness, color):
+        cv2.line(frame, point(*start), point(*end), color, max(1, int(thickness * scale)), cv2.LINE_AA)
+        cv2.circle(frame, point(*end), max(1, int(thickness * scale / 2)), color, -1, cv2.LINE_AA)
+
+    def ellipse(center, axes, color, start=0, end=360):
+        cv2.ellipse(frame, point(*center), (int(axes[0] * scale), int(axes[1] * scale)),
+                    0, start, end, color, -1, cv2.LINE_AA)
+
+    # Legs and feet
+    for side in (-1, 1):
+        limb((40 * side, 480), (50 * side, 700), 55, PANTS)
+        limb((50 * side, 700), (55 * side, 900), 45, PANTS)
+        ellipse((65 * side, 915), (40, 15), (30, 30, 30))
+
+    # Torso
+    torso = np.array([point(-100, 180), point(100, 180), point(80, 490), point(-80, 490)], np.int32)
+    cv2.fillConvexPoly(frame, torso, SHIRT, cv2.LINE_AA)
+
+    # Arms and hands
+    for side in (-1, 1):
+        elbow = ((150 + sway) * side, 340)
+        wrist = ((175 + sway) * side, 480)
+        limb((95 * side, 190), elbow, 40, SHIRT)
+        limb(elbow, wrist, 32, SKIN)
+        cv2.circle(frame, point((178 + sway) * side, 495), max(1, int(20 * scale)), SKIN, -1)
+
+    # Neck, head and face
+    limb((0, 120), (0, 180), 40, SKIN)
+    ellipse((0, 80), (55, 70), SKIN)
+    ellipse((0, 40), (58, 40), HAIR, 180, 360)
+    for eye_x in (-20, 20):
+        cv2.circle(frame, point(eye_x, 75), max(1, int(6 * scale)), (40, 30, 30), -1)
+    cv2.circle(frame, point(0, 95), max(1, int(5 * scale)), (100, 130, 180), -1)
+    cv2.ellipse(frame, point(0, 120), (int(18 * scale), int(6 * scale)), 0, 0, 180, (60, 60, 150), 2)
+
+    return frame
+
+def write_synthetic_video(path: str, width: int, height: int,
+                          fps: int, duration: float) -> Dict:
+    """
+    Write a deterministic synthetic video
+
+    Args:
+        path: Output path (.mp4)
+        width: Frame width
+        height: Frame height
+        fps: Frames per second
+        duration: Length in seconds
+
+    Returns:
+        Video description dictionary
+    """
+    frame_count = int(round(fps * duration))
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open video writer for {path}")
+
+    try:
+        for i in range(frame_count):
+            writer.write(render_figure_frame(width, height, i / fps))
+    finally:
+        writer.release()
+
+    return {
+        'path': path,
+        'width': width,
+        'height': height,
+        'fps': fps,
+        'duration': duration,
+        'frame_count': frame_count,
+        'file_size': os.path.getsize(path)
+    }
+
+def video_case_id(width: int, height: int, fps: int, duration: float) -> str:
+    """Stable identifier for a video configuration"""
+    return f"{width}x{height}@{fps}fps_{duration:g}s"
+
+def generate_video_matrix(output_dir: str,
+                          resolutions: List[Tuple[int, int]] = RESOLUTIONS,
+                          frame_rates: List[int] = FRAME_RATES,
+                          durations: List[float] = DURATIONS) -> List[Dict]:
+    """
+    Generate one video per (resolution, fps, duration) combination
+
+    Existing files are reused; rendering is deterministic.
+
+    Args:
+        output_dir: Directory for the videos
+        resolutions: (width, height) pairs
+        frame_rates: Frame rates
+        durations: Durations in seconds
+
+    Returns:
+        List of video descriptions with a 'case_id'
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    videos = []
+
+    for width, height in resolutions:
+        for fps in frame_rates:
+            for duration in durations:
+                case_id = video_case_id(width, height, fps, duration)
+                path = os.path.join(output_dir, case_id + '.mp4')
+                if os.path.exists(path):
+                    info = {
+                        'path': path, 'width': width, 'height': height, 'fps': fps,
+                        'duration': duration, 'frame_count': int(round(fps * duration)),
+                        'file_size': os.path.getsize(path)
+                    }
+                else:
+                    info = write_synthetic_video(path, width, height, fps, duration)
+                info['case_id'] = case_id
+                videos.append(info)
+
+    return videos
@@ -0,0 +1,36 @@
+"""Gunicorn configuration for the Measulor API
+
+The app is imported once in the master (preload_app) so library code and
+module state are shared copy-on-write between workers. MediaPipe graphs own
+threads that do not survive fork, so each worker creates and warms its own
+detectors in post_fork; /api/health returns 503 until that finishes.
+
+Set the worker count with WEB_CONCURRENCY rather than -w: BLAS thread pools
+are sized from it here, before the app (and numpy) is imported.
+"""
+
+import os
+
+from api.thread_governor import apply_worker_limits, configure_blas_env, worker_count
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = worker_count()
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = True
+
+# Must run before preload imports numpy/scipy in the master
+configure_blas_env()
+
+def on_starting(server):
+    # Counters in MEASULOR_METRICS_DIR restart from zero with the server
+    from api.metrics import clear_metrics_dir
+    clear_metrics_dir()
+
+def post_fork(server, worker):
+    config = apply_worker_limits(worker.age - 1)
+    server.log.info(f"Worker {worker.pid}: {config['threads_per_worker']} threads "
+                    f"({config['cores']} cores / {config['workers']} workers), "
+                    f"opencv={config['opencv_threads']} pinned={config['pinned_cores']}")
+
+    from api.warmup import start_warmup
+    start_warmup()
@@ -4,4 +4,6 @@
 pip install -r requirements-full.txt
 
 # Start gunicorn server for the measurement API
-gunicorn --bind=0.0.0.0:8000 --timeout 600 --workers 2 api.measure:app
+# (worker count via WEB_CONCURRENCY so thread pools are sized to match)
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-2}
+gunicorn -c gunicorn.conf.py --bind=0.0.0.0:8000 --timeout 600 api.measure:app
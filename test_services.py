@@ -0,0 +1,728 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from api import resumable_upload
+from api.admission import AdmissionController, AdmissionPolicy, AdmissionRejected, shared_worker_slots
+from api.job_queue import SQLiteJobQueue
+from api.result_cache import ResultCache
+from api.resumable_upload import ResumableUploadStore, UploadError
+
+class ServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='measulor-test-')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class TestSQLiteJobQueue(ServiceTestCase):
+    def open_queue(self, **kwargs):
+        kwargs.setdefault('retry_delay', 0)
+        return SQLiteJobQueue(os.path.join(self.directory, 'queue.db'), **kwargs)
+
+    def test_lease_extend_ack(self):
+        queue = self.open_queue()
+        queue.enqueue('job1', {'extension': 'mp4'})
+
+        lease = queue.lease()
+        self.assertEqual((lease.job_id, lease.attempts, lease.payload), ('job1', 1, {'extension': 'mp4'}))
+        self.assertIsNone(queue.lease())
+        self.assertTrue(queue.extend(lease))
+        self.assertTrue(queue.ack(lease))
+        self.assertFalse(queue.ack(lease))
+        self.assertEqual(queue.stats(), {'ready': 0, 'leased': 0, 'delayed': 0, 'dead': 0})
+
+    def test_nack_retries_then_dead_letters(self):
+        queue = self.open_queue(max_attempts=2)
+        queue.enqueue('job1', {})
+
+        self.assertEqual(queue.nack(queue.lease(), 'first'), 'retry')
+        lease = queue.lease()
+        self.assertEqual(lease.attempts, 2)
+        self.assertEqual(queue.nack(lease, 'second'), 'dead')
+        self.assertIsNone(queue.lease())
+        self.assertEqual(queue.stats()['dead'], 1)
+
+    def test_expired_lease_is_redelivered_and_old_lease_lost(self):
+        queue = self.open_queue()
+        queue.enqueue('job1', {})
+
+        stale = queue.lease(visibility_timeout=0.01)
+        time.sleep(0.05)
+        fresh = queue.lease()
+        self.assertEqual((fresh.job_id, fresh.attempts), ('job1', 2))
+        self.assertFalse(queue.extend(stale))
+        self.assertEqual(queue.nack(stale, 'late'), 'lost')
+        self.assertTrue(queue.ack(fresh))
+
+    def test_lease_timeout_past_max_attempts_fails_job(self):
+        queue = self.open_queue(max_attempts=1)
+        queue.save_record('job1', {'job_id': 'job1', 'status': 'running'}, ttl=60)
+        queue.save_blob('job1', b'video')
+        queue.enqueue('job1', {})
+
+        queue.lease(visibility_timeout=0.01)
+        time.sleep(0.05)
+        self.assertIsNone(queue.lease())
+        self.assertEqual(queue.load_record('job1')['status'], 'failed')
+        self.assertIsNone(queue.load_blob('job1'))
+        self.assertEqual(queue.stats()['dead'], 1)
+
+    def test_blob_files_round_trip(self):
+        queue = self.open_queue()
+        upload = os.path.join(self.directory, 'upload.mp4')
+        with open(upload, 'wb') as f:
+            f.write(b'video' * 1000)
+        queue.save_blob_file('job1', upload)
+        self.assertFalse(os.path.exists(upload))
+
+        copy = os.path.join(self.directory, 'copy.mp4')
+        self.assertTrue(queue.load_blob_file('job1', copy))
+        with open(copy, 'rb') as f:
+            self.assertEqual(f.read(), b'video' * 1000)
+        queue.delete_blob('job1')
+        self.assertFalse(queue.load_blob_file('job1', copy))
+
+    def test_purge_expired_removes_records_and_blobs(self):
+        queue = self.open_queue()
+        queue.save_record('old', {'status': 'succeeded'}, ttl=-1)
+        queue.save_blob('old', b'video', ttl=-1)
+        queue.save_record('new', {'status': 'queued'}, ttl=60)
+
+        self.assertEqual(queue.purge_expired(), 2)
+        self.assertIsNotNone(queue.load_record('new'))
+
+class TestResumableUpload(ServiceTestCase):
+    def test_offset_conflict_reports_current_offset(self):
+        store = ResumableUploadStore(self.directory)
+        upload_id = store.create('clip.mp4', 10)['upload_id']
+        store.append(upload_id, 0, io.BytesIO(b'abcd'), 4)
+
+        with self.assertRaises(UploadError) as raised:
+            store.append(upload_id, 0, io.BytesIO(b'abcd'), 4)
+        self.assertEqual((raised.exception.status, raised.exception.offset), (409, 4))
+
+        with self.assertRaises(UploadError) as raised:
+            store.finalize(upload_id)
+        self.assertEqual(raised.exception.status, 409)
+
+        store.append(upload_id, 4, io.BytesIO(b'efghij'), 6)
+        video_path, extension, _ = store.finalize(upload_id)
+        with open(video_path, 'rb') as f:
+            self.assertEqual(f.read(), b'abcdefghij')
+        self.assertEqual(extension, 'mp4')
+
+    @unittest.skipIf(resumable_upload.fcntl is None, 'needs flock')
+    def test_concurrent_retries_append_once(self):
+        store = ResumableUploadStore(self.directory)
+        upload_id = store.create('clip.mp4', 10)['upload_id']
+        store.append(upload_id, 0, io.BytesIO(b'abcde'), 5)
+
+        # Both retries open the file before either locks it; the second
+        # takes the lock only after the first has appended
+        real_flock = resumable_upload.fcntl.flock
+        opened = threading.Barrier(2, timeout=5)
+        first_done = threading.Event()
+        results = {}
+
+        def ordered_flock(fd, operation):
+            opened.wait()
+            if threading.current_thread().name == 'second':
+                first_done.wait(5)
+            return real_flock(fd, operation)
+
+        def retry():
+            name = threading.current_thread().name
+            try:
+                results[name] = store.append(upload_id, 5, io.BytesIO(b'fghij'), 5)['offset']
+            except UploadError as e:
+                results[name] = (e.status, e.offset)
+            finally:
+                if name == 'first':
+                    first_done.set()
+
+        with mock.patch.object(resumable_upload.fcntl, 'flock', ordered_flock):
+            threads = [threading.Thread(target=retry, name=name) for name in ('first', 'second')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results, {'first': 10, 'second': (409, 10)})
+        video_path, _, _ = store.finalize(upload_id)
+        with open(video_path, 'rb') as f:
+            self.assertEqual(f.read(), b'abcdefghij')
+
+    def test_restore_undoes_finalize(self):
+        store = ResumableUploadStore(self.directory)
+        upload_id = store.create('clip.mov', 3)['upload_id']
+        store.append(upload_id, 0, io.BytesIO(b'abc'), 3)
+        video_path, _, digest = store.finalize(upload_id)
+        self.assertIsNone(store.get(upload_id))
+
+        store.restore(upload_id, video_path)
+        self.assertTrue(store.get(upload_id)['complete'])
+        self.assertFalse(os.path.exists(video_path))
+        self.assertEqual(store.finalize(upload_id)[1:], ('mov', digest))
+
+class TestAdmission(ServiceTestCase):
+    def test_rejects_when_queue_full(self):
+        controller = AdmissionController('test_full', AdmissionPolicy(1, 0, 1.0), self.directory, shared_slots=4)
+        slot = controller.acquire()
+        with self.assertRaises(AdmissionRejected) as raised:
+            controller.acquire()
+        self.assertEqual(raised.exception.reason, 'queue_full')
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+
+        controller.release(slot, 0.1)
+        controller.release(controller.acquire())
+
+    def test_check_capacity_probes_without_holding(self):
+        controller = AdmissionController('test_capacity', AdmissionPolicy(1, 1, 0.1), self.directory, shared_slots=4)
+        controller.check_capacity()
+        slot = controller.acquire()
+        controller.check_capacity()  # The wait place is still free
+
+        waiter = controller._try_lock('wait')
+        with self.assertRaises(AdmissionRejected) as raised:
+            controller.check_capacity()
+        self.assertEqual(raised.exception.reason, 'saturated')
+        controller._unlock('wait', waiter)
+        controller.release(slot)
+
+    def test_rejects_after_wait_deadline(self):
+        controller = AdmissionController('test_wait', AdmissionPolicy(1, 1, 0.1), self.directory, shared_slots=4)
+        slot = controller.acquire()
+        with self.assertRaises(AdmissionRejected) as raised:
+            controller.acquire()
+        self.assertEqual(raised.exception.reason, 'timeout')
+        controller.release(slot)
+
+    def test_heavy_classes_leave_workers_for_light_requests(self):
+        # 4 workers: each class alone could fill them (2 running + 2 waiting)
+        workers = 4
+        controllers = [AdmissionController(name, AdmissionPolicy(2, 2, 0.5), self.directory,
+                                           shared_slots=shared_worker_slots(workers))
+                       for name in ('video_upload', 'video_frames', 'measure_batch')]
+        release = threading.Event()
+        occupied = []
+        rejected = []
+
+        def heavy_request(controller):
+            try:
+                handle = controller.acquire()
+            except AdmissionRejected as e:
+                rejected.append(e.reason)
+                return
+            occupied.append(controller.endpoint)
+            release.wait(5)
+            controller.release(handle)
+
+        threads = [threading.Thread(target=heavy_request, args=(controller,))
+                   for controller in controllers for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        busy = len(threads) - len(rejected)  # Running or still waiting
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        # License and image requests still have half the workers
+        self.assertLessEqual(busy, workers - 2)
+        self.assertIn('workers_busy', rejected)
+
+def chunked_post(client, path, body, content_type):
+    """POST without Content-Length, as gunicorn hands chunked bodies to the app"""
+    return client.post(path, input_stream=io.BytesIO(body),
+                       headers={'Content-Type': content_type, 'Transfer-Encoding': 'chunked'},
+                       environ_overrides={'wsgi.input_terminated': True})
+
+def png_bytes(size=(64, 128)):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (120, 80, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+class TestPhotoUploadLimit(unittest.TestCase):
+    def setUp(self):
+        from api.index import app
+        from api.video_upload import MAX_IMAGE_UPLOAD_BYTES
+        self.client = app.test_client()
+        self.oversized = b'\xff' * (MAX_IMAGE_UPLOAD_BYTES + 1024)
+
+    def test_chunked_photo_within_limit(self):
+        response = chunked_post(self.client, '/api/process', png_bytes(), 'image/png')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json['success'])
+
+    def test_oversized_chunked_bodies_are_rejected(self):
+        bodies = {
+            'image/jpeg': self.oversized,
+            'multipart/form-data; boundary=B': (b'--B\r\nContent-Disposition: form-data; name="image"; '
+                                                b'filename="a.jpg"\r\n\r\n' + self.oversized + b'\r\n--B--\r\n'),
+            'application/json': b'{"image": "' + b'A' * len(self.oversized) + b'"}'
+        }
+        for content_type, body in bodies.items():
+            with self.subTest(content_type=content_type):
+                self.assertEqual(chunked_post(self.client, '/api/process', body, content_type).status_code, 413)
+
+class FillerStream(io.RawIOBase):
+    """Readable body of `size` filler bytes, without holding them in memory"""
+
+    def __init__(self, prefix: bytes, size: int):
+        self.prefix = prefix
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.prefix:
+            count = min(len(buffer), len(self.prefix))
+            buffer[:count], self.prefix = self.prefix[:count], self.prefix[count:]
+            return count
+        count = min(len(buffer), self.remaining)
+        buffer[:count] = b'\xff' * count
+        self.remaining -= count
+        return count
+
+class TestBatchLimits(unittest.TestCase):
+    def test_oversized_chunked_batch_is_rejected_and_releases_its_slot(self):
+        from api.admission import get_controller
+        from api.batch_measure import BATCH_MAX_BYTES
+        from api.measure import app
+
+        part = b'--B\r\nContent-Disposition: form-data; name="images"; filename="a.jpg"\r\n\r\n'
+        from api.video_upload import UploadRequest
+
+        body = io.BufferedReader(FillerStream(part, BATCH_MAX_BYTES + 1024))
+        # Stop at 1 MB rather than stream BATCH_MAX_BYTES through the parser
+        with mock.patch.object(UploadRequest, 'max_content_length', new_callable=mock.PropertyMock,
+                               return_value=1024 * 1024):
+            response = app.test_client().post(
+                '/api/measure/batch', headers={'Content-Type': 'multipart/form-data; boundary=B'},
+                environ_overrides={'wsgi.input': body, 'wsgi.input_terminated': True, 'CONTENT_LENGTH': '',
+                                   'HTTP_TRANSFER_ENCODING': 'chunked'})
+        self.assertEqual(response.status_code, 413)
+        get_controller('measure_batch').check_capacity()
+
+    def test_default_concurrency_stays_within_idle_detectors(self):
+        from api import batch_measure
+        from api.detector_pool import MAX_IDLE_PER_PROFILE
+
+        with mock.patch.object(batch_measure, 'BATCH_CONCURRENCY', 0), \
+                mock.patch.object(batch_measure, 'threads_per_worker', return_value=16):
+            self.assertEqual(batch_measure.batch_concurrency(), MAX_IDLE_PER_PROFILE)
+        with mock.patch.object(batch_measure, 'BATCH_CONCURRENCY', 0), \
+                mock.patch.object(batch_measure, 'threads_per_worker', return_value=1):
+            self.assertEqual(batch_measure.batch_concurrency(), 1)
+
+class TestResultCacheSingleFlight(ServiceTestCase):
+    def test_concurrent_misses_compute_once(self):
+        cache = ResultCache(directory=self.directory)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        outcomes = []
+        threads = [threading.Thread(target=lambda: outcomes.append(cache.get_or_compute('k' * 64, compute)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(outcome for _, outcome in outcomes), ['coalesced'] * 3 + ['miss'])
+        self.assertTrue(all(value == {'value': 42} for value, _ in outcomes))
+
+    def test_uncacheable_results_are_not_stored(self):
+        cache = ResultCache(directory=None)
+        cache.get_or_compute('k' * 64, lambda: {'success': False}, cacheable=lambda r: r['success'])
+        self.assertEqual(cache.get('k' * 64), (None, None))
+
+class TestDegradedFrameSampling(ServiceTestCase):
+    def write_clip(self, frame_count):
+        import cv2
+        import numpy as np
+
+        path = os.path.join(self.directory, 'clip.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 64))
+        for index in range(frame_count):
+            # Encode the frame number in the brightness so samples can be located
+            writer.write(np.full((64, 64, 3), index, dtype=np.uint8))
+        writer.release()
+        return path
+
+    def sampled_span(self, path, plan):
+        from api.frame_extractor import DEFAULT_FRAME_INTERVAL, extract_frames
+
+        success, frames = extract_frames(path, frame_interval=plan.frame_interval(DEFAULT_FRAME_INTERVAL),
+                                         max_frames=plan.max_frames)
+        self.assertTrue(success)
+        self.assertEqual(len(frames), plan.max_frames)
+        return round(float(frames[-1].mean()))
+
+    def test_degraded_plan_covers_the_full_clip(self):
+        from api.degradation import plan_degradation
+        from api.frame_extractor import DEFAULT_FRAME_INTERVAL
+
+        path = self.write_clip(200)
+        full = plan_degradation('test', 30, 'video', signal={'cpu': 0.0, 'queue': None, 'load': 0.0})
+        degraded = plan_degradation('test', 30, 'video', signal={'cpu': 3.0, 'queue': None, 'load': 3.0})
+        self.assertLess(degraded.max_frames, full.max_frames)
+
+        # The sparser sample ends within one of its own steps of the full-quality one
+        full_span = self.sampled_span(path, full)
+        step = degraded.frame_interval(DEFAULT_FRAME_INTERVAL)
+        self.assertGreaterEqual(self.sampled_span(path, degraded), full_span - step)
+
+class TestMetricsAggregation(ServiceTestCase):
+    def test_workers_are_merged(self):
+        import json
+        from api.metrics import MetricsRegistry, aggregate
+
+        # A live worker (this process) and one that has exited
+        for pid in (os.getpid(), 999999999):
+            worker = MetricsRegistry()
+            worker.counter('requests_total', 'Requests', ('status',)).inc(2, status='200')
+            worker.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0)).observe(0.5)
+            worker.gauge('level', 'Level').set(1)
+            with open(os.path.join(self.directory, f'metrics_{pid}.json'), 'w') as f:
+                json.dump(worker.snapshot(), f)
+
+        text = aggregate(self.directory).render()
+        self.assertIn('requests_total{status="200"} 4.0', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('latency_seconds_count 2', text)
+        # Exited workers keep their totals but not their gauges
+        self.assertIn(f'level{{pid="{os.getpid()}"}}', text)
+        self.assertNotIn('pid="999999999"', text)
+
+class TestLocalJobSlots(ServiceTestCase):
+    def test_jobs_share_the_box_slots(self):
+        from api import video_jobs
+
+        store = video_jobs.JobStore(self.directory)
+        first = store.create('3d')
+        second = store.create('3d')
+        with video_jobs.job_slot(store, first['job_id'], slots=1) as acquired:
+            self.assertTrue(acquired)
+            # A job that stops being queued while it waits gives up its turn
+            store.update(second['job_id'], status='failed')
+            with mock.patch.object(video_jobs, 'SLOT_TOUCH_INTERVAL', 0), \
+                    mock.patch.object(video_jobs, 'SLOT_POLL_INTERVAL', 0.01):
+                with video_jobs.job_slot(store, second['job_id'], slots=1) as waited:
+                    self.assertFalse(waited)
+        with video_jobs.job_slot(store, second['job_id'], slots=1) as acquired:
+            self.assertTrue(acquired)
+
+class TestBootstrapConfidence(unittest.TestCase):
+    def matrix(self):
+        import numpy as np
+        rng = np.random.default_rng(7)
+        return rng.normal([40.0, 90.0], [1.5, 3.0], size=(30, 2))
+
+    def test_interval_contains_the_estimate(self):
+        from api.bootstrap_confidence import bootstrap_confidence_intervals
+
+        intervals = bootstrap_confidence_intervals(self.matrix(), ['shoulder', 'leg'])['intervals']
+        for interval in intervals.values():
+            self.assertLessEqual(interval['lower'], interval['mean'])
+            self.assertLessEqual(interval['mean'], interval['upper'])
+
+    def test_resamples_are_clamped(self):
+        from api.bootstrap_confidence import MAX_RESAMPLES, MIN_RESAMPLES, resample_count
+
+        self.assertEqual((MIN_RESAMPLES, MAX_RESAMPLES), (100, 1000))
+        self.assertEqual(resample_count(2, 1), MAX_RESAMPLES)
+        self.assertEqual(resample_count(10000, 50), MIN_RESAMPLES)
+
+    def test_same_seed_same_intervals(self):
+        from api.bootstrap_confidence import bootstrap_confidence_intervals
+
+        matrix = self.matrix()
+        first = bootstrap_confidence_intervals(matrix, ['shoulder', 'leg'], seed=3)
+        self.assertEqual(first, bootstrap_confidence_intervals(matrix, ['shoulder', 'leg'], seed=3))
+        self.assertNotEqual(first, bootstrap_confidence_intervals(matrix, ['shoulder', 'leg'], seed=4))
+
+    def test_missing_values_keep_their_frames(self):
+        from api.bootstrap_confidence import bootstrap_confidence_intervals, measurement_matrix
+
+        frames = [{'shoulder': 40.0}] + [{'shoulder': 40.0 + i % 3, 'leg': 90.0 + i % 5} for i in range(1, 20)]
+        matrix = measurement_matrix(frames, ['shoulder', 'leg'])
+        self.assertEqual(matrix.shape, (20, 2))
+        intervals = bootstrap_confidence_intervals(matrix, ['shoulder', 'leg'])['intervals']
+        # Each interval is centred on the mean over the frames that have the value
+        self.assertAlmostEqual(intervals['shoulder']['mean'], sum(f['shoulder'] for f in frames) / 20)
+        self.assertAlmostEqual(intervals['leg']['mean'], sum(f['leg'] for f in frames[1:]) / 19)
+
+    def test_degenerate_frames_are_masked(self):
+        import numpy as np
+        import trimesh
+        from api.mesh_3d_measurements import Mesh3DMeasurementExtractor
+
+        sets = np.zeros((3, 33, 3))
+        sets[:, 0, 1] = [1.7, 0.0, np.nan]  # Nose; ankles stay at 0
+        extractor = Mesh3DMeasurementExtractor(trimesh.creation.box(), sets[0])
+        self.assertEqual(extractor.measurable_sets(sets).tolist(), [True, False, False])
+        matrix, _ = extractor.calculate_landmark_measurements(sets, 1.7)
+        self.assertTrue(np.isfinite(matrix[0]).all())
+        self.assertTrue(np.isnan(matrix[1:]).all())
+
+class TestStagePeakRss(unittest.TestCase):
+    def test_overlapping_stages_keep_the_process_peak(self):
+        from api import stage_monitor
+
+        with mock.patch.object(stage_monitor, 'reset_peak_rss', return_value=True) as reset:
+            alone = stage_monitor.StageMonitor('test')
+            with alone.stage('extract'):
+                pass
+            self.assertEqual(reset.call_count, 1)
+            self.assertTrue(alone.stages[0]['peak_is_per_stage'])
+
+            # A stage starting inside another (a batch thread) must not reset its peak
+            outer, inner = stage_monitor.StageMonitor('test'), stage_monitor.StageMonitor('test')
+            with outer.stage('detect'):
+                with inner.stage('detect'):
+                    pass
+            self.assertEqual(reset.call_count, 2)
+            self.assertFalse(outer.stages[0]['peak_is_per_stage'])
+            self.assertFalse(inner.stages[0]['peak_is_per_stage'])
+
+class TestCancellation(unittest.TestCase):
+    def test_deadline_and_first_reason(self):
+        from api.cancellation import CancellationToken, OperationCancelled
+
+        token = CancellationToken(0.05)
+        token.check()
+        time.sleep(0.06)
+        with self.assertRaises(OperationCancelled) as raised:
+            token.check()
+        self.assertEqual(raised.exception.reason, 'deadline exceeded')
+        token.cancel('client disconnected')
+        self.assertEqual(token.reason, 'deadline exceeded')
+
+    def test_disconnect_probe_trips_the_token(self):
+        from api.cancellation import CancellationToken
+
+        gone = []
+        token = CancellationToken(None, disconnected=lambda: bool(gone))
+        self.assertFalse(token.cancelled)
+        self.assertIsNone(token.remaining())
+        gone.append(True)
+        token._next_probe = 0.0
+        self.assertTrue(token.cancelled)
+        self.assertEqual(token.reason, 'client disconnected')
+
+    def test_request_deadline_counts_from_arrival(self):
+        from flask import Flask, jsonify
+        from api.cancellation import init_request_deadline, request_remaining, request_token
+
+        app = Flask(__name__)
+        init_request_deadline(app)
+
+        @app.route('/slow')
+        def slow():
+            # Time spent queued before the token exists still counts
+            time.sleep(0.15)
+            return jsonify(remaining=request_remaining(0.1), cancelled=request_token(0.1).cancelled)
+
+        body = app.test_client().get('/slow').get_json()
+        self.assertEqual(body, {'remaining': 0.0, 'cancelled': True})
+
+def multipart_body(field, filename, data, boundary='measulorboundary'):
+    return (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n').encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+
+class TestStreamedUploads(unittest.TestCase):
+    def setUp(self):
+        from flask import Flask, jsonify, request
+        from api.video_upload import UploadRequest, ingest_file, streamed_uploads, upload_too_large_response
+        from werkzeug.exceptions import RequestEntityTooLarge
+
+        app = Flask(__name__)
+        app.request_class = UploadRequest
+
+        @app.route('/upload', methods=['POST'])
+        @streamed_uploads(max_bytes=4096)
+        def upload():
+            try:
+                ok, scratch = ingest_file(request.files['video'])
+            except RequestEntityTooLarge:
+                return upload_too_large_response(4096)
+            size, digest = scratch.size, scratch.sha256
+            scratch.close()
+            return jsonify(size=size, sha256=digest)
+
+        self.client = app.test_client()
+
+    def scratch_files(self):
+        from api.video_upload import SCRATCH_DIR
+        return {name for name in os.listdir(SCRATCH_DIR) if name.startswith('measulor_upload_')}
+
+    def test_upload_is_hashed_while_streaming(self):
+        import hashlib
+        data = os.urandom(3000)
+        response = chunked_post(self.client, '/upload', multipart_body('video', 'clip.mp4', data),
+                                'multipart/form-data; boundary=measulorboundary')
+        self.assertEqual(response.json, {'size': 3000, 'sha256': hashlib.sha256(data).hexdigest()})
+
+    def test_chunked_upload_over_the_cap_is_rejected(self):
+        before = self.scratch_files()
+        response = chunked_post(self.client, '/upload', multipart_body('video', 'clip.mp4', b'x' * 20000),
+                                'multipart/form-data; boundary=measulorboundary')
+        self.assertEqual(response.status_code, 413)
+        # The partial scratch file is removed with the request
+        self.assertEqual(self.scratch_files(), before)
+
+    def test_declared_length_over_the_cap_is_rejected_unread(self):
+        response = self.client.post('/upload', data=multipart_body('video', 'clip.mp4', b'x' * 200000),
+                                    content_type='multipart/form-data; boundary=measulorboundary')
+        self.assertEqual(response.status_code, 413)
+
+class TestMeasureFramesValidation(unittest.TestCase):
+    def setUp(self):
+        from api.index import app
+        self.client = app.test_client()
+
+    def post(self, count=12, frame=None, **fields):
+        frame = frame if frame is not None else png_bytes()
+        fields['frames'] = [(io.BytesIO(frame), f'{i}.png') for i in range(count)]
+        return self.client.post('/api/measure-frames', data=fields, content_type='multipart/form-data')
+
+    def assertRejected(self, response, message):
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(message, response.json['message'])
+
+    def test_invalid_uploads_are_rejected(self):
+        from api.frame_extractor import MIN_FRAMES_REQUIRED
+        from api.video_upload import MAX_UPLOADED_FRAMES
+
+        self.assertRejected(self.post(count=0), 'No frames')
+        self.assertRejected(self.post(count=MAX_UPLOADED_FRAMES + 1, frame=b'x'), 'Too many frames')
+        self.assertRejected(self.post(pipeline='4d'), 'Unknown pipeline')
+        self.assertRejected(self.post(timestamps='[0.0, 0.1]'), 'one entry per frame')
+        self.assertRejected(self.post(timestamps='{"a": 1}'), 'one entry per frame')
+        self.assertRejected(self.post(frame=b'not an image'), 'JPEG or PNG')
+        self.assertRejected(self.post(count=MIN_FRAMES_REQUIRED - 1), 'Too few frames')
+
+    def test_oversized_chunked_upload_is_rejected(self):
+        from api.video_upload import UploadRequest
+
+        part = b'--B\r\nContent-Disposition: form-data; name="frames"; filename="a.png"\r\n\r\n'
+        body = io.BufferedReader(FillerStream(part, 2 * 1024 * 1024))
+        with mock.patch.object(UploadRequest, 'max_content_length', new_callable=mock.PropertyMock,
+                               return_value=1024 * 1024):
+            response = self.client.post(
+                '/api/measure-frames', headers={'Content-Type': 'multipart/form-data; boundary=B'},
+                environ_overrides={'wsgi.input': body, 'wsgi.input_terminated': True, 'CONTENT_LENGTH': '',
+                                   'HTTP_TRANSFER_ENCODING': 'chunked'})
+        self.assertEqual(response.status_code, 413)
+
+class TestImageIngest(unittest.TestCase):
+    def encoded(self, image, format, **options):
+        buffer = io.BytesIO()
+        image.save(buffer, format, **options)
+        return buffer.getvalue()
+
+    def test_large_jpeg_is_decoded_reduced(self):
+        from PIL import Image
+        from api.image_ingest import ingest_image
+
+        ingested = ingest_image(self.encoded(Image.new('RGB', (4000, 3000), (90, 60, 30)), 'JPEG'), 1280)
+        self.assertEqual(ingested.original_size, (4000, 3000))
+        # DCT scaling never decodes below the requested size
+        self.assertGreaterEqual(max(ingested.decoded_size), 1280)
+        self.assertLess(max(ingested.decoded_size), 4000)
+        self.assertEqual(ingested.rgb.dtype.name, 'uint8')
+        self.assertTrue(ingested.rgb.flags['C_CONTIGUOUS'])
+        self.assertAlmostEqual(ingested.scale, 4000 / ingested.decoded_size[0])
+
+    def test_exif_rotation_swaps_the_original_size(self):
+        from PIL import Image
+        from api.image_ingest import ingest_image
+
+        image = Image.new('RGB', (400, 300))
+        exif = image.getexif()
+        exif[0x0112] = 6
+        ingested = ingest_image(self.encoded(image, 'JPEG', exif=exif))
+        self.assertEqual(ingested.original_size, (300, 400))
+        self.assertEqual(ingested.decoded_size, (300, 400))
+
+    def test_palette_and_bilevel_images_are_reduced(self):
+        from PIL import Image
+        from api.image_ingest import ingest_image
+
+        for mode in ('P', '1', 'RGBA', 'LA'):
+            with self.subTest(mode=mode):
+                ingested = ingest_image(self.encoded(Image.new(mode, (3000, 1500)), 'PNG'), 1000)
+                self.assertEqual(ingested.decoded_size, (1000, 500))
+                self.assertEqual(ingested.rgb.shape, (500, 1000, 3))
+
+class FakePose:
+    """Pose detector returning scripted landmarks and recording its inputs"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.inputs = []
+
+    def process(self, rgb):
+        from types import SimpleNamespace
+        self.inputs.append(rgb.shape)
+        points = self.results.pop(0)
+        landmarks = None
+        if points is not None:
+            landmarks = SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=0.1) for x, y in points])
+        return SimpleNamespace(pose_landmarks=landmarks)
+
+class TestPersonCrop(unittest.TestCase):
+    def detect(self, pose, rgb):
+        from contextlib import contextmanager
+        from api import person_crop
+
+        @contextmanager
+        def borrowed(profile):
+            yield pose
+
+        with mock.patch.object(person_crop, 'pooled_detector', borrowed):
+            return person_crop.detect_pose(rgb, two_stage=True)
+
+    def test_small_subject_is_refined_on_a_crop(self):
+        import numpy as np
+
+        small = [(0.45, 0.3), (0.55, 0.7)]
+        pose = FakePose(small, [(0.0, 0.0), (1.0, 1.0)])
+        landmarks = self.detect(pose, np.zeros((800, 1000, 3), dtype=np.uint8))
+        # Second pass ran on the padded person box, not the whole image
+        self.assertEqual(len(pose.inputs), 2)
+        crop_h, crop_w = pose.inputs[1][:2]
+        self.assertLess(crop_w * crop_h, 0.5 * 800 * 1000)
+        # Crop corners map back to the padded box corners in full-image coordinates
+        first, last = landmarks.landmark
+        self.assertEqual([round(v, 2) for v in (first.x, first.y, last.x, last.y)], [0.43, 0.18, 0.57, 0.78])
+        self.assertAlmostEqual(first.z, 0.1 * crop_w / 1000)
+
+    def test_large_subject_and_crop_miss_keep_the_first_pass(self):
+        import numpy as np
+
+        rgb = np.zeros((800, 1000, 3), dtype=np.uint8)
+        large = FakePose([(0.05, 0.05), (0.95, 0.95)])
+        self.assertEqual(self.detect(large, rgb).landmark[0].x, 0.05)
+        self.assertEqual(len(large.inputs), 1)
+
+        miss = FakePose([(0.45, 0.3), (0.55, 0.7)], None)
+        self.assertEqual(self.detect(miss, rgb).landmark[0].x, 0.45)
+        self.assertEqual(len(miss.inputs), 2)
+
+if __name__ == '__main__':
+    unittest.main()